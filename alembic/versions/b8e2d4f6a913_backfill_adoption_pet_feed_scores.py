@@ -0,0 +1,84 @@
+"""backfill adoption pet feed scores
+
+Revision ID: b8e2d4f6a913
+Revises: f61c4d8a2e57
+Create Date: 2026-10-19 23:48:21.517304
+
+"""
+import math
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2d4f6a913'
+down_revision: Union[str, None] = 'f61c4d8a2e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+# the feed score of app.utils.feed_score as of this revision
+FEED_EPOCH = datetime(2024, 1, 1)
+FEED_HALF_LIFE_HOURS = 72.0
+FEED_MEDIA_BONUS = 0.5
+TAU_HOURS = FEED_HALF_LIFE_HOURS / math.log(2)
+
+
+def feed_score(created_at, media, view_score):
+    if created_at is None:
+        return view_score
+    if created_at.tzinfo is not None:
+        created_at = created_at.replace(tzinfo=None)
+    weight = 1.0 + (FEED_MEDIA_BONUS if media else 0.0)
+    score = math.log(weight) + (created_at - FEED_EPOCH).total_seconds() / 3600.0 / TAU_HOURS
+    if view_score is None:
+        return score
+    high, low = max(score, view_score), min(score, view_score)
+    return high + math.log1p(math.exp(low - high))
+
+
+def upgrade() -> None:
+    # the pets listed before feed scores existed, unranked until now
+    adoption_pets = sa.table(
+        'adoption_pets',
+        sa.column('id', sa.Integer()),
+        sa.column('created_at', sa.DateTime()),
+        sa.column('media', sa.JSON()),
+        sa.column('feed_view_score', sa.Float()),
+        sa.column('feed_score', sa.Float()),
+    )
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(
+                adoption_pets.c.id,
+                adoption_pets.c.created_at,
+                adoption_pets.c.media,
+                adoption_pets.c.feed_view_score,
+            )
+            .where(adoption_pets.c.feed_score.is_(None), adoption_pets.c.id > last_id)
+            .order_by(adoption_pets.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            sa.update(adoption_pets)
+            .where(adoption_pets.c.id == sa.bindparam('b_id'))
+            .values(feed_score=sa.bindparam('score')),
+            [
+                {'b_id': row.id, 'score': feed_score(row.created_at, row.media, row.feed_view_score)}
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    # the scores stay, the refresh job would compute the same ones
+    pass
@@ -1,5 +1,5 @@
-from typing import Generator
-from fastapi import Depends, HTTPException, status
+from typing import Generator, Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
@@ -48,3 +48,37 @@ def get_current_active_superuser(
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+def get_geo_filter(
+    latitude: Optional[float] = Query(None, ge=-90, le=90),
+    longitude: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=100),
+    min_latitude: Optional[float] = Query(None, ge=-90, le=90),
+    max_latitude: Optional[float] = Query(None, ge=-90, le=90),
+    min_longitude: Optional[float] = Query(None, ge=-180, le=180),
+    max_longitude: Optional[float] = Query(None, ge=-180, le=180),
+) -> dict:
+    """
+    Optional location filter: a radius around a point and/or a bounding box.
+    """
+    geo_filter = {"latitude": None, "longitude": None, "radius_km": None, "bbox": None}
+
+    if radius_km is not None or latitude is not None or longitude is not None:
+        if radius_km is None or latitude is None or longitude is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="latitude, longitude and radius_km must be given together",
+            )
+        geo_filter.update(latitude=latitude, longitude=longitude, radius_km=radius_km)
+
+    bbox = (min_latitude, max_latitude, min_longitude, max_longitude)
+    if any(value is not None for value in bbox):
+        if any(value is None for value in bbox):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="min_latitude, max_latitude, min_longitude and max_longitude must be given together",
+            )
+        geo_filter["bbox"] = bbox
+
+    return geo_filter
@@ -0,0 +1,115 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+
+from app.api.deps import get_current_active_superuser
+from app.models.user import User
+from app.schemas.admin import (
+    ProfileFormat,
+    ProfilingSettings,
+    ProfilingStatus,
+    SlowQueryOrder,
+    SlowQueryReport,
+)
+from app.utils.constants import PROFILING_HEADER
+from app.utils.profiling import request_profiler
+from app.utils.slow_queries import slow_query_log
+
+router = APIRouter()
+
+
+@router.get("/slow-queries", response_model=SlowQueryReport)
+def read_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: SlowQueryOrder = SlowQueryOrder.total_ms,
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    Top slow SQL statements of this process, grouped by fingerprint.
+
+    - **order_by**: total_ms (default) for the most costly overall, p99_ms for the worst tails
+    """
+    return {
+        "threshold_ms": slow_query_log.threshold_seconds * 1000,
+        "items": slow_query_log.top(limit=limit, order_by=order_by.value),
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def reset_slow_queries(
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    Forget the slow statements recorded so far.
+    """
+    slow_query_log.reset()
+
+
+def _profiling_status() -> dict:
+    return {
+        "routes": sorted(request_profiler.routes),
+        "sample_rate": request_profiler.sample_rate,
+        "header": PROFILING_HEADER,
+        "interval_ms": request_profiler.sampler.interval_seconds * 1000,
+        "profiles": [profile.summary() for profile in request_profiler.profiles()],
+    }
+
+
+@router.get("/profiling", response_model=ProfilingStatus)
+def read_profiling(
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    What this process profiles and the profiles it keeps, newest first.
+    """
+    return _profiling_status()
+
+
+@router.put("/profiling", response_model=ProfilingStatus)
+def update_profiling(
+    settings: ProfilingSettings,
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    Profile the requests of this process matching the settings. Requests
+    with the X-Profile header and a superuser token are always profiled.
+
+    - **routes**: route paths as declared, e.g. /v1/pet/{pet_id}
+    - **sample_rate**: fraction of all requests, 0 to stop sampling
+    """
+    request_profiler.configure(settings.routes, settings.sample_rate)
+    return _profiling_status()
+
+
+@router.get("/profiles/{profile_id}")
+def download_profile(
+    profile_id: int,
+    format: ProfileFormat = ProfileFormat.speedscope,
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    Download a profile, for https://www.speedscope.app or flamegraph.pl.
+
+    - **format**: speedscope (default) or collapsed stacks
+    """
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+
+    if format == ProfileFormat.collapsed:
+        filename = f"profile-{profile_id}.collapsed.txt"
+        response = PlainTextResponse(profile.collapsed())
+    else:
+        filename = f"profile-{profile_id}.speedscope.json"
+        response = ORJSONResponse(profile.speedscope())
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@router.delete("/profiles", status_code=status.HTTP_204_NO_CONTENT)
+def clear_profiles(
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    Forget the profiles kept so far.
+    """
+    request_profiler.clear()
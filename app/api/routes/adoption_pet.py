@@ -1,5 +1,5 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
@@ -9,7 +9,9 @@ from app.schemas.adoption_pet import (
     AdoptionPetResponse,
     AdoptionPetUpdate,
     AdoptionPetUpdateStatus,
+    AdoptionPetSort,
 )
+from app.models.vaccination import VaccineType
 
 from app.crud.adoption_pet import (
     create_for_adoption_pet,
@@ -17,7 +19,11 @@ from app.crud.adoption_pet import (
     update_pet_status,
     get_pets_available,
     get_adoption_pet_details,
+    get_similar_adoption_pets,
 )
+from app.utils.constants import SIMILAR_PETS_MAX
+from app.utils.serialization import json_response
+from app.utils.view_counter import adoption_pet_view_counter
 
 router = APIRouter()
 
@@ -48,6 +54,8 @@ def read_adoption_pets_route(
     color: Optional[str] = None,
     size: Optional[str] = None,
     gender: Optional[str] = None,
+    sort_by: Optional[AdoptionPetSort] = None,
+    vaccinated_against: Optional[VaccineType] = None,
     db: Session = Depends(get_db),
 ):
     """
@@ -60,6 +68,8 @@ def read_adoption_pets_route(
     - **color**: Filter by color
     - **size**: Filter by size
     - **gender**: Filter by gender
+    - **sort_by**: 'popular' for the most viewed first, 'ranked' for recent and viewed pets first
+    - **vaccinated_against**: Only pets whose latest vaccination of this type hasn't expired
     """
     adoption_pets = get_pets_available(
         db=db,
@@ -70,8 +80,10 @@ def read_adoption_pets_route(
         color=color,
         size=size,
         gender=gender,
+        sort_by=sort_by,
+        vaccinated_against=vaccinated_against,
     )
-    return adoption_pets
+    return json_response(List[AdoptionPetResponse], adoption_pets)
 
 @router.get("/{adoption_pet_id}", response_model=AdoptionPetResponse)
 def read_adoption_pet(
@@ -87,9 +99,24 @@ def read_adoption_pet(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Adoption pet with ID {adoption_pet_id} not found"
         )
+    adoption_pet_view_counter.record(adoption_pet.id)
     return adoption_pet
 
 
+@router.get("/{adoption_pet_id}/similar", response_model=List[AdoptionPetResponse])
+def read_similar_adoption_pets(
+    adoption_pet_id: int,
+    limit: int = Query(5, ge=1, le=SIMILAR_PETS_MAX),
+    db: Session = Depends(get_db),
+):
+    """
+    Get the available pets most similar to a pet for adoption, most similar first.
+
+    - **limit**: Maximum number of pets to return
+    """
+    return get_similar_adoption_pets(db=db, adoption_pet_id=adoption_pet_id, limit=limit)
+
+
 @router.put("/update", response_model=AdoptionPetResponse)
 def update_adoption_pet_details_route(
     adoption_pet_update: AdoptionPetUpdate,
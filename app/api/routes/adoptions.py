@@ -1,13 +1,9 @@
-import os
-import json
+import io
 import logging
-from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from fastapi.responses import FileResponse
-from docxtpl import DocxTemplate
-import tempfile
+from fastapi.responses import StreamingResponse
 
 from app.core.database import get_db
 from app.api.deps import get_current_user
@@ -18,30 +14,48 @@ from app.schemas.adoption import (
     AdoptionStatus,
     AdoptionRead,
     AdoptionDocumentGeneration,
+    AdoptionBulkUpdateStatus,
+    AdoptionBulkUpdateResponse,
+    ContractFormat,
+    ContractJobCreate,
+    ContractJobResponse,
 )
 
 from app.crud.adoption import (
     get_adoption_list,
     create_adoption_request,
     update_adoption_request_status,
+    bulk_update_adoption_request_status,
     get_adoption_data,
+    get_adoptions_by_ids,
 )
 from app.models.user import User
-from app.utils.redis import RedisHelper
+from app.utils.contract import (
+    DOCX_MEDIA_TYPE,
+    build_contract_context,
+    content_disposition,
+    contract_filename,
+    contract_renderer,
+)
+from app.utils.contract_jobs import (
+    ContractJobStatus,
+    contract_job_manager,
+    pdf_converter_path,
+)
+from app.utils.constants import CONTRACT_JOB_MAX_ADOPTIONS
 
 router = APIRouter()
 
-redis = RedisHelper()
-
 
 @router.get("/adoptions", response_model=AdoptionListResponse)
 def read_adoption_list_route(
-    skip: int = 0,
-    limit: int = 10,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1),
     status: Optional[List[str]] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     db: Session = Depends(get_db),
 ):
-    adoptions = get_adoption_list(db=db,skip=skip,limit=limit,status=status)
+    adoptions = get_adoption_list(db=db,skip=skip,limit=limit,statuses=status,cursor=cursor)
 
     return adoptions
 @router.post("/adoptions", response_model=AdoptionRead, status_code=status.HTTP_201_CREATED)
@@ -66,27 +80,19 @@ def update_adoption_request_status_route(
     Update adoption request status
     """
 
-    update_adoption_request = update_adoption_request_status(db=db,adoption_id=adoption_id, adoption_status_in=status_update)
-
-    formatted_schedule = update_adoption_request.schedule.strftime("%B %d %Y, %I:%M %p") if update_adoption_request.schedule else None
-
-    redis_data = {
-        "queue_type": "notification",
-        "pet_image_url": update_adoption_request.adoption_pet.pet.image_url,
-        "pet_name": update_adoption_request.adoption_pet.pet.name,
-        "found_in": update_adoption_request.adoption_pet.found_in,
-        "additional_details": update_adoption_request.adoption_pet.additional_details,
-        "schedule": formatted_schedule,
-        "email": update_adoption_request.adopter.email,
-    }
-    if update_adoption_request.status == "screening":
-        adoption_request_queue = redis.add_to_redis_set("qc_pet_adoption:notifications", json.dumps(redis_data))
-    
-        if not adoption_request_queue:
-            logging.warning(f"Failed to store in the queue {update_adoption_request.id} in redis")
-
     return update_adoption_request_status(db=db,adoption_id=adoption_id, adoption_status_in=status_update)
 
+@router.patch("/adoptions/status", response_model=AdoptionBulkUpdateResponse)
+def bulk_update_adoption_request_status_route(
+    bulk_status_update: AdoptionBulkUpdateStatus,
+    db: Session = Depends(get_db),
+):
+    """
+    Update the status of several adoption requests at once,
+    e.g. approve one request and reject the other requests for the same pet.
+    """
+    return bulk_update_adoption_request_status(db=db, bulk_status_in=bulk_status_update)
+
 # generate document contract
 @router.post("/generate-document/", status_code=status.HTTP_201_CREATED)
 def generate_contract_document(
@@ -100,47 +106,88 @@ def generate_contract_document(
 
     if not adoption_details:
         raise HTTPException(status_code=404, detail="Adoption details is not found")
-    
-    # data to pass in the document
-    context = {
-        "pet_breed": adoption_details.adoption_pet.pet.breed,
-        "pet_color": adoption_details.adoption_pet.pet.color,
-        "pet_gender": adoption_details.adoption_pet.pet.gender,
-        "pet_type": adoption_details.adoption_pet.pet.type,
-        "pet_name": adoption_details.adoption_pet.pet.name,
-        "adopter": adoption_details.adopter.full_name,
-        "contact_no": adoption_details.adopter.contact,
-        "address": f"{adoption_details.adopter.home_street} {adoption_details.adopter.city}",
-        "date": f"{datetime.now().strftime('%B, %d %Y')}"
-    }
-
-    template_path = "app/templates/Adoption_Contract_Template.docx" 
+
+    context = build_contract_context(adoption_details)
 
     try:
-        doc = DocxTemplate(template_path)
+        # rendered once per distinct context, re-downloads come from the cache
+        content = contract_renderer.render_cached(context)
+    except Exception as e:
+        logging.error(f"Error in generating document: {e}")
+        raise HTTPException(status_code=500, detail=f"Document generation failed: {str(e)}")
 
-        doc.render(context)
+    return StreamingResponse(
+        io.BytesIO(content),
+        media_type=DOCX_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": content_disposition(contract_filename(context)),
+            "Content-Length": str(len(content)),
+        },
+    )
 
-        # Create a temporary file to store the output
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as tmp:
-            temp_path = tmp.name
-            doc.save(temp_path)
 
-        # Return the file as a download
-        filename = f"{context['adopter'].replace(' ', '_')}_adoption_contract_document.docx"
-        return FileResponse(
-            path=temp_path, 
-            filename=filename,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+@router.post("/generate-document/jobs", response_model=ContractJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_contract_job(
+    job_in: ContractJobCreate,
+    db: Session = Depends(get_db)
+):
+    """
+    Generate the contracts of several adoptions in the background.
+    Poll the job for progress and download the zip once it is finished.
+    """
+    adoption_ids = list(dict.fromkeys(job_in.adoption_ids))
+    if len(adoption_ids) > CONTRACT_JOB_MAX_ADOPTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A job can generate at most {CONTRACT_JOB_MAX_ADOPTIONS} contracts",
+        )
+    if job_in.format == ContractFormat.pdf and not pdf_converter_path():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="PDF conversion is not available on this server",
         )
 
-        
-    except BaseException as e:
-        logging.error(f"Error in generating document")
-        # Clean up temporary file if it exists
-        if 'temp_path' in locals():
-            os.unlink(temp_path)
-        raise HTTPException(status_code=500, detail=f"Document generation failed: {str(e)}")
-    
+    adoptions = {adoption.id: adoption for adoption in get_adoptions_by_ids(db=db, adoption_ids=adoption_ids)}
+    missing = [adoption_id for adoption_id in adoption_ids if adoption_id not in adoptions]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Adoptions not found: {missing}")
+
+    contracts = [
+        (adoption_id, build_contract_context(adoptions[adoption_id]))
+        for adoption_id in adoption_ids
+    ]
+    job = contract_job_manager.submit(contracts, file_format=job_in.format.value)
 
-    # return adoption_details
\ No newline at end of file
+    return job.to_dict()
+
+
+@router.get("/generate-document/jobs/{job_id}", response_model=ContractJobResponse)
+def read_contract_job(job_id: str):
+    """
+    Progress of a contract generation job.
+    """
+    job = contract_job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Contract job is not found")
+
+    return job.to_dict()
+
+
+@router.get("/generate-document/jobs/{job_id}/download")
+def download_contract_job(job_id: str):
+    """
+    Download the contracts of a finished job as a zip file.
+    """
+    job = contract_job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Contract job is not found")
+    if not job.is_finished:
+        raise HTTPException(status_code=409, detail="Contract job is still running")
+    if job.status == ContractJobStatus.FAILED:
+        raise HTTPException(status_code=409, detail="No contract could be generated for this job")
+
+    return StreamingResponse(
+        job.iter_zip(),
+        media_type="application/zip",
+        headers={"Content-Disposition": content_disposition(f"adoption_contracts_{job.id}.zip")},
+    )
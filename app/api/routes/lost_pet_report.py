@@ -6,27 +6,32 @@ from uuid import uuid4
 import shutil
 from typing import Any, List, Optional
 from typing_extensions import Annotated
-from fastapi import APIRouter, Depends, status, HTTPException, File, UploadFile, Form
+from fastapi import APIRouter, Depends, status, HTTPException, File, UploadFile, Form, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_geo_filter
 from app.crud.lost_pet_report import (
     create_lost_pet_report,
     get_lost_pet_reports,
     get_lost_pet_report_by_id,
     update_lost_pet_report_match,
+    get_lost_pet_report_candidates,
+    get_lost_pet_report_matches,
 )
 from app.schemas.lost_pet_report import (
     LostPetReport,
     LostPetReportCreate,
     LostPetReportDetailsResponse,
-    LostPetReportMatchUpdate
+    LostPetReportMatchUpdate,
+    LostPetReportCandidatesResponse,
 )
 
 from app.models.user import User
+from app.utils.constants import IMAGE_MATCH_MAX_DISTANCE
+from app.utils.image_hash import compute_image_hash
 
-# from app.tasks.lost_pet_report import send_lost_pet_report_to_redis
+from app.tasks.lost_pet_report import enqueue_report_for_matching
 from app.utils.redis import RedisHelper
 
 router = APIRouter()
@@ -48,12 +53,15 @@ def create_lost_pet_report_route(
     reporter_id: int = Form(...),
     details: str = Form(...),
     report_location: str = Form(...),
+    report_latitude: Optional[float] = Form(None, ge=-90, le=90),
+    report_longitude: Optional[float] = Form(None, ge=-180, le=180),
     image_file: Annotated[UploadFile, File()],
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """Create lost pet report"""
 
     image_url = None
+    image_hash = None
     # handle image upload if a file is provided
     if image_file and image_file.filename:
         try:
@@ -83,6 +91,8 @@ def create_lost_pet_report_route(
 
             # Generate a URL that can be accessed via your API
             image_url = f"{STATIC_URL_BASE}/{USER_FOLDER}/{filename}"
+            # unreadable images get an empty hash, the backfill doesn't retry them
+            image_hash = compute_image_hash(file_path) or ""
 
         except Exception as e:
             raise HTTPException(
@@ -94,7 +104,10 @@ def create_lost_pet_report_route(
         "reporter_id": reporter_id,
         "details": details,
         "report_location": report_location,
+        "report_latitude": report_latitude,
+        "report_longitude": report_longitude,
         "image_url": image_url,
+        "image_hash": image_hash,
     }
 
     created_lost_pet_report = create_lost_pet_report(
@@ -126,6 +139,9 @@ def create_lost_pet_report_route(
         logging.warning(f"Failed to store report {created_lost_pet_report.id} in Redis")
         pass
 
+    if not enqueue_report_for_matching(created_lost_pet_report.id):
+        logging.warning(f"Failed to queue report {created_lost_pet_report.id} for matching")
+
     return created_lost_pet_report
 
 
@@ -138,12 +154,16 @@ def read_lost_pet_reports_route(
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 0,
+    geo_filter: dict = Depends(get_geo_filter),
 ) -> Any:
     """
     Retrieve all lost pet reports.
+
+    - **latitude**, **longitude**, **radius_km**: only reports filed within the radius
+    - **min_latitude**, **max_latitude**, **min_longitude**, **max_longitude**: only reports filed inside the box
     """
 
-    lost_pet_reports = get_lost_pet_reports(db=db, skip=skip, limit=limit)
+    lost_pet_reports = get_lost_pet_reports(db=db, skip=skip, limit=limit, **geo_filter)
 
     return lost_pet_reports
 
@@ -170,6 +190,51 @@ def read_lost_pet_report_route(
     return lost_pet_report
 
 
+@router.get(
+    "/{report_id}/candidates",
+    response_model=LostPetReportCandidatesResponse,
+    status_code=status.HTTP_200_OK,
+)
+def read_lost_pet_report_candidates_route(
+    *,
+    db: Session = Depends(get_db),
+    report_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    max_distance: int = Query(IMAGE_MATCH_MAX_DISTANCE, ge=0, le=64),
+) -> Any:
+    """
+    Retrieve the open lost pets that most likely match the report, ranked on
+    pet attributes, last seen date and location, and image similarity.
+
+    - **limit**: Maximum number of candidates to return
+    - **max_distance**: Maximum Hamming distance (in bits) between image hashes
+    """
+
+    return get_lost_pet_report_candidates(
+        db=db,
+        report_id=report_id,
+        limit=limit,
+        max_distance=max_distance,
+    )
+
+
+@router.get(
+    "/{report_id}/matches",
+    response_model=LostPetReportCandidatesResponse,
+    status_code=status.HTTP_200_OK,
+)
+def read_lost_pet_report_matches_route(
+    *,
+    db: Session = Depends(get_db),
+    report_id: int,
+) -> Any:
+    """
+    Retrieve the candidates ranked for the report by the background match worker.
+    """
+
+    return get_lost_pet_report_matches(db=db, report_id=report_id)
+
+
 @router.patch(
     "/{report_id}/match",
     response_model=LostPetReportDetailsResponse,
@@ -3,10 +3,17 @@ from fastapi import APIRouter, Body, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.crud.lost_pet import create_lost_pet, get_lost_pets
-from app.schemas.lost_pet import LostPet, LostPetCreate, LostPetDetailsResponse
+from app.api.deps import get_geo_filter
+from app.crud.lost_pet import create_lost_pet, get_lost_pets, update_lost_pet_status
+from app.schemas.lost_pet import (
+    LostPet,
+    LostPetCreate,
+    LostPetDetailsResponse,
+    LostPetUpdateStatus,
+)
 
 from app.models.pet import PetGender
+from app.utils.serialization import json_response
 
 
 router = APIRouter()
@@ -37,9 +44,13 @@ def read_lost_pets_route(
     color: Optional[str] = None,
     size: Optional[str] = None,
     gender: Optional[PetGender] = None,
+    geo_filter: dict = Depends(get_geo_filter),
 ) -> Any:
     """
     Retrieve all lost pets records.
+
+    - **latitude**, **longitude**, **radius_km**: only cases last seen within the radius
+    - **min_latitude**, **max_latitude**, **min_longitude**, **max_longitude**: only cases last seen inside the box
     """
 
     lost_pets = get_lost_pets(db=db,skip=skip,
@@ -49,6 +60,22 @@ def read_lost_pets_route(
             color=color, 
             size=size, 
             gender=gender,
-            status=status,)
+            status=status,
+            **geo_filter,)
+
+    return json_response(List[LostPetDetailsResponse], lost_pets)
+
+
+@router.patch("/{lost_pet_id}/status", response_model=LostPetDetailsResponse)
+def update_lost_pet_status_route(
+    lost_pet_id: int,
+    status_update: LostPetUpdateStatus,
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Update the status of a lost pet case.
+    """
 
-    return lost_pets
\ No newline at end of file
+    return update_lost_pet_status(
+        db=db, lost_pet_id=lost_pet_id, status_update=status_update
+    )
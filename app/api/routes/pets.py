@@ -32,6 +32,8 @@ from app.crud.pet import (
 from app.schemas.pet import Pet, PetCreate, PetsByOwner, PetListResponse
 from app.models.user import User
 from app.models.pet import PurposePet
+from app.utils.image_hash import compute_image_hash
+from app.utils.serialization import json_response
 
 router = APIRouter()
 
@@ -62,6 +64,7 @@ def create_pet_route(
     """
 
     image_url = None
+    image_hash = None
 
     # handle image upload if a file is provided
     if image_file and image_file.filename:
@@ -91,6 +94,7 @@ def create_pet_route(
 
             # Generate a URL that can be accessed via your API
             image_url = f"{STATIC_URL_BASE}/{USER_FOLDER}/{filename}"
+            image_hash = compute_image_hash(file_path)
 
         except Exception as e:
             # Handle unexpected errors
@@ -109,6 +113,7 @@ def create_pet_route(
         "size": size,
         "description": description,
         "image_url": image_url,
+        "image_hash": image_hash,
         "purpose": purpose,
     }
 
@@ -163,10 +168,10 @@ def read_pets_route(
         purpose=purpose,
     )
 
-    return {
+    return json_response(PetListResponse, {
         "items": pets,
         "total": total,
-    }
+    })
 
 
 @router.get("/{pet_id}", response_model=Pet)
@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, get_current_active_superuser
+from app.crud.stats import get_stat_series
+from app.models.user import User
+from app.schemas.stats import StatGranularity, StatMetric, StatSeriesResponse
+
+router = APIRouter()
+
+# default window and widest range per granularity, in buckets
+DEFAULT_BUCKETS = {StatGranularity.hour: 48, StatGranularity.day: 30}
+MAX_BUCKETS = {StatGranularity.hour: 24 * 31, StatGranularity.day: 366 * 2}
+BUCKET_SIZE = {StatGranularity.hour: timedelta(hours=1), StatGranularity.day: timedelta(days=1)}
+# metrics whose total sums a value, the others only count
+VALUE_METRICS = {StatMetric.adoptions_approved}
+
+
+@router.get("/{metric}", response_model=StatSeriesResponse)
+def read_stat_series(
+    metric: StatMetric,
+    granularity: StatGranularity = StatGranularity.day,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    dimension: Optional[str] = Query(None, description="e.g. the pet type of views and lost pets"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_superuser),
+):
+    """
+    Time series of a metric from the hourly or daily rollups.
+
+    - **adoption_pet_views**: views per pet type
+    - **adoptions_created**: adoption requests
+    - **adoptions_approved**: approved adoptions, average is the days from request to adoption
+    - **lost_pets_reported**: lost pets per pet type
+    """
+    end = end or datetime.now()
+    start = start or end - DEFAULT_BUCKETS[granularity] * BUCKET_SIZE[granularity]
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    if end - start > MAX_BUCKETS[granularity] * BUCKET_SIZE[granularity]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BUCKETS[granularity]} {granularity.value} buckets per request",
+        )
+
+    rollups = get_stat_series(
+        db=db, metric=metric, granularity=granularity, start=start, end=end, dimension=dimension
+    )
+
+    return {
+        "metric": metric,
+        "granularity": granularity,
+        "start": start,
+        "end": end,
+        "items": [
+            {
+                "bucket_start": rollup.bucket_start,
+                "dimension": rollup.dimension,
+                "count": rollup.count,
+                "total": rollup.total,
+                "average": (
+                    rollup.total / rollup.count if metric in VALUE_METRICS and rollup.count else None
+                ),
+            }
+            for rollup in rollups
+        ],
+    }
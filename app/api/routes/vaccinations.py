@@ -1,23 +1,34 @@
-from fastapi import APIRouter, Depends, Query, status
-from typing import List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import StreamingResponse
+from typing import Iterator, List, Optional
+from typing_extensions import Annotated
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
 # from app.core.auth import get_current_active_user
 from app.models.user import User
 from app.schemas.vaccination import (
     VaccinationCreate,
     VaccinationUpdate,
     VaccinationResponse,
-    VaccinationListResponse
+    VaccinationListResponse,
+    VaccinationFileFormat,
+    VaccinationImportResponse,
+    PetVaccinationStatusResponse,
 )
 from app.crud.vaccination import (
     create_vaccination_record,
     get_vaccination_records,
     get_vaccination_record,
     update_vaccination_record,
-    delete_vaccination_record
+    delete_vaccination_record,
+    import_vaccination_records,
+    iter_vaccination_record_batches,
+    validate_vaccine_type,
+    get_pet_vaccination_statuses,
 )
+from app.utils.contract import content_disposition
+from app.utils.vaccination_files import MEDIA_TYPES, read_rows, write_rows
 
 router = APIRouter()
 
@@ -56,7 +67,9 @@ def list_vaccinations(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1),
     pet_id: Optional[int] = Query(None, description="Filter by pet ID"),
-    vaccine_type: Optional[str] = Query(None, description="Filter by vaccine type")
+    vaccine_type: Optional[str] = Query(None, description="Filter by vaccine type"),
+    currently_vaccinated: bool = Query(False, description="Only the latest unexpired record of each pet and vaccine type"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page")
 ):
     """
     Retrieve vaccination records with optional filtering and pagination:
@@ -64,13 +77,97 @@ def list_vaccinations(
     - **limit**: Maximum number of records to return
     - **pet_id**: Filter by specific pet (optional)
     - **vaccine_type**: Filter by vaccine type (optional)
+    - **currently_vaccinated**: Only the vaccinations still in effect (optional)
+    - **cursor**: next_cursor of the previous page, for the page after it (optional)
     """
     return get_vaccination_records(
         db=db,
         skip=skip,
         limit=limit,
         pet_id=pet_id,
-        vaccine_type=vaccine_type
+        vaccine_type=vaccine_type,
+        currently_vaccinated=currently_vaccinated,
+        cursor=cursor
+    )
+
+@router.get(
+    "/pets/{pet_id}/status",
+    response_model=List[PetVaccinationStatusResponse],
+    summary="Get the vaccination status of a pet"
+)
+def get_pet_vaccination_status(
+    pet_id: int,
+    db: Session = Depends(get_db)
+):
+    """
+    The latest vaccination of the pet against every vaccine type it received,
+    and whether it is still in effect
+    """
+    return get_pet_vaccination_statuses(db=db, pet_id=pet_id)
+
+@router.post(
+    "/vaccinations/import",
+    response_model=VaccinationImportResponse,
+    summary="Import vaccination records from a CSV or NDJSON file"
+)
+def import_vaccinations(
+    *,
+    file: Annotated[UploadFile, File()],
+    format: Optional[VaccinationFileFormat] = Query(None, description="Taken from the file name when left out"),
+    db: Session = Depends(get_db),
+    # current_user: User = Depends(get_current_active_user)
+):
+    """
+    Create many vaccination records at once, e.g. the records of a vaccination drive.
+
+    A CSV has a header row naming the columns, an NDJSON file holds one JSON
+    object per line, with the fields of a created record:
+    pet_id, vaccine_type, owner, contact, administered_by, expiration_date,
+    administered_date (optional, the import time when left out) and notes
+    (optional). Other columns are ignored, so an export can be imported
+    again with its administered dates. Rows that can't be imported are reported by line.
+    """
+    if format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        if extension == "csv":
+            format = VaccinationFileFormat.csv
+        elif extension in ("ndjson", "jsonl"):
+            format = VaccinationFileFormat.ndjson
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Pass the format or upload a .csv, .ndjson or .jsonl file"
+            )
+    return import_vaccination_records(db=db, rows=read_rows(file.file, format.value))
+
+@router.get(
+    "/vaccinations/export",
+    summary="Export vaccination records as CSV or NDJSON"
+)
+def export_vaccinations(
+    *,
+    format: VaccinationFileFormat = Query(VaccinationFileFormat.csv),
+    pet_id: Optional[int] = Query(None, description="Filter by pet ID"),
+    vaccine_type: Optional[str] = Query(None, description="Filter by vaccine type")
+):
+    """
+    Stream the vaccination records matching the filters, in id order
+    """
+    validated_type = validate_vaccine_type(vaccine_type) if vaccine_type else None
+
+    def content() -> Iterator[str]:
+        # a session of its own, the response is streamed after the route returns
+        db = SessionLocal()
+        try:
+            batches = iter_vaccination_record_batches(db=db, pet_id=pet_id, vaccine_type=validated_type)
+            yield from write_rows(batches, format.value)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        content(),
+        media_type=MEDIA_TYPES[format.value],
+        headers={"Content-Disposition": content_disposition(f"vaccination_records.{format.value}")},
     )
 
 @router.get(
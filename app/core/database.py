@@ -2,9 +2,12 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.utils.constants import DATABASE_URL
+from app.utils.instrumentation import instrument_engine
 
 
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# statements, rows and time of each request, see app/utils/instrumentation.py
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -1,20 +1,26 @@
 from typing import List, Optional
 
 
-from sqlalchemy import or_
+from sqlalchemy import func, or_, tuple_
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
 from fastapi import HTTPException, status
 
 
 from app.models.adoption import Adoption
-from app.models.pet import AdoptionPet
+from app.models.pet import AdoptionPet, Pet
 from app.models.user import User
+from app.utils.events import AdoptionStatusChanged, event_bus
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_after
 from app.schemas.adoption import (
     AdoptionCreate,
     AdoptionUpdateStatus,
+    AdoptionBulkUpdateStatus,
     AdoptionInDB,
-    AdoptionStatus
+    AdoptionStatus,
+    can_transition,
+    statuses_allowing,
 )
 
 def create_adoption_request(db:Session,adoption_in: AdoptionCreate, current_user: User)-> Adoption:
@@ -51,50 +57,70 @@ def create_adoption_request(db:Session,adoption_in: AdoptionCreate, current_user
         )
 
 
+ADOPTION_LIST_ORDER = (Adoption.status, Adoption.created_at, Adoption.id)
+
+
 def get_adoption_list(
     db: Session,
     skip: int = 0,
     limit: int = 10,
-    status: Optional[List[str]] = None,
+    statuses: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
 ):
     """
     Get list of adoptions
+
+    Ordered by (status, created_at, id), served by the matching composite
+    index. The page and the total come from one query, the total being a
+    count(*) OVER () window. Passing the next_cursor of a page returns the
+    page after it (keyset pagination, skip is ignored).
     """
+    validated_statuses = []
+    for s in statuses or []:
+        try:
+            validated_statuses.append(AdoptionStatus(s).value)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid status: {s}. Must be one of: {', '.join([s.value for s in AdoptionStatus])}",
+            )
+
     try:
-        base_query = db.query(Adoption)
-
-        if status:
-            validated_statuses = []
-            for s in status:
-                try:
-                    validated_status = AdoptionStatus(s)
-                    validated_statuses.append(validated_status)
-                except ValueError:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Invalid status: {s}. Must be one of: {', '.join([s.value for s in AdoptionStatus])}",
-                    )
-           
-            base_query = base_query.filter(Adoption.status.in_(validated_statuses))
-
-        total = base_query.count()
-        adoptions = (
-            db.query(Adoption)
-            .join(AdoptionPet, Adoption.adoption_pet_id == AdoptionPet.id)
-            .options(joinedload(Adoption.adoption_pet))
+        filters = []
+        if validated_statuses:
+            filters.append(Adoption.status.in_(validated_statuses))
+
+        page_filters = list(filters)
+        if cursor:
+            page_filters.append(
+                keyset_after(ADOPTION_LIST_ORDER, decode_cursor(cursor, datetime_positions=(1,)))
+            )
+            skip = 0
+
+        rows = (
+            db.query(Adoption, func.count().over().label("total"))
+            .options(*_adoption_load_options())
+            .filter(*page_filters)
+            .order_by(*ADOPTION_LIST_ORDER)
+            .offset(skip)
+            .limit(limit)
+            .all()
         )
+        items = [adoption for adoption, _ in rows]
 
-        if status:
-            adoptions = adoptions.filter(Adoption.status.in_(validated_statuses))
+        if cursor or (not rows and skip):
+            # the window only sees rows after the cursor / none past the last page
+            total = db.query(func.count(Adoption.id)).filter(*filters).scalar()
+        else:
+            total = rows[0].total if rows else 0
 
-        return {"items": adoptions.offset(skip).limit(limit).all(), "total": total}
+        next_cursor = None
+        if items and len(items) == limit:
+            last = items[-1]
+            next_cursor = encode_cursor([last.status, last.created_at, last.id])
+
+        return {"items": items, "total": total, "next_cursor": next_cursor}
 
-    except IntegrityError as e:
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Database integrity error: {str(e)}",
-        )
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(
@@ -103,13 +129,74 @@ def get_adoption_list(
         )
 
 
+def _adoption_load_options():
+    """Eager loads for everything AdoptionInDB and its notifications read."""
+    return (
+        joinedload(Adoption.adoption_pet).joinedload(AdoptionPet.pet).joinedload(Pet.owner),
+        joinedload(Adoption.adopter),
+        joinedload(Adoption.approved_admin),
+    )
+
+
+def _lock_adoption_pets(db: Session, adoption_pet_ids: List[int]) -> None:
+    """
+    Lock the adoption pets about to get an approved request, so concurrent
+    approvals of the same pet wait for each other. Pets are locked before
+    their requests, in id order.
+    """
+    (
+        db.query(AdoptionPet.id)
+        .filter(AdoptionPet.id.in_(set(adoption_pet_ids)))
+        .order_by(AdoptionPet.id)
+        .with_for_update()
+        .all()
+    )
+
+
+def _refuse_second_approval(db: Session, adoption_pet_ids: List[int], adoption_ids: List[int]) -> None:
+    """
+    Refuse approving a request for a pet with another approved request. A
+    locking read, so with the pets locked it sees an approval committed while
+    we waited for the lock.
+    """
+    approved = (
+        db.query(Adoption.adoption_pet_id)
+        .filter(
+            Adoption.adoption_pet_id.in_(set(adoption_pet_ids)),
+            Adoption.id.notin_(adoption_ids),
+            Adoption.status == AdoptionStatus.approved.value,
+            Adoption.deleted_at.is_(None),
+        )
+        .with_for_update()
+        .first()
+    )
+    if approved:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Pet with ID {approved.adoption_pet_id} already has an approved adoption request",
+        )
+
+
 def update_adoption_request_status(
         db: Session,
         adoption_id:int,
         adoption_status_in: AdoptionUpdateStatus
-):  
+):
+    """
+    Change the status of an adoption request in one transaction.
+
+    The request is read once with its pet and users eagerly loaded and the
+    response is built before the commit, so no lazy load follows. An
+    approval is refused when the pet has another approved request. An
+    AdoptionStatusChanged event is emitted once the change is committed.
+    """
     try:
-        update_adoption_status = db.query(Adoption).filter(Adoption.id == adoption_id).first()
+        update_adoption_status = (
+            db.query(Adoption)
+            .options(*_adoption_load_options())
+            .filter(Adoption.id == adoption_id)
+            .first()
+        )
 
         if not update_adoption_status:
             raise HTTPException(
@@ -117,22 +204,47 @@ def update_adoption_request_status(
                 detail=f"Adoption request  with ID {adoption_id} not found",
             )
 
+        previous_status = update_adoption_status.status
+
+        if adoption_status_in.version is not None and adoption_status_in.version != update_adoption_status.version:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Adoption request with ID {adoption_id} was changed by someone else, reload it and try again",
+            )
+
+        if not can_transition(previous_status, adoption_status_in.status):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Cannot change adoption request status from {previous_status} to {adoption_status_in.status.value}",
+            )
+
         if adoption_status_in.status == "screening":
             update_adoption_status.schedule = adoption_status_in.schedule
 
         if adoption_status_in.status == "approved":
+            _lock_adoption_pets(db, [update_adoption_status.adoption_pet_id])
+            _refuse_second_approval(db, [update_adoption_status.adoption_pet_id], [adoption_id])
             update_adoption_status.approved_by = adoption_status_in.approved_by
             update_adoption_status.adoption_date = adoption_status_in.adoption_date
-            update_adoption_status.agreement_signed = adoption_status_in.agreement_signed
-
+            if adoption_status_in.agreement_signed is not None:
+                update_adoption_status.agreement_signed = adoption_status_in.agreement_signed
 
         update_adoption_status.status = adoption_status_in.status
 
+        db.flush()
+        # approved_admin was eagerly loaded for the previous approved_by
+        if adoption_status_in.status == "approved":
+            db.expire(update_adoption_status, ["approved_admin"])
+        adoption = AdoptionInDB.model_validate(update_adoption_status)
         db.commit()
-        db.refresh(update_adoption_status)
-
-        return AdoptionInDB.model_validate(update_adoption_status)
 
+    except StaleDataError:
+        # the version check of the UPDATE matched no row, another change won the race
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Adoption request with ID {adoption_id} was changed by someone else, reload it and try again",
+        )
     except IntegrityError as e:
         # Roll back the transaction in case of constraint violations
         db.rollback()
@@ -147,7 +259,157 @@ def update_adoption_request_status(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}",
         )
-    
+
+    event_bus.emit(AdoptionStatusChanged(adoption=adoption, previous_status=previous_status))
+
+    return adoption
+
+
+def _update_locked_adoptions(db: Session, rows, sources: List[str], values) -> None:
+    """
+    Change the (id, version) rows read with a lock. The UPDATE still only
+    matches them at that version and status; a row it misses was changed
+    despite the lock and the whole change is refused.
+    """
+    updated = (
+        db.query(Adoption)
+        .filter(
+            tuple_(Adoption.id, Adoption.version).in_([(row.id, row.version) for row in rows]),
+            Adoption.status.in_(sources),
+        )
+        .update(values, synchronize_session=False)
+    )
+    if updated != len(rows):
+        raise StaleDataError(f"Updated {updated} of {len(rows)} adoption requests")
+
+
+def bulk_update_adoption_request_status(
+    db: Session,
+    bulk_status_in: AdoptionBulkUpdateStatus,
+):
+    """
+    Move many adoption requests to one status with set-based UPDATEs.
+
+    Requests whose current status doesn't allow the change are skipped.
+    With reject_siblings an approval also rejects, in one more UPDATE, every
+    other open request for the same pets. An approval is refused when a pet
+    has another approved request.
+
+    The requests are read with a lock, so every eligible one is changed from
+    the status read; the response is built before the commit.
+    """
+    target = bulk_status_in.status
+    adoption_ids = list(dict.fromkeys(bulk_status_in.adoption_ids))
+
+    if bulk_status_in.reject_siblings and target != AdoptionStatus.approved:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="reject_siblings can only be used when approving",
+        )
+
+    try:
+        sources = statuses_allowing(target)
+        if target == AdoptionStatus.approved:
+            requested = db.query(Adoption.adoption_pet_id).filter(Adoption.id.in_(adoption_ids)).all()
+            _lock_adoption_pets(db, [row.adoption_pet_id for row in requested])
+
+        # locked until the commit, so every eligible request is changed from the status read here
+        rows = (
+            db.query(Adoption.id, Adoption.status, Adoption.version, Adoption.adoption_pet_id)
+            .filter(Adoption.id.in_(adoption_ids), Adoption.deleted_at.is_(None))
+            .order_by(Adoption.id)
+            .with_for_update()
+            .all()
+        )
+        eligible = [row for row in rows if row.status in sources]
+
+        if target == AdoptionStatus.approved:
+            adoption_pet_ids = [row.adoption_pet_id for row in eligible]
+            if len(adoption_pet_ids) != len(set(adoption_pet_ids)):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Only one adoption request per pet can be approved",
+                )
+            if eligible:
+                _refuse_second_approval(db, adoption_pet_ids, [row.id for row in eligible])
+
+        values = {Adoption.status: target.value, Adoption.version: Adoption.version + 1}
+        if target == AdoptionStatus.screening:
+            values[Adoption.schedule] = bulk_status_in.schedule
+        if target == AdoptionStatus.approved:
+            values[Adoption.approved_by] = bulk_status_in.approved_by
+            values[Adoption.adoption_date] = bulk_status_in.adoption_date
+            if bulk_status_in.agreement_signed is not None:
+                values[Adoption.agreement_signed] = bulk_status_in.agreement_signed
+
+        # (id, previous status) of every request we change
+        changes = [(row.id, row.status) for row in eligible]
+        if eligible:
+            _update_locked_adoptions(db, eligible, sources, values)
+
+        if bulk_status_in.reject_siblings and eligible:
+            rejectable = statuses_allowing(AdoptionStatus.rejected)
+            siblings = (
+                db.query(Adoption.id, Adoption.version, Adoption.status)
+                .filter(
+                    Adoption.adoption_pet_id.in_([row.adoption_pet_id for row in eligible]),
+                    Adoption.id.notin_([row.id for row in eligible]),
+                    Adoption.status.in_(rejectable),
+                    Adoption.deleted_at.is_(None),
+                )
+                .order_by(Adoption.id)
+                .with_for_update()
+                .all()
+            )
+            if siblings:
+                changes.extend((row.id, row.status) for row in siblings)
+                _update_locked_adoptions(
+                    db,
+                    siblings,
+                    rejectable,
+                    {Adoption.status: AdoptionStatus.rejected.value, Adoption.version: Adoption.version + 1},
+                )
+
+        items = []
+        if changes:
+            changed = {
+                adoption.id: adoption
+                for adoption in db.query(Adoption)
+                .options(*_adoption_load_options())
+                .populate_existing()
+                .filter(Adoption.id.in_([adoption_id for adoption_id, _ in changes]))
+            }
+            items = [AdoptionInDB.model_validate(changed[adoption_id]) for adoption_id, _ in changes]
+
+        db.commit()
+
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Adoption requests were changed by someone else, reload them and try again",
+        )
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Database integrity error: {str(e)}",
+        )
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}",
+        )
+
+    for item, (_, previous_status) in zip(items, changes):
+        event_bus.emit(AdoptionStatusChanged(adoption=item, previous_status=previous_status))
+
+    updated_ids = {item.id for item in items}
+    skipped = [adoption_id for adoption_id in adoption_ids if adoption_id not in updated_ids]
+
+    return {"items": items, "skipped": skipped}
+
 
 def get_adoption_data(
     db: Session,
@@ -174,3 +436,23 @@ def get_adoption_data(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}",
         )
+
+
+def get_adoptions_by_ids(db: Session, adoption_ids: List[int]) -> List[Adoption]:
+    """Load several adoptions with the pet and adopter needed for their contracts."""
+    try:
+        return (
+            db.query(Adoption)
+            .options(
+                joinedload(Adoption.adoption_pet).joinedload(AdoptionPet.pet),
+                joinedload(Adoption.adopter),
+            )
+            .filter(Adoption.id.in_(adoption_ids), Adoption.deleted_at.is_(None))
+            .all()
+        )
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}",
+        )
@@ -1,17 +1,40 @@
-from typing import Any, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 
 
+from sqlalchemy import and_, bindparam, case, update
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from fastapi import HTTPException, status
 
 
+from app.crud.stats import get_watermark, record_adoption_pet_view_rollups, set_watermark
 from app.models.pet import Pet, AdoptionPet
+from app.models.user import User
+from app.models.vaccination import PetVaccinationStatus, VaccineType
+from app.utils.constants import FEED_REFRESH_BATCH_SIZE, FEED_REFRESH_LAG_SECONDS
+from app.utils.feed_score import add_views, feed_score
+from app.utils.events import ResponseCacheInvalidated, event_bus
+from app.utils.pagination import keyset_after
+from app.utils.response_cache import ADOPTION_PET_TAG, ADOPTION_PETS_TAG
+from app.utils.serialization import model_projection
+from app.utils.similar_pets import SimilarPetCase, similar_pet_index
 from app.schemas.adoption_pet import (
     AdoptionPetCreate,
     AdoptionPetUpdateStatus,
     AdoptionPetUpdate,
     AdoptionPetInDB,
+    AdoptionPetSort,
+    AdoptionPetResponse,
+)
+
+VIEW_COUNT_UPDATE_CHUNK = 500
+FEED_SCORE_WATERMARK = "feed_scores"
+AVAILABLE_STATUS = "AVAILABLE"
+
+# columns of the available pets list, read without loading ORM instances
+AVAILABLE_PETS_PROJECTION = model_projection(
+    AdoptionPetResponse, {"": AdoptionPet, "pet": Pet, "pet.owner": User}
 )
 
 
@@ -30,6 +53,9 @@ def create_for_adoption_pet(
 
     try:
 
+        # scored at once, so the pet is ranked before the refresh job gets to it;
+        # utc like the views that move the score later
+        created_at = datetime.utcnow()
         db_adoption_pet = AdoptionPet(
             pet_id=adoption_pet_in.pet_id,
             found_in=adoption_pet_in.found_in,
@@ -37,12 +63,17 @@ def create_for_adoption_pet(
             is_neutered=adoption_pet_in.is_neutered,
             additional_details=adoption_pet_in.additional_details,
             media=adoption_pet_in.media,
+            created_at=created_at,
+            feed_score=feed_score(created_at, adoption_pet_in.media, None),
         )
 
         db.add(db_adoption_pet)
         db.commit()
         db.refresh(db_adoption_pet)
 
+        sync_similar_pet_index(db_adoption_pet)
+        event_bus.emit(ResponseCacheInvalidated(tags=[ADOPTION_PETS_TAG]))
+
         # return db_adoption_pet
         return AdoptionPetInDB.model_validate(db_adoption_pet)
 
@@ -69,16 +100,18 @@ def get_pets_available(
     color: Optional[str] = None,
     size: Optional[str] = None,
     gender: Optional[str] = None,
-) -> List[AdoptionPet]:
-    """Get all of the pets that is available for adoption"""
+    sort_by: Optional[AdoptionPetSort] = None,
+    vaccinated_against: Optional[VaccineType] = None,
+) -> List[Dict[str, Any]]:
+    """Get all of the pets that is available for adoption, as dicts shaped like AdoptionPetResponse"""
 
     try:
         query = (
-            db.query(AdoptionPet)
+            db.query(*AVAILABLE_PETS_PROJECTION.columns)
             .join(Pet, AdoptionPet.pet_id == Pet.id)
-            .options(joinedload(AdoptionPet.pet))
+            .join(User, Pet.owner_id == User.id)
             .filter(AdoptionPet.deleted_at == None)
-            .filter(AdoptionPet.status == "AVAILABLE")
+            .filter(AdoptionPet.status == AVAILABLE_STATUS)
         )
 
         # Apply filters if provided
@@ -92,10 +125,23 @@ def get_pets_available(
             query = query.filter(Pet.size == size)
         if gender:
             query = query.filter(Pet.gender == gender)
-
-        query = query.offset(skip).limit(limit).all()
-
-        return query
+        if vaccinated_against:
+            # one primary key lookup of the pet's status
+            query = query.join(
+                PetVaccinationStatus,
+                and_(
+                    PetVaccinationStatus.pet_id == Pet.id,
+                    PetVaccinationStatus.vaccine_type == vaccinated_against,
+                ),
+            ).filter(PetVaccinationStatus.expiration_date > datetime.utcnow())
+
+        if sort_by == AdoptionPetSort.popular:
+            query = query.order_by(AdoptionPet.view_count.desc(), AdoptionPet.id.desc())
+        elif sort_by == AdoptionPetSort.ranked:
+            # range read of the (status, feed_score) index
+            query = query.order_by(AdoptionPet.feed_score.desc(), AdoptionPet.id.desc())
+
+        return AVAILABLE_PETS_PROJECTION.to_dicts(query.offset(skip).limit(limit).all())
 
     except IntegrityError as e:
         db.rollback()
@@ -135,6 +181,109 @@ def get_adoption_pet_details(
         .first()
     )
 
+
+def _adoption_pet_tags(*adoption_pet_ids: int) -> List[str]:
+    """Cached responses showing the given adoption pets."""
+    return [ADOPTION_PET_TAG.format(adoption_pet_id=adoption_pet_id) for adoption_pet_id in adoption_pet_ids] + [
+        ADOPTION_PETS_TAG
+    ]
+
+
+def _similar_pet_case(adoption_pet: AdoptionPet) -> SimilarPetCase:
+    pet = adoption_pet.pet
+    return SimilarPetCase(
+        id=adoption_pet.id,
+        type=pet.type,
+        breed=pet.breed,
+        size=pet.size,
+        color=pet.color,
+        gender=pet.gender,
+        age=pet.age,
+        is_vaccinated=adoption_pet.is_vaccinated,
+        is_neutered=adoption_pet.is_neutered,
+    )
+
+
+def refresh_similar_pet_index(db: Session, force: bool = False) -> None:
+    """Rebuild the similar pets matrix from the available pets when it is stale."""
+    if not force and not similar_pet_index.is_stale():
+        return
+
+    rows = (
+        db.query(
+            AdoptionPet.id,
+            Pet.type,
+            Pet.breed,
+            Pet.size,
+            Pet.color,
+            Pet.gender,
+            Pet.age,
+            AdoptionPet.is_vaccinated,
+            AdoptionPet.is_neutered,
+        )
+        .join(Pet, AdoptionPet.pet_id == Pet.id)
+        .filter(AdoptionPet.deleted_at == None)
+        .filter(AdoptionPet.status == AVAILABLE_STATUS)
+        .all()
+    )
+    similar_pet_index.load(SimilarPetCase(*row) for row in rows)
+
+
+def sync_similar_pet_index(adoption_pet: AdoptionPet) -> None:
+    """
+    Apply a single adoption pet change to the in-process similar pets matrix.
+    """
+    if adoption_pet.deleted_at is None and adoption_pet.status == AVAILABLE_STATUS:
+        similar_pet_index.upsert(_similar_pet_case(adoption_pet))
+    else:
+        similar_pet_index.remove(adoption_pet.id)
+
+
+def get_similar_adoption_pets(
+    db: Session,
+    adoption_pet_id: int,
+    limit: int = 5,
+) -> List[AdoptionPet]:
+    """
+    Get the available pets of the same type closest to an adoption pet in
+    breed, size, color, gender, age and vaccination/neuter flags, nearest
+    first. The pet itself needn't be available anymore.
+    """
+    adoption_pet = get_adoption_pet_details(db=db, pet_id=adoption_pet_id)
+    if adoption_pet is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Adoption pet with ID {adoption_pet_id} not found",
+        )
+
+    try:
+        refresh_similar_pet_index(db)
+        neighbour_ids = [
+            neighbour_id
+            for neighbour_id, _ in similar_pet_index.nearest(_similar_pet_case(adoption_pet), limit=limit)
+        ]
+        if not neighbour_ids:
+            return []
+
+        # the matrix may lag other workers, only return pets still available
+        pets = {
+            pet.id: pet
+            for pet in db.query(AdoptionPet)
+            .options(joinedload(AdoptionPet.pet))
+            .filter(AdoptionPet.id.in_(neighbour_ids))
+            .filter(AdoptionPet.deleted_at == None)
+            .filter(AdoptionPet.status == AVAILABLE_STATUS)
+        }
+        return [pets[neighbour_id] for neighbour_id in neighbour_ids if neighbour_id in pets]
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}",
+        )
+
+
 def update_pet_status(
     db: Session,
     status_update: AdoptionPetUpdateStatus,
@@ -163,6 +312,9 @@ def update_pet_status(
         # Refresh the instance to get the updated data
         db.refresh(update_adoption_pet)
 
+        sync_similar_pet_index(update_adoption_pet)
+        event_bus.emit(ResponseCacheInvalidated(tags=_adoption_pet_tags(update_adoption_pet.id)))
+
         # Return the updated pet data
         return AdoptionPetInDB.model_validate(update_adoption_pet)
     except IntegrityError as e:
@@ -216,6 +368,9 @@ def update_adoption_pet(
         # Refresh the instance to get the updated data
         db.refresh(pet)
 
+        sync_similar_pet_index(pet)
+        event_bus.emit(ResponseCacheInvalidated(tags=_adoption_pet_tags(pet.id)))
+
         # Return the updated pet data
         return AdoptionPetInDB.model_validate(pet)
 
@@ -233,3 +388,108 @@ def update_adoption_pet(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}",
         )
+
+
+def apply_adoption_pet_view_counts(db: Session, counts: Dict[int, int]) -> int:
+    """
+    Add buffered views to the view_count of adoption pets.
+
+    One UPDATE ... SET view_count = view_count + CASE id ... END per chunk of
+    pets, which also moves their feed scores, committed together with the
+    views rollup of the flush. Returns the number of pets updated.
+    """
+    pet_ids = sorted(counts)
+    viewed_at = datetime.utcnow()
+    updated = 0
+    try:
+        for start in range(0, len(pet_ids), VIEW_COUNT_UPDATE_CHUNK):
+            chunk = pet_ids[start:start + VIEW_COUNT_UPDATE_CHUNK]
+            increment = case({pet_id: counts[pet_id] for pet_id in chunk}, value=AdoptionPet.id, else_=0)
+
+            view_scores, scores = {}, {}
+            for pet_id, created_at, media, view_score in (
+                db.query(AdoptionPet.id, AdoptionPet.created_at, AdoptionPet.media, AdoptionPet.feed_view_score)
+                .filter(AdoptionPet.id.in_(chunk))
+            ):
+                view_scores[pet_id] = add_views(view_score, counts[pet_id], viewed_at)
+                scores[pet_id] = feed_score(created_at, media, view_scores[pet_id])
+            if not view_scores:
+                continue
+
+            updated += (
+                db.query(AdoptionPet)
+                .filter(AdoptionPet.id.in_(list(view_scores)))
+                .update(
+                    {
+                        AdoptionPet.view_count: AdoptionPet.view_count + increment,
+                        AdoptionPet.feed_view_score: case(view_scores, value=AdoptionPet.id),
+                        AdoptionPet.feed_score: case(scores, value=AdoptionPet.id),
+                        # a view is not a change of the pet
+                        AdoptionPet.updated_at: AdoptionPet.updated_at,
+                    },
+                    synchronize_session=False,
+                )
+            )
+        record_adoption_pet_view_rollups(db, counts, viewed_at=viewed_at)
+        db.commit()
+        # view counts and the popular and ranked orders moved
+        event_bus.emit(ResponseCacheInvalidated(tags=_adoption_pet_tags(*pet_ids)))
+        return updated
+
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+
+
+def refresh_adoption_pet_feed_scores(db: Session, batch_size: int = FEED_REFRESH_BATCH_SIZE) -> int:
+    """
+    Recompute the feed score of the adoption pets created or edited since
+    the last run, walking (updated_at, id) past a watermark.
+
+    Scores moved by a view flush in between are left alone (the flush wrote
+    the current score already), and updated_at is kept so the refresh never
+    picks up its own writes. Returns the number of pets scored.
+    """
+    watermark = get_watermark(db, FEED_SCORE_WATERMARK)
+    query = db.query(
+        AdoptionPet.id,
+        AdoptionPet.updated_at,
+        AdoptionPet.created_at,
+        AdoptionPet.media,
+        AdoptionPet.feed_view_score,
+    ).filter(AdoptionPet.updated_at < datetime.now() - timedelta(seconds=FEED_REFRESH_LAG_SECONDS))
+    if watermark:
+        updated_at, last_id = watermark.split("|")
+        query = query.filter(
+            keyset_after(
+                (AdoptionPet.updated_at, AdoptionPet.id),
+                (datetime.fromisoformat(updated_at), int(last_id)),
+            )
+        )
+    rows = query.order_by(AdoptionPet.updated_at, AdoptionPet.id).limit(batch_size).all()
+    if not rows:
+        return 0
+
+    table = AdoptionPet.__table__
+    db.execute(
+        update(table)
+        .where(
+            table.c.id == bindparam("b_id"),
+            table.c.feed_view_score.is_not_distinct_from(bindparam("view_score")),
+        )
+        .values(feed_score=bindparam("score"), updated_at=table.c.updated_at),
+        [
+            {
+                "b_id": row.id,
+                "view_score": row.feed_view_score,
+                "score": feed_score(row.created_at, row.media, row.feed_view_score),
+            }
+            for row in rows
+        ],
+    )
+    last = rows[-1]
+    set_watermark(db, FEED_SCORE_WATERMARK, f"{last.updated_at.isoformat()}|{last.id}")
+    db.commit()
+    event_bus.emit(ResponseCacheInvalidated(tags=[ADOPTION_PETS_TAG]))
+
+    return len(rows)
@@ -0,0 +1,28 @@
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.geo_place import GeoPlace
+from app.utils.geocoding import gazetteer
+
+
+def get_geo_places(db: Session) -> List[Tuple]:
+    """Get every known place of the offline gazetteer"""
+    return db.query(
+        GeoPlace.normalized_name,
+        GeoPlace.name,
+        GeoPlace.city,
+        GeoPlace.latitude,
+        GeoPlace.longitude,
+    ).all()
+
+
+def geocode_location(db: Session, location: Optional[str]) -> Optional[Tuple[float, float]]:
+    """
+    Resolve a free-text location to (latitude, longitude) using the local
+    geo_places table, None when no known place is mentioned.
+    """
+    if not gazetteer.is_loaded:
+        gazetteer.load(get_geo_places(db))
+
+    return gazetteer.geocode(location)
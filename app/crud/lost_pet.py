@@ -1,7 +1,25 @@
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
+from fastapi import HTTPException, status as http_status
 from sqlalchemy.orm import Session, joinedload
-from app.models.pet import Pet, LostPet
-from app.schemas.lost_pet import LostPetCreate, LostPetUpdate
+from sqlalchemy.exc import SQLAlchemyError
+from app.crud.geo_place import geocode_location
+from app.models.pet import Pet, LostPet, LostPetStatus
+from app.models.user import User
+from app.schemas.lost_pet import LostPetCreate, LostPetDetailsResponse, LostPetUpdate, LostPetUpdateStatus
+from app.utils.events import ResponseCacheInvalidated, event_bus
+from app.utils.geocoding import bounding_box_filter, radius_filter
+from app.utils.image_hash import lost_pet_image_index
+from app.utils.lost_pet_matcher import LostPetCase, lost_pet_matcher
+from app.utils.response_cache import LOST_PETS_TAG
+from app.utils.serialization import model_projection
+
+# cases that can still be matched against sighting reports
+OPEN_LOST_PET_STATUSES = [LostPetStatus.REPORTED, LostPetStatus.SEARCHING]
+
+# columns of the lost pets list, read without loading ORM instances
+LOST_PET_LIST_PROJECTION = model_projection(
+    LostPetDetailsResponse, {"": LostPet, "pet": Pet, "pet.owner": User}
+)
 
 
 def create_lost_pet(
@@ -11,9 +29,15 @@ def create_lost_pet(
 ) -> LostPet:
     """Create a lost pet entry"""
 
+    latitude, longitude = lost_pet_in.last_seen_latitude, lost_pet_in.last_seen_longitude
+    if latitude is None or longitude is None:
+        latitude, longitude = geocode_location(db, lost_pet_in.last_seen_location) or (None, None)
+
     db_lost_pet = LostPet(
         pet_id=lost_pet_in.pet_id,
         last_seen_location=lost_pet_in.last_seen_location,
+        last_seen_latitude=latitude,
+        last_seen_longitude=longitude,
         last_seen_date=lost_pet_in.last_seen_date,
         additional_details=lost_pet_in.additional_details,
     )
@@ -22,6 +46,9 @@ def create_lost_pet(
     db.commit()
     db.refresh(db_lost_pet)
 
+    sync_lost_pet_indexes(db_lost_pet)
+    event_bus.emit(ResponseCacheInvalidated(tags=[LOST_PETS_TAG]))
+
     return db_lost_pet
 
 
@@ -35,14 +62,21 @@ def get_lost_pets(
     color: Optional[str] = None,
     size: Optional[str] = None,
     gender: Optional[str] = None,
-
-) -> List[LostPet]:
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+) -> List[Dict[str, Any]]:
     """
-    Get all active lost pet reports with associated pet details.
+    Get all active lost pet reports with associated pet details, as dicts
+    shaped like LostPetDetailsResponse.
+
+    Cases can be restricted to those last seen within radius_km of
+    (latitude, longitude) or inside a (min_lat, max_lat, min_lon, max_lon) bbox.
     """
-    query = db.query(LostPet)\
+    query = db.query(*LOST_PET_LIST_PROJECTION.columns)\
         .join(Pet, LostPet.pet_id == Pet.id)\
-        .options(joinedload(LostPet.pet))\
+        .join(User, Pet.owner_id == User.id)\
         .filter(LostPet.deleted_at == None)
     
     # Apply filters if provided
@@ -58,7 +92,117 @@ def get_lost_pets(
         query = query.filter(Pet.gender == gender)
     if status:
         query = query.filter(LostPet.status == status)
+    if radius_km is not None:
+        query = query.filter(
+            radius_filter(LostPet.last_seen_latitude, LostPet.last_seen_longitude, latitude, longitude, radius_km)
+        )
+    if bbox is not None:
+        query = query.filter(
+            bounding_box_filter(LostPet.last_seen_latitude, LostPet.last_seen_longitude, *bbox)
+        )
+
+    return LOST_PET_LIST_PROJECTION.to_dicts(query.offset(skip).limit(limit).all())
+
+
+def get_open_lost_pet_cases(db: Session) -> List[Tuple]:
+    """
+    Get the columns the matching indexes need for every open lost pet case.
+    """
+    return (
+        db.query(
+            LostPet.id,
+            Pet.type,
+            Pet.breed,
+            Pet.color,
+            Pet.size,
+            Pet.gender,
+            LostPet.last_seen_date,
+            LostPet.last_seen_location,
+            LostPet.last_seen_latitude,
+            LostPet.last_seen_longitude,
+            Pet.image_hash,
+        )
+        .join(Pet, LostPet.pet_id == Pet.id)
+        .filter(LostPet.deleted_at == None)
+        .filter(LostPet.status.in_(OPEN_LOST_PET_STATUSES))
+        .all()
+    )
+
+
+def refresh_lost_pet_indexes(db: Session, force: bool = False) -> None:
+    """
+    Rebuild the image and attribute indexes of open cases when they are stale.
+    Both are loaded from a single snapshot query.
+    """
+    if not force and not (lost_pet_image_index.is_stale() or lost_pet_matcher.is_stale()):
+        return
+
+    rows = get_open_lost_pet_cases(db)
+
+    lost_pet_matcher.load(LostPetCase(*row[:-1]) for row in rows)
+    lost_pet_image_index.load(
+        (row.id, row.image_hash) for row in rows if row.image_hash
+    )
+
+
+def sync_lost_pet_indexes(lost_pet: LostPet) -> None:
+    """
+    Apply a single lost pet change to the in-process matching indexes.
+    """
+    if lost_pet.deleted_at is None and lost_pet.status in OPEN_LOST_PET_STATUSES:
+        pet = lost_pet.pet
+        lost_pet_matcher.upsert(
+            LostPetCase(
+                id=lost_pet.id,
+                type=pet.type,
+                breed=pet.breed,
+                color=pet.color,
+                size=pet.size,
+                gender=pet.gender,
+                last_seen_date=lost_pet.last_seen_date,
+                last_seen_location=lost_pet.last_seen_location,
+                last_seen_latitude=lost_pet.last_seen_latitude,
+                last_seen_longitude=lost_pet.last_seen_longitude,
+            )
+        )
+        lost_pet_image_index.add(lost_pet.id, pet.image_hash)
+    else:
+        lost_pet_matcher.remove(lost_pet.id)
+        lost_pet_image_index.discard(lost_pet.id)
+
+
+def update_lost_pet_status(
+    db: Session,
+    lost_pet_id: int,
+    status_update: LostPetUpdateStatus,
+) -> LostPet:
+    """Update the status of a lost pet case"""
+    try:
+        lost_pet = (
+            db.query(LostPet)
+            .options(joinedload(LostPet.pet))
+            .filter(LostPet.id == lost_pet_id, LostPet.deleted_at == None)
+            .first()
+        )
+
+        if not lost_pet:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail=f"Lost pet with ID {lost_pet_id} not found",
+            )
+
+        lost_pet.status = status_update.status
+        db.commit()
+        db.refresh(lost_pet)
+
+        sync_lost_pet_indexes(lost_pet)
+        event_bus.emit(ResponseCacheInvalidated(tags=[LOST_PETS_TAG]))
 
-    query = query.offset(skip).limit(limit).all()
+        return lost_pet
 
-    return query
\ No newline at end of file
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}",
+        )
@@ -1,26 +1,70 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
 
+import numpy as np
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import update
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import SQLAlchemyError
 
 
-from app.models.lost_pet_report import LostPetReport
-from app.models.pet import LostPet
+from app.models.lost_pet_report import LostPetReport, LostPetMatchCandidate
+from app.models.pet import LostPet, Pet
 
+from app.crud.geo_place import geocode_location
+from app.crud.lost_pet import refresh_lost_pet_indexes
 from app.schemas.lost_pet_report import LostPetReportCreate, LostPetReportMatchUpdate
+from app.utils.constants import IMAGE_MATCH_MAX_DISTANCE
+from app.utils.geocoding import bounding_box_filter, radius_filter
+from app.utils.image_hash import (
+    HASH_SIZE,
+    compute_image_hash,
+    image_path_from_url,
+    lost_pet_image_index,
+)
+from app.utils.lost_pet_matcher import MatchQuery, lost_pet_matcher
+
+# share of the final candidate score given to image similarity when the report has a photo
+IMAGE_SCORE_WEIGHT = 0.4
+
+
+def _report_details_list_options():
+    """
+    Loader plan of LostPetReportDetailsResponse lists: one SELECT ... IN per
+    relationship (lost pet, its pet, the pet owner, reporter) whatever the
+    number of reports.
+    """
+    return (
+        selectinload(LostPetReport.lost_pet).selectinload(LostPet.pet).selectinload(Pet.owner),
+        selectinload(LostPetReport.reporter),
+    )
+
+
+def _report_details_options():
+    """Loader plan of a single LostPetReportDetailsResponse, one joined SELECT."""
+    return (
+        joinedload(LostPetReport.lost_pet).joinedload(LostPet.pet).joinedload(Pet.owner),
+        joinedload(LostPetReport.reporter),
+    )
+
 
 def create_lost_pet_report(db: Session, lost_pet_report_in: LostPetReportCreate) -> LostPetReport:
     """
     Create a new lost pet report.
     """
+    latitude, longitude = lost_pet_report_in.report_latitude, lost_pet_report_in.report_longitude
+    if latitude is None or longitude is None:
+        latitude, longitude = geocode_location(db, lost_pet_report_in.report_location) or (None, None)
+
     db_lost_pet_report = LostPetReport(
         lost_pet_id=lost_pet_report_in.lost_pet_id,
         reporter_id=lost_pet_report_in.reporter_id,
         details=lost_pet_report_in.details,
         report_location=lost_pet_report_in.report_location,
+        report_latitude=latitude,
+        report_longitude=longitude,
         image_url=lost_pet_report_in.image_url,
-        
+        image_hash=lost_pet_report_in.image_hash,
     )
 
     db.add(db_lost_pet_report)
@@ -34,16 +78,29 @@ def get_lost_pet_reports(
     db: Session,
     skip: int = 0,
     limit: int = 10,
+    latitude: Optional[float] = None,
+    longitude: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
 ) -> List[LostPetReport]:
     """
-    Get all lost pet reports.
+    Get all lost pet reports, optionally only those filed within radius_km
+    of (latitude, longitude) or inside a (min_lat, max_lat, min_lon, max_lon) bbox.
     """
     query = db.query(LostPetReport)\
         .join(LostPet, LostPetReport.lost_pet_id == LostPet.id)\
-        .options(joinedload(LostPetReport.lost_pet))\
+        .options(*_report_details_list_options())\
         .filter(LostPetReport.is_matched == True)\
         .filter(LostPetReport.deleted_at == None)
-    
+
+    if radius_km is not None:
+        query = query.filter(
+            radius_filter(LostPetReport.report_latitude, LostPetReport.report_longitude, latitude, longitude, radius_km)
+        )
+    if bbox is not None:
+        query = query.filter(
+            bounding_box_filter(LostPetReport.report_latitude, LostPetReport.report_longitude, *bbox)
+        )
 
     return query.offset(skip).limit(limit).all()
 
@@ -55,7 +112,12 @@ def get_lost_pet_report_by_id(
     """
     Get a lost pet report by its ID.
     """
-    return db.query(LostPetReport).filter(LostPetReport.id == lost_pet_report_id).first()
+    return (
+        db.query(LostPetReport)
+        .options(*_report_details_options())
+        .filter(LostPetReport.id == lost_pet_report_id)
+        .first()
+    )
 
 
 def update_lost_pet_report_match(
@@ -65,26 +127,320 @@ def update_lost_pet_report_match(
 ) -> LostPetReport:
     """Update the is_matched status of a lost pet report"""
     try:
-        report = db.query(LostPetReport).filter(
-            LostPetReport.id == report_id,
-            LostPetReport.deleted_at.is_(None)
-        ).first()
+        # one UPDATE, its row count tells whether the report exists
+        updated = (
+            db.query(LostPetReport)
+            .filter(LostPetReport.id == report_id, LostPetReport.deleted_at.is_(None))
+            .update({LostPetReport.is_matched: match_update.is_matched}, synchronize_session=False)
+        )
 
-        if not report:
+        if not updated:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Lost pet report with ID {report_id} not found"
             )
 
-        report.is_matched = match_update.is_matched
         db.commit()
-        db.refresh(report)
 
-        return report
+        # reload expired report with everything the response serializes
+        return get_lost_pet_report_by_id(db, report_id)
 
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+def _report_match_query(report: LostPetReport) -> MatchQuery:
+    pet = report.lost_pet.pet
+    return MatchQuery(
+        type=pet.type,
+        breed=pet.breed,
+        color=pet.color,
+        size=pet.size,
+        gender=pet.gender,
+        seen_at=report.report_date,
+        location=report.report_location,
+        latitude=report.report_latitude,
+        longitude=report.report_longitude,
+    )
+
+
+def rank_lost_pet_report_candidates(
+    db: Session,
+    reports: Sequence[LostPetReport],
+    limit: int = 10,
+    max_distance: int = IMAGE_MATCH_MAX_DISTANCE,
+) -> List[List[Tuple[int, float, Optional[int]]]]:
+    """
+    Rank the open lost pet cases for each report.
+
+    All reports are scored against the attribute snapshot in one vectorized
+    pass, reports with a photo additionally blend in the image similarity of
+    the cases found in the image index. The case a report was filed for is
+    left out. Returns, per report, up to limit (lost_pet_id, score,
+    image_distance) tuples, best first.
+    """
+    refresh_lost_pet_indexes(db)
+
+    ids, scores = lost_pet_matcher.score_many([_report_match_query(r) for r in reports])
+    if len(ids) == 0:
+        return [[] for _ in reports]
+
+    order = np.argsort(ids)
+    sorted_ids = ids[order]
+
+    ranked = []
+    for row, report in enumerate(reports):
+        combined = scores[row]
+        distances = {}
+
+        if report.image_hash:
+            combined = (1 - IMAGE_SCORE_WEIGHT) * combined
+            matches = lost_pet_image_index.search(
+                report.image_hash, max_distance=max_distance, limit=max(5 * limit, 50)
+            )
+            if matches:
+                distances = dict(matches)
+                match_ids = np.array([lost_pet_id for lost_pet_id, _ in matches], dtype=np.int64)
+                similarity = 1 - np.array([d for _, d in matches], dtype=np.float64) / (HASH_SIZE * HASH_SIZE)
+
+                positions = np.minimum(np.searchsorted(sorted_ids, match_ids), len(sorted_ids) - 1)
+                found = sorted_ids[positions] == match_ids
+                combined[order[positions[found]]] += IMAGE_SCORE_WEIGHT * similarity[found]
+
+        # the report is a sighting of its own case, which is no candidate for it
+        own = np.searchsorted(sorted_ids, report.lost_pet_id)
+        if own < len(sorted_ids) and sorted_ids[own] == report.lost_pet_id:
+            combined[order[own]] = -np.inf
+
+        ranked.append([
+            (lost_pet_id, round(score, 4), distances.get(lost_pet_id))
+            for lost_pet_id, score in lost_pet_matcher.top_k(ids, combined, limit)
+        ])
+
+    return ranked
+
+
+def get_lost_pet_report_candidates(
+    db: Session,
+    report_id: int,
+    limit: int = 10,
+    max_distance: int = IMAGE_MATCH_MAX_DISTANCE,
+):
+    """
+    Get the open lost pets that most likely match a report, scored on the
+    pet attributes, last seen date and location, and the report image.
+    """
+    report = (
+        db.query(LostPetReport)
+        .options(joinedload(LostPetReport.lost_pet).joinedload(LostPet.pet))
+        .filter(
+            LostPetReport.id == report_id,
+            LostPetReport.deleted_at.is_(None)
+        )
+        .first()
+    )
+
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Lost pet report with ID {report_id} not found"
+        )
+
+    matches = rank_lost_pet_report_candidates(
+        db, [report], limit=limit, max_distance=max_distance
+    )[0]
+    if not matches:
+        return {"report_id": report_id, "items": []}
+
+    lost_pets = (
+        db.query(LostPet)
+        .options(joinedload(LostPet.pet).joinedload(Pet.owner))
+        .filter(LostPet.id.in_([lost_pet_id for lost_pet_id, _, _ in matches]))
+        .all()
+    )
+    lost_pets_by_id = {lost_pet.id: lost_pet for lost_pet in lost_pets}
+
+    items = [
+        {
+            "lost_pet": lost_pets_by_id[lost_pet_id],
+            "image_distance": distance,
+            "score": score,
+        }
+        for lost_pet_id, score, distance in matches
+        if lost_pet_id in lost_pets_by_id
+    ]
+
+    return {"report_id": report_id, "items": items}
+
+
+def get_lost_pet_reports_for_matching(
+    db: Session,
+    report_ids: Sequence[int],
+) -> List[LostPetReport]:
+    """
+    Get the reports of a match batch with the pet attributes they are matched on.
+    """
+    reports = (
+        db.query(LostPetReport)
+        .options(joinedload(LostPetReport.lost_pet).joinedload(LostPet.pet))
+        .filter(
+            LostPetReport.id.in_(report_ids),
+            LostPetReport.deleted_at.is_(None)
+        )
+        .all()
+    )
+
+    return reports
+
+
+def save_lost_pet_match_candidates(
+    db: Session,
+    reports: Sequence[LostPetReport],
+    ranked: Sequence[Sequence[Tuple[int, float, Optional[int]]]],
+) -> List[LostPetMatchCandidate]:
+    """
+    Replace the stored candidates of each report with a new ranking.
+    Candidates that were already notified keep their notified_at.
+    """
+    try:
+        report_ids = [report.id for report in reports]
+        notified = {
+            (report_id, lost_pet_id): notified_at
+            for report_id, lost_pet_id, notified_at in db.query(
+                LostPetMatchCandidate.report_id,
+                LostPetMatchCandidate.lost_pet_id,
+                LostPetMatchCandidate.notified_at,
+            )
+            .filter(
+                LostPetMatchCandidate.report_id.in_(report_ids),
+                LostPetMatchCandidate.notified_at.isnot(None),
+            )
+            .all()
+        }
+
+        db.query(LostPetMatchCandidate).filter(
+            LostPetMatchCandidate.report_id.in_(report_ids)
+        ).delete(synchronize_session=False)
+
+        candidates = [
+            LostPetMatchCandidate(
+                report_id=report.id,
+                lost_pet_id=lost_pet_id,
+                rank=rank,
+                score=score,
+                image_distance=distance,
+                notified_at=notified.get((report.id, lost_pet_id)),
+            )
+            for report, matches in zip(reports, ranked)
+            for rank, (lost_pet_id, score, distance) in enumerate(matches, start=1)
+        ]
+        db.add_all(candidates)
+        db.commit()
+
+        return candidates
+
+    except SQLAlchemyError:
+        # run by the match worker, which logs the error and retries the batch
+        db.rollback()
+        raise
+
+
+def get_match_candidates_to_notify(
+    db: Session,
+    report_ids: Sequence[int],
+    min_score: float,
+) -> List[LostPetMatchCandidate]:
+    """
+    Get the not yet notified candidates above min_score, with the owner and
+    report details the notification needs.
+    """
+    return (
+        db.query(LostPetMatchCandidate)
+        .options(
+            joinedload(LostPetMatchCandidate.lost_pet)
+            .joinedload(LostPet.pet)
+            .joinedload(Pet.owner),
+            joinedload(LostPetMatchCandidate.report),
+        )
+        .filter(
+            LostPetMatchCandidate.report_id.in_(report_ids),
+            LostPetMatchCandidate.score >= min_score,
+            LostPetMatchCandidate.notified_at.is_(None),
+        )
+        .all()
+    )
+
+
+def mark_match_candidates_notified(
+    db: Session,
+    candidate_ids: Sequence[int],
+) -> None:
+    """Flag candidates whose owner was notified so they are never notified twice."""
+    if not candidate_ids:
+        return
+
+    db.query(LostPetMatchCandidate).filter(
+        LostPetMatchCandidate.id.in_(candidate_ids)
+    ).update({"notified_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+
+def get_lost_pet_report_matches(
+    db: Session,
+    report_id: int,
+):
+    """
+    Get the candidates stored by the match worker for a report, best first.
+    """
+    candidates = (
+        db.query(LostPetMatchCandidate)
+        .options(
+            joinedload(LostPetMatchCandidate.lost_pet)
+            .joinedload(LostPet.pet)
+            .joinedload(Pet.owner)
+        )
+        .filter(LostPetMatchCandidate.report_id == report_id)
+        .order_by(LostPetMatchCandidate.rank)
+        .all()
+    )
+
+    items = [
+        {
+            "lost_pet": candidate.lost_pet,
+            "image_distance": candidate.image_distance,
+            "score": candidate.score,
+        }
+        for candidate in candidates
+    ]
+
+    return {"report_id": report_id, "items": items}
+
+
+def backfill_lost_pet_report_image_hashes(db: Session, limit: int = 200) -> int:
+    """
+    Hash the images of reports filed before image hashing existed.
+    Returns the number of reports processed.
+    """
+    reports = (
+        db.query(LostPetReport.id, LostPetReport.image_url)
+        .filter(LostPetReport.image_url != None, LostPetReport.image_hash == None)
+        .limit(limit)
+        .all()
+    )
+
+    for report in reports:
+        # unreadable images get an empty hash so they are not retried forever
+        db.execute(
+            update(LostPetReport)
+            .where(LostPetReport.id == report.id)
+            .values(image_hash=compute_image_hash(image_path_from_url(report.image_url)) or "")
+        )
+
+    if reports:
+        db.commit()
+
+    return len(reports)
@@ -1,9 +1,32 @@
 from typing import Any, Dict, List, Optional, Union
+from sqlalchemy import update
 from sqlalchemy.orm import Session
+from app.crud.adoption_pet import sync_similar_pet_index
 from app.models.pet import Pet
 from app.models.user import User
-from app.schemas.pet import PetCreate, PetUpdate
+from app.schemas.pet import PetCreate, PetInDBBase, PetUpdate
 from app.models.pet import PurposePet 
+from app.utils.events import ResponseCacheInvalidated, event_bus
+from app.utils.image_hash import compute_image_hash, image_path_from_url
+from app.utils.response_cache import (
+    ADOPTION_PET_TAG,
+    ADOPTION_PETS_TAG,
+    LOST_PETS_TAG,
+    PET_TAG,
+)
+from app.utils.serialization import model_projection
+from app.utils.similar_pets import similar_pet_index
+
+# columns of the pet list response, read without loading Pet and User instances
+PET_LIST_PROJECTION = model_projection(PetInDBBase, {"": Pet, "owner": User})
+
+
+def _pet_tags(pet: Pet) -> List[str]:
+    """Cached responses showing a pet, on its own or within its listings."""
+    tags = [PET_TAG.format(pet_id=pet.id), ADOPTION_PETS_TAG, LOST_PETS_TAG]
+    if pet.adoption_pet is not None:
+        tags.append(ADOPTION_PET_TAG.format(adoption_pet_id=pet.adoption_pet.id))
+    return tags
 
 
 def get_pet(db: Session, pet_id: int) -> Optional[Pet]:
@@ -23,11 +46,11 @@ def get_pets(
     added_by_admin: Optional[bool] = None,
     is_for_adoption: Optional[bool] = None,
     purpose: Optional[str] =  None,
-) -> List[Pet]:
+) -> List[Dict[str, Any]]:
     """
-    Get multiple pets with optional filtering
+    Get multiple pets with optional filtering, as dicts shaped like the Pet schema
     """
-    query = db.query(Pet).join(User, Pet.owner_id == User.id)
+    query = db.query(*PET_LIST_PROJECTION.columns).join(User, Pet.owner_id == User.id)
 
     if added_by_admin:
         query = query.filter(User.is_superuser == True)
@@ -50,7 +73,7 @@ def get_pets(
     if size:
         query = query.filter(Pet.size == size)
 
-    return query.offset(skip).limit(limit).all()
+    return PET_LIST_PROJECTION.to_dicts(query.offset(skip).limit(limit).all())
 
 
 def create_pet(
@@ -75,6 +98,7 @@ def create_pet(
         description=pet_in.description,
         owner_id=current_user.id,
         image_url=pet_in.image_url,
+        image_hash=pet_in.image_hash,
         purpose=pet_purpose,
         is_for_adoption=bool(pet_purpose == PurposePet.ADOPTION)
     )
@@ -106,6 +130,11 @@ def update_pet(
     db.commit()
     db.refresh(db_pet)
 
+    # breed, size, color, gender and age are features of its listing
+    if db_pet.adoption_pet is not None:
+        sync_similar_pet_index(db_pet.adoption_pet)
+    event_bus.emit(ResponseCacheInvalidated(tags=_pet_tags(db_pet)))
+
     return db_pet
 
 
@@ -118,8 +147,13 @@ def delete_pet(
 
     pet = db.query(Pet).get(pet_id)
     if pet:
+        tags = _pet_tags(pet)
+        adoption_pet_id = pet.adoption_pet.id if pet.adoption_pet is not None else None
         db.delete(pet)
         db.commit()
+        if adoption_pet_id is not None:
+            similar_pet_index.remove(adoption_pet_id)
+        event_bus.emit(ResponseCacheInvalidated(tags=tags))
     return pet
 
 
@@ -188,4 +222,30 @@ def get_pets_count(
     if color:
         query = query.filter(Pet.color == color)
     
-    return query.offset(skip).limit(limit).count()
\ No newline at end of file
+    return query.offset(skip).limit(limit).count()
+
+
+def backfill_pet_image_hashes(db: Session, limit: int = 200) -> int:
+    """
+    Hash the images of pets uploaded before image hashing existed.
+    Returns the number of pets processed.
+    """
+    pets = (
+        db.query(Pet.id, Pet.image_url)
+        .filter(Pet.image_url != None, Pet.image_hash == None)
+        .limit(limit)
+        .all()
+    )
+
+    for pet in pets:
+        # unreadable images get an empty hash so they are not retried forever
+        db.execute(
+            update(Pet)
+            .where(Pet.id == pet.id)
+            .values(image_hash=compute_image_hash(image_path_from_url(pet.image_url)) or "")
+        )
+
+    if pets:
+        db.commit()
+
+    return len(pets)
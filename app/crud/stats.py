@@ -0,0 +1,239 @@
+import itertools
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import DefaultDict, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, literal
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+from fastapi import HTTPException, status
+
+from app.models.adoption import Adoption
+from app.models.pet import Pet, LostPet, AdoptionPet, AdoptionPetViews
+from app.models.stat_rollup import StatRollup, JobWatermark
+from app.schemas.stats import StatGranularity, StatMetric
+from app.utils.constants import ROLLUP_BATCH_SIZE, ROLLUP_LAG_SECONDS
+from app.utils.pagination import keyset_after
+
+# (metric, granularity, bucket_start, dimension) -> [count, total]
+RollupIncrements = DefaultDict[Tuple[str, str, datetime, str], List[float]]
+
+
+def bucket_start(value: datetime, granularity: str) -> datetime:
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if granularity == StatGranularity.day:
+        value = value.replace(hour=0)
+    return value
+
+
+def new_increments() -> RollupIncrements:
+    return defaultdict(lambda: [0, 0.0])
+
+
+def add_increment(
+    increments: RollupIncrements,
+    metric: StatMetric,
+    at: datetime,
+    dimension: Optional[str] = None,
+    count: int = 1,
+    total: float = 0.0,
+) -> None:
+    """Count an event in its hour and its day bucket."""
+    for granularity in StatGranularity:
+        key = (metric.value, granularity.value, bucket_start(at, granularity), dimension or "")
+        increments[key][0] += count
+        increments[key][1] += total
+
+
+def upsert_rollups(db: Session, increments: RollupIncrements) -> None:
+    """
+    Add increments to the rollup rows with one INSERT ... ON DUPLICATE KEY
+    UPDATE (ON CONFLICT on sqlite) executemany, so concurrent writers add up
+    instead of overwriting each other. Doesn't commit.
+    """
+    rows = [
+        {
+            "metric": metric,
+            "granularity": granularity,
+            "bucket_start": bucket,
+            "dimension": dimension,
+            "count": int(count),
+            "total": float(total),
+        }
+        for (metric, granularity, bucket, dimension), (count, total) in increments.items()
+        if count or total
+    ]
+    if not rows:
+        return
+
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql.insert(StatRollup)
+        stmt = stmt.on_duplicate_key_update(
+            count=StatRollup.count + stmt.inserted["count"],
+            total=StatRollup.total + stmt.inserted["total"],
+            updated_at=func.now(),
+        )
+    else:
+        stmt = sqlite.insert(StatRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["metric", "granularity", "bucket_start", "dimension"],
+            set_={
+                "count": StatRollup.count + stmt.excluded["count"],
+                "total": StatRollup.total + stmt.excluded["total"],
+                "updated_at": func.now(),
+            },
+        )
+    db.execute(stmt, rows)
+
+
+def get_watermark(db: Session, name: str) -> Optional[str]:
+    watermark = db.query(JobWatermark).filter(JobWatermark.name == name).first()
+    return watermark.value if watermark else None
+
+
+def set_watermark(db: Session, name: str, value: str) -> None:
+    """Doesn't commit, the watermark moves in the same transaction as the work it records."""
+    watermark = db.query(JobWatermark).filter(JobWatermark.name == name).first()
+    if watermark:
+        watermark.value = value
+    else:
+        db.add(JobWatermark(name=name, value=value))
+
+
+def _rollup_by_id(db: Session, metric: StatMetric, query, id_column, created_column, batch_size: int) -> int:
+    """
+    Roll up the rows of query, (id, at, dimension) tuples, with an id above
+    the watermark of metric. Like rollup_adoptions_approved, rows created in
+    the last ROLLUP_LAG_SECONDS are left alone, and so is every id after the
+    first of them, so a lower id still in flight isn't skipped by the
+    watermark. Returns the number of rows rolled up.
+    """
+    watermark_name = f"rollup:{metric.value}"
+    last_id = int(get_watermark(db, watermark_name) or 0)
+    cutoff = datetime.now() - timedelta(seconds=ROLLUP_LAG_SECONDS)
+    rows = (
+        query.add_columns(created_column)
+        .filter(id_column > last_id)
+        .order_by(id_column)
+        .limit(batch_size)
+        .all()
+    )
+    rows = list(itertools.takewhile(lambda row: row[-1] is not None and row[-1] < cutoff, rows))
+    if not rows:
+        return 0
+
+    increments = new_increments()
+    for _, at, dimension, _ in rows:
+        if at is not None:
+            add_increment(increments, metric, at, dimension)
+    upsert_rollups(db, increments)
+    set_watermark(db, watermark_name, str(rows[-1][0]))
+    db.commit()
+    return len(rows)
+
+
+def rollup_adoption_pet_view_rows(db: Session, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+    """Views stored one row at a time in adoption_pet_views, by pet type."""
+    query = (
+        db.query(AdoptionPetViews.id, func.coalesce(AdoptionPetViews.viewed_at, AdoptionPetViews.created_at), Pet.type)
+        .join(AdoptionPet, AdoptionPetViews.adoption_pet_id == AdoptionPet.id)
+        .join(Pet, AdoptionPet.pet_id == Pet.id)
+    )
+    return _rollup_by_id(
+        db, StatMetric.adoption_pet_views, query, AdoptionPetViews.id, AdoptionPetViews.created_at, batch_size
+    )
+
+
+def rollup_adoptions_created(db: Session, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+    query = db.query(Adoption.id, Adoption.created_at, literal(""))
+    return _rollup_by_id(db, StatMetric.adoptions_created, query, Adoption.id, Adoption.created_at, batch_size)
+
+
+def rollup_lost_pets_reported(db: Session, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+    query = db.query(LostPet.id, LostPet.created_at, Pet.type).join(Pet, LostPet.pet_id == Pet.id)
+    return _rollup_by_id(db, StatMetric.lost_pets_reported, query, LostPet.id, LostPet.created_at, batch_size)
+
+
+def rollup_adoptions_approved(db: Session, batch_size: int = ROLLUP_BATCH_SIZE) -> int:
+    """
+    Approved adoptions with the days from request to adoption as total.
+
+    Approval is final, so every adoption enters this rollup once: rows are
+    walked by (updated_at, id) past the watermark, leaving the last
+    ROLLUP_LAG_SECONDS alone so transactions still in flight aren't skipped.
+    """
+    watermark_name = f"rollup:{StatMetric.adoptions_approved.value}"
+    query = (
+        db.query(Adoption.id, Adoption.created_at, Adoption.updated_at, Adoption.adoption_date)
+        .filter(
+            Adoption.status == "approved",
+            Adoption.updated_at < datetime.now() - timedelta(seconds=ROLLUP_LAG_SECONDS),
+        )
+    )
+    watermark = get_watermark(db, watermark_name)
+    if watermark:
+        updated_at, last_id = watermark.split("|")
+        query = query.filter(
+            keyset_after((Adoption.updated_at, Adoption.id), (datetime.fromisoformat(updated_at), int(last_id)))
+        )
+    rows = query.order_by(Adoption.updated_at, Adoption.id).limit(batch_size).all()
+    if not rows:
+        return 0
+
+    increments = new_increments()
+    for _, created_at, updated_at, adoption_date in rows:
+        adopted_at = adoption_date or updated_at
+        days = max((adopted_at - created_at).total_seconds() / 86400.0, 0.0) if created_at else 0.0
+        add_increment(increments, StatMetric.adoptions_approved, adopted_at, total=days)
+    upsert_rollups(db, increments)
+    last = rows[-1]
+    set_watermark(db, watermark_name, f"{last.updated_at.isoformat()}|{last.id}")
+    db.commit()
+    return len(rows)
+
+
+def record_adoption_pet_view_rollups(db: Session, counts: Dict[int, int], viewed_at: datetime) -> None:
+    """Roll up a flush of buffered views by pet type. Doesn't commit."""
+    pet_types = dict(
+        db.query(AdoptionPet.id, Pet.type)
+        .join(Pet, AdoptionPet.pet_id == Pet.id)
+        .filter(AdoptionPet.id.in_(list(counts)))
+        .all()
+    )
+    increments = new_increments()
+    for adoption_pet_id, count in counts.items():
+        if adoption_pet_id in pet_types:
+            add_increment(
+                increments, StatMetric.adoption_pet_views, viewed_at, pet_types[adoption_pet_id], count=count
+            )
+    upsert_rollups(db, increments)
+
+
+def get_stat_series(
+    db: Session,
+    metric: StatMetric,
+    granularity: StatGranularity,
+    start: datetime,
+    end: datetime,
+    dimension: Optional[str] = None,
+) -> List[StatRollup]:
+    """Read the rollup buckets of a metric in [start, end), never the raw rows."""
+    try:
+        query = db.query(StatRollup).filter(
+            StatRollup.metric == metric.value,
+            StatRollup.granularity == granularity.value,
+            StatRollup.bucket_start >= bucket_start(start, granularity),
+            StatRollup.bucket_start < end,
+        )
+        if dimension is not None:
+            query = query.filter(StatRollup.dimension == dimension)
+
+        return query.order_by(StatRollup.bucket_start, StatRollup.dimension).all()
+
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}",
+        )
@@ -1,12 +1,103 @@
-from typing import List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
+from pydantic import ValidationError
+from sqlalchemy import and_, func, insert, tuple_
+from sqlalchemy.dialects import mysql, sqlite
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from fastapi import HTTPException, status
 
-from app.models.vaccination import VaccinationRecord, VaccineType
+from app.models.vaccination import PetVaccinationStatus, VaccinationRecord, VaccineType
 from app.models.pet import Pet
-from app.schemas.vaccination import VaccinationCreate, VaccinationUpdate, VaccinationInDB
+from app.schemas.vaccination import VaccinationCreate, VaccinationImportRow, VaccinationUpdate, VaccinationInDB
+from app.utils.events import ResponseCacheInvalidated, event_bus
+from app.utils.constants import (
+    VACCINATION_EXPORT_BATCH_SIZE,
+    VACCINATION_IMPORT_BATCH_SIZE,
+    VACCINATION_IMPORT_MAX_ERRORS,
+    VACCINATION_TOTAL_CACHE_MAX_ENTRIES,
+    VACCINATION_TOTAL_CACHE_TTL_SECONDS,
+)
+from app.utils.count_cache import CountCache
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_after
+from app.utils.response_cache import ADOPTION_PETS_TAG
+from app.utils.serialization import type_adapter
+from app.utils.vaccination_files import EXPORT_FIELDS, FileRow
+
+VACCINATION_LIST_ORDER = (VaccinationRecord.administered_date.desc(), VaccinationRecord.id.desc())
+
+# totals of the listing by filter
+vaccination_totals = CountCache(VACCINATION_TOTAL_CACHE_TTL_SECONDS, VACCINATION_TOTAL_CACHE_MAX_ENTRIES)
+
+
+def refresh_pet_vaccination_statuses(db: Session, keys: Iterable[Tuple[int, VaccineType]]) -> None:
+    """
+    Point the status of every (pet_id, vaccine_type) of keys at its latest
+    live record, by administered_date then id, or drop it when none is left.
+    Doesn't commit, the statuses move in the same transaction as the records.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+
+    latest = {}
+    rows = db.query(
+        VaccinationRecord.id,
+        VaccinationRecord.pet_id,
+        VaccinationRecord.vaccine_type,
+        VaccinationRecord.administered_date,
+        VaccinationRecord.expiration_date,
+    ).filter(
+        tuple_(VaccinationRecord.pet_id, VaccinationRecord.vaccine_type).in_(keys),
+        VaccinationRecord.deleted_at.is_(None),
+    )
+    for row in rows:
+        key = (row.pet_id, row.vaccine_type)
+        if key not in latest or (row.administered_date, row.id) > (latest[key].administered_date, latest[key].id):
+            latest[key] = row
+
+    gone = [key for key in keys if key not in latest]
+    if gone:
+        (
+            db.query(PetVaccinationStatus)
+            .filter(tuple_(PetVaccinationStatus.pet_id, PetVaccinationStatus.vaccine_type).in_(gone))
+            .delete(synchronize_session=False)
+        )
+    if latest:
+        # an upsert, concurrent writers of one status don't collide on its primary key
+        values = ("record_id", "administered_date", "expiration_date")
+        if db.get_bind().dialect.name == "mysql":
+            stmt = mysql.insert(PetVaccinationStatus)
+            stmt = stmt.on_duplicate_key_update(
+                **{name: stmt.inserted[name] for name in values}, updated_at=func.now()
+            )
+        else:
+            stmt = sqlite.insert(PetVaccinationStatus)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["pet_id", "vaccine_type"],
+                set_={**{name: stmt.excluded[name] for name in values}, "updated_at": func.now()},
+            )
+        db.execute(
+            stmt,
+            [
+                {
+                    "pet_id": row.pet_id,
+                    "vaccine_type": row.vaccine_type,
+                    "record_id": row.id,
+                    "administered_date": row.administered_date,
+                    "expiration_date": row.expiration_date,
+                }
+                for row in latest.values()
+            ],
+        )
+
+
+def _vaccination_records_changed() -> None:
+    vaccination_totals.invalidate()
+    # the adoption list filters on the statuses
+    event_bus.emit(ResponseCacheInvalidated(tags=[ADOPTION_PETS_TAG]))
+
 
 def create_vaccination_record(
     db: Session,
@@ -44,8 +135,11 @@ def create_vaccination_record(
         )
 
         db.add(db_vaccination)
+        db.flush()
+        refresh_pet_vaccination_statuses(db, [(db_vaccination.pet_id, db_vaccination.vaccine_type)])
         db.commit()
         db.refresh(db_vaccination)
+        _vaccination_records_changed()
 
         return VaccinationInDB.model_validate(db_vaccination)
 
@@ -62,14 +156,32 @@ def create_vaccination_record(
             detail=f"Database error: {str(e)}"
         )
 
+def validate_vaccine_type(vaccine_type: str) -> VaccineType:
+    try:
+        return VaccineType(vaccine_type)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid vaccine type. Must be one of: {', '.join([v.value for v in VaccineType])}"
+        )
+
 def get_vaccination_records(
     db: Session,
     skip: int = 0,
     limit: int = 10,
     pet_id: Optional[int] = None,
-    vaccine_type: Optional[str] = None
+    vaccine_type: Optional[str] = None,
+    currently_vaccinated: bool = False,
+    cursor: Optional[str] = None
 ):
-    """Get list of vaccination records with optional filters"""
+    """
+    Get list of vaccination records with optional filters
+
+    Ordered by (administered_date, id) descending, a range read of the
+    composite index matching the filters. Passing the next_cursor of a page
+    returns the page after it (keyset pagination, skip is ignored). The
+    total is cached per filter, see vaccination_totals.
+    """
     try:
         # Base query
         query = db.query(VaccinationRecord).filter(VaccinationRecord.deleted_at.is_(None))
@@ -79,29 +191,49 @@ def get_vaccination_records(
             query = query.filter(VaccinationRecord.pet_id == pet_id)
 
         if vaccine_type:
-            try:
-                validated_type = VaccineType(vaccine_type)
-                query = query.filter(VaccinationRecord.vaccine_type == validated_type)
-            except ValueError:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Invalid vaccine type. Must be one of: {', '.join([v.value for v in VaccineType])}"
-                )
+            query = query.filter(VaccinationRecord.vaccine_type == validate_vaccine_type(vaccine_type))
+
+        if currently_vaccinated:
+            # the latest record of each pet and vaccine type, while it hasn't expired
+            query = query.join(
+                PetVaccinationStatus,
+                and_(
+                    PetVaccinationStatus.pet_id == VaccinationRecord.pet_id,
+                    PetVaccinationStatus.vaccine_type == VaccinationRecord.vaccine_type,
+                    PetVaccinationStatus.record_id == VaccinationRecord.id,
+                ),
+            ).filter(PetVaccinationStatus.expiration_date > datetime.utcnow())
 
         # Get total count
-        total = query.count()
+        total = vaccination_totals.get_or_count((pet_id, vaccine_type, currently_vaccinated), query.count)
+
+        page = query
+        if cursor:
+            page = page.filter(
+                keyset_after(
+                    (VaccinationRecord.administered_date, VaccinationRecord.id),
+                    decode_cursor(cursor, datetime_positions=(0,)),
+                    descending=(True, True),
+                )
+            )
+            skip = 0
 
         # Apply pagination and load relationships
         records = (
-            query
+            page
             .options(joinedload(VaccinationRecord.pet))
-            .order_by(VaccinationRecord.administered_date.desc())
+            .order_by(*VACCINATION_LIST_ORDER)
             .offset(skip)
             .limit(limit)
             .all()
         )
 
-        return {"items": records, "total": total}
+        next_cursor = None
+        if len(records) == limit:
+            last = records[-1]
+            next_cursor = encode_cursor([last.administered_date, last.id])
+
+        return {"items": records, "total": total, "next_cursor": next_cursor}
 
     except SQLAlchemyError as e:
         raise HTTPException(
@@ -161,12 +293,19 @@ def update_vaccination_record(
             )
 
         # Update fields
+        previous_type = record.vaccine_type
         update_data = vaccination_update.model_dump(exclude_unset=True)
+        if update_data.get("expiration_date", record.expiration_date) != record.expiration_date:
+            # a new expiry is reminded of again
+            record.reminded_at = None
         for field, value in update_data.items():
             setattr(record, field, value)
 
+        db.flush()
+        refresh_pet_vaccination_statuses(db, [(record.pet_id, previous_type), (record.pet_id, record.vaccine_type)])
         db.commit()
         db.refresh(record)
+        _vaccination_records_changed()
 
         return VaccinationInDB.model_validate(record)
 
@@ -206,7 +345,10 @@ def delete_vaccination_record(
 
         # Soft delete
         record.deleted_at = datetime.utcnow()
+        db.flush()
+        refresh_pet_vaccination_statuses(db, [(record.pet_id, record.vaccine_type)])
         db.commit()
+        _vaccination_records_changed()
 
         return {"message": "Vaccination record deleted successfully"}
 
@@ -215,4 +357,198 @@ def delete_vaccination_record(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Database error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+def get_expiring_vaccination_records(
+    db: Session,
+    since: datetime,
+    until: datetime,
+    after: Optional[Tuple[datetime, int]] = None,
+    limit: int = 1000,
+) -> List:
+    """
+    Live records not reminded of yet expiring after since and up to until,
+    past the (expiration_date, id) position after, in expiry order. A range
+    read of the (deleted_at, reminded_at, expiration_date) index, with the
+    pet name joined in.
+    """
+    query = (
+        db.query(
+            VaccinationRecord.id,
+            VaccinationRecord.pet_id,
+            VaccinationRecord.vaccine_type,
+            VaccinationRecord.owner,
+            VaccinationRecord.contact,
+            VaccinationRecord.expiration_date,
+            Pet.name.label("pet_name"),
+        )
+        .join(Pet, Pet.id == VaccinationRecord.pet_id)
+        .filter(
+            VaccinationRecord.deleted_at.is_(None),
+            VaccinationRecord.reminded_at.is_(None),
+            VaccinationRecord.expiration_date > since,
+            VaccinationRecord.expiration_date <= until,
+        )
+    )
+    if after is not None:
+        query = query.filter(keyset_after((VaccinationRecord.expiration_date, VaccinationRecord.id), after))
+    return query.order_by(VaccinationRecord.expiration_date, VaccinationRecord.id).limit(limit).all()
+
+
+def mark_vaccination_records_reminded(db: Session, record_ids: List[int], reminded_at: datetime) -> None:
+    """Flag records whose reminder was collected, updated_at is kept."""
+    db.query(VaccinationRecord).filter(VaccinationRecord.id.in_(record_ids)).update(
+        {VaccinationRecord.reminded_at: reminded_at, VaccinationRecord.updated_at: VaccinationRecord.updated_at},
+        synchronize_session=False,
+    )
+
+
+def _validation_messages(error: ValidationError) -> Dict[int, List[str]]:
+    """Messages of a list validation by the index of the failing item."""
+    messages: Dict[int, List[str]] = {}
+    for detail in error.errors():
+        index, *loc = detail["loc"]
+        field = ".".join(str(part) for part in loc)
+        messages.setdefault(index, []).append(f"{field}: {detail['msg']}" if field else detail["msg"])
+    return messages
+
+
+def import_vaccination_records(
+    db: Session,
+    rows: Iterable[FileRow],
+    batch_size: int = VACCINATION_IMPORT_BATCH_SIZE,
+    max_errors: int = VACCINATION_IMPORT_MAX_ERRORS,
+) -> Dict[str, Any]:
+    """
+    Create the records of a bulk import, batch_size rows at a time.
+
+    Each batch is validated in one pass, its pets are looked up with one IN
+    query and its valid rows are inserted with one executemany, committed
+    on their own. Rows without an administered_date are stamped with the
+    time of their batch. Rows that can't be read, don't validate or name a
+    missing pet are reported by line, the first max_errors of them, and the
+    import carries on.
+    """
+    adapter = type_adapter(List[VaccinationImportRow])
+    result: Dict[str, Any] = {"created": 0, "failed": 0, "errors": []}
+
+    def fail(line: int, error: str) -> None:
+        result["failed"] += 1
+        if len(result["errors"]) < max_errors:
+            result["errors"].append({"line": line, "error": error})
+
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        readable = []
+        for row in batch:
+            if row.error is None:
+                readable.append(row)
+            else:
+                fail(row.line, row.error)
+        try:
+            vaccinations = adapter.validate_python([row.data for row in readable])
+        except ValidationError as e:
+            invalid = _validation_messages(e)
+            for index, messages in sorted(invalid.items()):
+                fail(readable[index].line, "; ".join(messages))
+            readable = [row for index, row in enumerate(readable) if index not in invalid]
+            vaccinations = adapter.validate_python([row.data for row in readable])
+
+        pet_ids = {vaccination.pet_id for vaccination in vaccinations}
+        existing = {pet_id for (pet_id,) in db.query(Pet.id).filter(Pet.id.in_(sorted(pet_ids)))} if pet_ids else set()
+        inserts = []
+        imported_at = datetime.utcnow()
+        for row, vaccination in zip(readable, vaccinations):
+            if vaccination.pet_id in existing:
+                values = vaccination.model_dump()
+                values["administered_date"] = values["administered_date"] or imported_at
+                inserts.append((row, values))
+            else:
+                fail(row.line, f"Pet with ID {vaccination.pet_id} not found")
+        if not inserts:
+            continue
+
+        try:
+            db.execute(insert(VaccinationRecord.__table__), [values for _, values in inserts])
+            refresh_pet_vaccination_statuses(
+                db, [(values["pet_id"], values["vaccine_type"]) for _, values in inserts]
+            )
+            db.commit()
+            result["created"] += len(inserts)
+            _vaccination_records_changed()
+        except IntegrityError as e:
+            db.rollback()
+            for row, _ in inserts:
+                fail(row.line, f"Database integrity error: {str(e.orig)}")
+        except SQLAlchemyError as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Database error after importing {result['created']} records: {str(e)}"
+            )
+
+    result["errors"].sort(key=lambda error: error["line"])
+    result["errors_truncated"] = result["failed"] > len(result["errors"])
+    return result
+
+
+def iter_vaccination_record_batches(
+    db: Session,
+    pet_id: Optional[int] = None,
+    vaccine_type: Optional[VaccineType] = None,
+    batch_size: int = VACCINATION_EXPORT_BATCH_SIZE,
+) -> Iterator[List]:
+    """
+    The EXPORT_FIELDS of the live records matching the filters, in id order
+    and batch_size rows at a time, each batch a keyset read past the last id.
+    """
+    query = db.query(*(getattr(VaccinationRecord, name) for name in EXPORT_FIELDS)).filter(
+        VaccinationRecord.deleted_at.is_(None)
+    )
+    if pet_id:
+        query = query.filter(VaccinationRecord.pet_id == pet_id)
+    if vaccine_type:
+        query = query.filter(VaccinationRecord.vaccine_type == vaccine_type)
+
+    last_id = 0
+    while True:
+        rows = query.filter(VaccinationRecord.id > last_id).order_by(VaccinationRecord.id).limit(batch_size).all()
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1].id
+
+
+def get_pet_vaccination_statuses(db: Session, pet_id: int) -> List[Dict[str, Any]]:
+    """The latest vaccination of a pet against every vaccine type it got, shaped like PetVaccinationStatusResponse"""
+    try:
+        now = datetime.utcnow()
+        statuses = (
+            db.query(PetVaccinationStatus)
+            .filter(PetVaccinationStatus.pet_id == pet_id)
+            .order_by(PetVaccinationStatus.expiration_date.desc())
+            .all()
+        )
+        return [
+            {
+                "pet_id": vaccination_status.pet_id,
+                "vaccine_type": vaccination_status.vaccine_type,
+                "record_id": vaccination_status.record_id,
+                "administered_date": vaccination_status.administered_date,
+                "expiration_date": vaccination_status.expiration_date,
+                "is_current": vaccination_status.expiration_date > now,
+            }
+            for vaccination_status in statuses
+        ]
+
+    except SQLAlchemyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
@@ -1,10 +1,27 @@
 import os
 from fastapi import FastAPI, Depends
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.api.routes import auth
-from app.api.routes import pets, lost_pets, lost_pet_report, adoption_pet, adoptions, vaccinations, transfer_coordinator
-from app.utils.constants import (SERVER_NAME, API_V1_STR, API_ROOT_PATH,)
+from app.api.routes import pets, lost_pets, lost_pet_report, adoption_pet, adoptions, vaccinations, transfer_coordinator, stats, admin
+from app.utils.constants import (SERVER_NAME, API_V1_STR, API_ROOT_PATH, PROFILING_ENABLED,)
+from app.utils.contract_jobs import contract_job_manager
+from app.utils.instrumentation import InstrumentationMiddleware, render_metrics
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.notifications import register_notification_handlers
+from app.utils.response_cache import (
+    ADOPTION_PET_TAG,
+    ADOPTION_PETS_TAG,
+    LOST_PETS_TAG,
+    PET_TAG,
+    CacheRule,
+    ResponseCacheMiddleware,
+    register_response_cache_handlers,
+    response_cache,
+)
+from app.utils.view_counter import adoption_pet_view_counter
+from app.tasks.adoption_pet_views import start_background_flusher, stop_background_flusher
 
 app = FastAPI(
     title=SERVER_NAME, 
@@ -12,6 +29,7 @@ app = FastAPI(
     docs_url="/docs",            # Swagger UI at /api/docs
     redoc_url="/redoc",
     root_path=API_ROOT_PATH,  # All routes will be prefixed with /api 
+    default_response_class=ORJSONResponse,
 )
 
 # Set all CORS enabled origins
@@ -24,6 +42,23 @@ origins = [
 
 ]
 
+# Anonymous reads served from the response cache, added first so CORS wraps it
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=response_cache,
+    rules=[
+        CacheRule(f"{API_V1_STR}/pet/{{pet_id}}", [PET_TAG]),
+        CacheRule(
+            f"{API_V1_STR}/adoption-pet/{{adoption_pet_id}}",
+            [ADOPTION_PET_TAG],
+            # cached pages are still viewed
+            on_hit=lambda params: adoption_pet_view_counter.record(int(params["adoption_pet_id"])),
+        ),
+        CacheRule(f"{API_V1_STR}/adoption-pet/list-available", [ADOPTION_PETS_TAG]),
+        CacheRule(f"{API_V1_STR}/lost-pet/list", [LOST_PETS_TAG]),
+    ],
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -32,6 +67,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outside the cache and CORS, so cached and CORS answered requests are timed too
+app.add_middleware(InstrumentationMiddleware)
+
+# Outermost opt-in profiles of single requests, configured from /v1/admin/profiling
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
 os.makedirs("app/static/uploads", exist_ok=True)
 # Mount 'app/static' to serve at '/static'
 static_path = os.path.join(os.path.dirname(__file__), "static")
@@ -47,6 +89,11 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+# Prometheus scrape point, metrics of this process
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def read_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 
 # Include routers
 app.include_router(auth.router, prefix=f"{API_V1_STR}/auth", tags=["auth"])
@@ -58,4 +105,25 @@ app.include_router(lost_pet_report.router, prefix=f"{API_V1_STR}/lost-pet-report
 app.include_router(adoption_pet.router, prefix=f"{API_V1_STR}/adoption-pet", tags=["pet for adoption"])
 app.include_router(adoptions.router, prefix=f"{API_V1_STR}/adoption", tags=["adoption"])
 app.include_router(vaccinations.router, prefix=f"{API_V1_STR}/vaccination", tags=["vaccination"])
-app.include_router(transfer_coordinator.router, prefix=f"{API_V1_STR}/transfer_coordination", tags=["transfer coordination"])
\ No newline at end of file
+app.include_router(transfer_coordinator.router, prefix=f"{API_V1_STR}/transfer_coordination", tags=["transfer coordination"])
+app.include_router(stats.router, prefix=f"{API_V1_STR}/stats", tags=["stats"])
+app.include_router(admin.router, prefix=f"{API_V1_STR}/admin", tags=["admin"])
+
+# Domain event handlers
+register_notification_handlers()
+register_response_cache_handlers()
+
+
+@app.on_event("startup")
+def start_view_flusher():
+    start_background_flusher()
+
+
+@app.on_event("shutdown")
+def shutdown_contract_jobs():
+    contract_job_manager.shutdown()
+
+
+@app.on_event("shutdown")
+def shutdown_view_flusher():
+    stop_background_flusher()
@@ -1,10 +1,12 @@
 from .user import User
 from .pet import Pet, LostPet, AdoptionPet, AdoptionPetViews
-from .lost_pet_report import LostPetReport
+from .lost_pet_report import LostPetReport, LostPetMatchCandidate
 from .notification import Notification
 from .adoption import Adoption
-from .vaccination import VaccinationRecord
+from .vaccination import VaccinationRecord, PetVaccinationStatus
 from .transfer_coordinator import TransferCoordination
+from .geo_place import GeoPlace
+from .stat_rollup import StatRollup, JobWatermark
 
 
 __all__ = [
@@ -12,10 +14,15 @@ __all__ = [
     "Pet",
     "LostPet",
     "LostPetReport",
+    "LostPetMatchCandidate",
     "Notification",
     "AdoptionPet",
     "AdoptionPetViews",
     "Adoption",
     "VaccinationRecord",
+    "PetVaccinationStatus",
     "TransferCoordination",
+    "GeoPlace",
+    "StatRollup",
+    "JobWatermark",
 ]
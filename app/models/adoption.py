@@ -10,6 +10,7 @@ from sqlalchemy import (
     Text,
     ForeignKey,
     Boolean,
+    Index,
 )
 
 from sqlalchemy.orm import relationship
@@ -31,7 +32,15 @@ class Adoption(Base):
     created_at = Column(DateTime, server_default=func.now(), index=True)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
     deleted_at = Column(DateTime, nullable=True, index=True)
+    # bumped by every update, a concurrent update of the same row fails instead of overwriting
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
+    __mapper_args__ = {"version_id_col": version}
+
+    # ordering of the adoption list / review queue
+    __table_args__ = (
+        Index("ix_adoptions_status_created_at_id", "status", "created_at", "id"),
+    )
 
     # Relationships (optional, for easier ORM access)
     adoption_pet = relationship('AdoptionPet', back_populates='adoptions')
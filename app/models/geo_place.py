@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, func
+
+from app.core.database import Base
+
+
+class GeoPlace(Base):
+    """Offline gazetteer of barangays and cities used to geocode free-text locations."""
+    __tablename__ = "geo_places"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(255), nullable=False)
+    city = Column(String(255), nullable=True, index=True)
+    normalized_name = Column(String(255), nullable=False, index=True)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
@@ -6,7 +6,10 @@ from sqlalchemy import (
     func, 
     Text, 
     ForeignKey,
-    Boolean
+    Boolean,
+    Float,
+    Index,
+    UniqueConstraint,
 )
 
 from sqlalchemy.orm import relationship
@@ -22,12 +25,40 @@ class LostPetReport(Base):
     reporter_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     details = Column(Text, nullable=False)
     report_location = Column(String(255), nullable=False)
+    report_latitude = Column(Float, nullable=True)
+    report_longitude = Column(Float, nullable=True)
     report_date = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     image_url = Column(String(255), nullable=True, default=None)
+    image_hash = Column(String(16), nullable=True, default=None)
     is_matched = Column(Boolean, index=True, nullable=True)
     created_at = Column(DateTime, server_default=func.now(), index=True)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
     deleted_at = Column(DateTime, nullable=True, index=True)
 
+    __table_args__ = (
+        Index("ix_lost_pet_reports_report_coordinates", "report_latitude", "report_longitude"),
+    )
+
     lost_pet  = relationship("LostPet", back_populates="reports")
-    reporter = relationship("User", back_populates="lost_pet_reports")
\ No newline at end of file
+    reporter = relationship("User", back_populates="lost_pet_reports")
+
+
+class LostPetMatchCandidate(Base):
+    """Lost pet cases ranked by the match worker as likely subjects of a report."""
+    __tablename__ = "lost_pet_match_candidates"
+
+    id = Column(Integer, primary_key=True, index=True)
+    report_id = Column(Integer, ForeignKey("lost_pet_reports.id", ondelete="CASCADE"), nullable=False, index=True)
+    lost_pet_id = Column(Integer, ForeignKey("lost_pets.id", ondelete="CASCADE"), nullable=False, index=True)
+    rank = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False, index=True)
+    image_distance = Column(Integer, nullable=True)
+    notified_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), index=True)
+
+    __table_args__ = (
+        UniqueConstraint("report_id", "lost_pet_id", name="uq_lost_pet_match_candidates_report_lost_pet"),
+    )
+
+    report = relationship("LostPetReport")
+    lost_pet = relationship("LostPet")
@@ -12,10 +12,10 @@ from sqlalchemy import (
     ForeignKey,
     JSON,
     Boolean,
-    select,
+    Float,
+    Index,
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.ext.hybrid import hybrid_property
 from app.core.database import Base
 
 
@@ -41,11 +41,13 @@ class Pet(Base):
     size = Column(String(100), nullable=False)
     description = Column(Text, nullable=False)
     image_url = Column(String(255), nullable=True, default=None)  # for image upload
+    image_hash = Column(String(16), nullable=True, default=None)  # dHash of the image, hex
     is_for_adoption = Column(Boolean, nullable=True, index=True, default=False)
     purpose = Column(Enum(PurposePet), default=PurposePet.LOST_PET, index=True)
     # is_for_lostpet = Column(Boolean, nullable=True, index=True, default=False)
     # is_deleted = Column(Boolean, default=False)
-    deleted_at = Column(DateTime, nullable=True, onupdate=func.now())
+    # set by the soft delete only, an onupdate would soft delete every edited pet
+    deleted_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
@@ -88,12 +90,20 @@ class LostPet(Base):
     id = Column(Integer, primary_key=True, index=True)
     pet_id = Column(Integer, ForeignKey("pets.id", ondelete="CASCADE"), nullable=False)
     last_seen_location = Column(String(255), nullable=False)
+    last_seen_latitude = Column(Float, nullable=True)
+    last_seen_longitude = Column(Float, nullable=True)
     last_seen_date = Column(DateTime, nullable=False)
     additional_details = Column(Text, nullable=True)
     status = Column(Enum(LostPetStatus), nullable=False, default=LostPetStatus.REPORTED)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
-    deleted_at = Column(DateTime, nullable=True, onupdate=func.now())
+    # set by the soft delete only, an onupdate would soft delete every edited case
+    deleted_at = Column(DateTime, nullable=True)
+
+    # bounding box prefilter of the radius search
+    __table_args__ = (
+        Index("ix_lost_pets_last_seen_coordinates", "last_seen_latitude", "last_seen_longitude"),
+    )
 
     pet = relationship("Pet", back_populates="lost_pet")
     reports = relationship(
@@ -125,6 +135,17 @@ class AdoptionPet(Base):
         DateTime, server_default=func.now(), onupdate=func.now(), index=True
     )
     deleted_at = Column(DateTime, nullable=True, index=True)
+    # denormalized count of views, flushed in batches from the view buffer
+    view_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # ranked feed, see app/utils/feed_score.py: decayed views alone and combined with recency and media
+    feed_view_score = Column(Float, nullable=True)
+    feed_score = Column(Float, nullable=True)
+
+    # popularity sort and ranked feed of the available pets
+    __table_args__ = (
+        Index("ix_adoption_pets_status_view_count", "status", "view_count"),
+        Index("ix_adoption_pets_status_feed_score", "status", "feed_score"),
+    )
 
     pet = relationship("Pet", back_populates="adoption_pet")
     
@@ -137,19 +158,6 @@ class AdoptionPet(Base):
         lazy="dynamic",  # Enables querying directly on relationship
     )
 
-    # Hybrid property for view count
-    @hybrid_property
-    def view_count(self):
-        return self.views.count()
-
-    @view_count.expression
-    def view_count(cls):
-        return (
-            select([func.count(AdoptionPetViews.id)])
-            .where(AdoptionPetViews.adoption_pet_id == cls.id)
-            .label("view_count")
-        )
-
 
 class AdoptionPetViews(Base):
     __tablename__ = "adoption_pet_views"
@@ -0,0 +1,42 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Float,
+    DateTime,
+    func,
+    UniqueConstraint,
+)
+
+from app.core.database import Base
+
+
+class StatRollup(Base):
+    """Pre-aggregated count (and sum) of a metric per hour or day bucket and dimension."""
+    __tablename__ = "stat_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    metric = Column(String(50), nullable=False)
+    granularity = Column(String(10), nullable=False)  # hour, day
+    bucket_start = Column(DateTime, nullable=False)
+    dimension = Column(String(100), nullable=False, default="", server_default="")  # e.g. pet type, "" for none
+    count = Column(Integer, nullable=False, default=0, server_default="0")
+    total = Column(Float, nullable=False, default=0, server_default="0")  # sum of the metric values, e.g. days to adoption
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    # also the index of the range reads by (metric, granularity, bucket_start)
+    __table_args__ = (
+        UniqueConstraint(
+            "metric", "granularity", "bucket_start", "dimension",
+            name="uq_stat_rollups_metric_granularity_bucket_dimension",
+        ),
+    )
+
+
+class JobWatermark(Base):
+    """How far a background job has processed its source, e.g. the last row id rolled up."""
+    __tablename__ = "job_watermarks"
+
+    name = Column(String(100), primary_key=True)
+    value = Column(String(100), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text, func, Enum
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, ForeignKey, Text, func, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -40,9 +40,52 @@ class VaccinationRecord(Base):
     administered_by = Column(String(100), nullable=False)
     expiration_date = Column(DateTime, nullable=False)
     notes = Column(Text)
-    deleted_at = Column(DateTime, nullable=True, onupdate=func.now())
+    # when the expiry reminder was collected, cleared when the expiry changes
+    reminded_at = Column(DateTime, nullable=True)
+    # set by the soft delete only, an onupdate would soft delete every edited record
+    deleted_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    # range scans of the live records not reminded of yet by expiry, see app/tasks/vaccination_reminders.py,
+    # and the listing by administered_date (then id, the row locator) with or without its filters
+    __table_args__ = (
+        Index(
+            "ix_vaccination_records_deleted_at_reminded_at_expiration_date",
+            "deleted_at", "reminded_at", "expiration_date",
+        ),
+        Index("ix_vaccination_records_deleted_at_administered_date", "deleted_at", "administered_date"),
+        Index(
+            "ix_vaccination_records_deleted_at_vaccine_type_administered_date",
+            "deleted_at", "vaccine_type", "administered_date",
+        ),
+        # named short of the 64 characters MySQL allows
+        Index(
+            "ix_vaccination_records_deleted_at_pet_id_vaccine_type",
+            "deleted_at", "pet_id", "vaccine_type", "administered_date",
+        ),
+    )
+
     # relationships
-    pet = relationship("Pet", back_populates="vaccination_records")
\ No newline at end of file
+    pet = relationship("Pet", back_populates="vaccination_records")
+
+
+class PetVaccinationStatus(Base):
+    """
+    Latest live vaccination of a pet against one vaccine type, kept in step
+    with the records by app/crud/vaccination.py. The pet is currently
+    vaccinated while expiration_date is ahead.
+    """
+    __tablename__ = "pet_vaccination_statuses"
+
+    pet_id = Column(Integer, ForeignKey("pets.id", ondelete="CASCADE"), primary_key=True)
+    vaccine_type = Column(Enum(VaccineType), primary_key=True)
+    record_id = Column(Integer, ForeignKey("vaccination_records.id", ondelete="CASCADE"), nullable=False)
+    administered_date = Column(DateTime, nullable=False)
+    expiration_date = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+    # the pets currently vaccinated against a type are a range of it
+    __table_args__ = (
+        Index("ix_pet_vaccination_statuses_vaccine_type_expiration_date", "vaccine_type", "expiration_date"),
+    )
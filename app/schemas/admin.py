@@ -0,0 +1,59 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SlowQueryOrder(str, Enum):
+    total_ms = "total_ms"
+    count = "count"
+    p50_ms = "p50_ms"
+    p99_ms = "p99_ms"
+    max_ms = "max_ms"
+
+
+class SlowQueryStat(BaseModel):
+    fingerprint: str
+    example: str
+    count: int
+    total_ms: float
+    max_ms: float
+    p50_ms: float
+    p99_ms: float
+    routes: Dict[str, int]
+    callers: Dict[str, int]
+    explain: Optional[List[Dict[str, Any]]] = None
+
+
+class SlowQueryReport(BaseModel):
+    threshold_ms: float
+    items: List[SlowQueryStat]
+
+
+class ProfileFormat(str, Enum):
+    speedscope = "speedscope"
+    collapsed = "collapsed"
+
+
+class ProfilingSettings(BaseModel):
+    routes: List[str] = Field(default_factory=list)
+    sample_rate: float = Field(0.0, ge=0, le=1)
+
+
+class ProfileSummary(BaseModel):
+    id: int
+    method: str
+    path: str
+    route: Optional[str] = None
+    trigger: str
+    started_at: datetime
+    duration_ms: float
+    status_code: Optional[int] = None
+    samples: int
+
+
+class ProfilingStatus(ProfilingSettings):
+    header: str
+    interval_ms: float
+    profiles: List[ProfileSummary]
@@ -21,12 +21,47 @@ class AdoptionStatus(str, Enum):
     rejected = "rejected"
     screening = "screening"
 
+# Allowed status changes, approved and rejected requests are final.
+# screening -> screening reschedules the screening.
+ADOPTION_STATUS_TRANSITIONS = {
+    AdoptionStatus.pending: {AdoptionStatus.screening, AdoptionStatus.approved, AdoptionStatus.rejected},
+    AdoptionStatus.screening: {AdoptionStatus.screening, AdoptionStatus.approved, AdoptionStatus.rejected},
+    AdoptionStatus.approved: set(),
+    AdoptionStatus.rejected: set(),
+}
+
+
+def can_transition(current: str, target: str) -> bool:
+    try:
+        return AdoptionStatus(target) in ADOPTION_STATUS_TRANSITIONS[AdoptionStatus(current)]
+    except ValueError:
+        return False
+
+
+def statuses_allowing(target: str) -> List[str]:
+    """The statuses an adoption may move to target from."""
+    return [
+        current.value
+        for current, targets in ADOPTION_STATUS_TRANSITIONS.items()
+        if AdoptionStatus(target) in targets
+    ]
+
 class AdoptionUpdateStatus(BaseModel):
     status: AdoptionStatus = Field(..., description="The status of the adoption (pending, approved, rejected)")
     schedule: Optional[datetime] = None
     approved_by: Optional[int] = None
     agreement_signed: Optional[bool] = None
     adoption_date: Optional[datetime] = None 
+    version: Optional[int] = Field(None, description="The version the change was based on, a stale version is rejected with 409")
+
+class AdoptionBulkUpdateStatus(BaseModel):
+    adoption_ids: List[int] = Field(..., min_length=1, description="The adoption requests to change")
+    status: AdoptionStatus
+    schedule: Optional[datetime] = None
+    approved_by: Optional[int] = None
+    agreement_signed: Optional[bool] = None
+    adoption_date: Optional[datetime] = None
+    reject_siblings: bool = Field(False, description="When approving, reject the other open requests for the same pets")
 
 
 
@@ -43,6 +78,7 @@ class AdoptionRead(BaseModel):
     schedule: Optional[datetime]
     created_at: datetime
     updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True  # Enables compatibility with SQLAlchemy models
@@ -59,6 +95,34 @@ class AdoptionInDB(AdoptionInDBBase):
 class AdoptionListResponse(BaseModel):
     items: List[AdoptionRead]
     total: int
+    next_cursor: Optional[str] = None
+
+class AdoptionBulkUpdateResponse(BaseModel):
+    items: List[AdoptionRead]
+    skipped: List[int] = Field(..., description="Requests not in a status that allows the change")
 
 class AdoptionDocumentGeneration(BaseModel):
-    adoption_id: int
\ No newline at end of file
+    adoption_id: int
+
+class ContractFormat(str, Enum):
+    docx = "docx"
+    pdf = "pdf"
+
+class ContractJobCreate(BaseModel):
+    adoption_ids: List[int] = Field(..., min_length=1, description="The adoptions to generate contracts for")
+    format: ContractFormat = ContractFormat.docx
+
+class ContractJobError(BaseModel):
+    adoption_id: int
+    error: str
+
+class ContractJobResponse(BaseModel):
+    job_id: str
+    status: str
+    format: ContractFormat
+    total: int
+    completed: int
+    failed: int
+    errors: List[ContractJobError]
+    created_at: datetime
+    finished_at: Optional[datetime] = None
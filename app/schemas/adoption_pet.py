@@ -1,4 +1,5 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional, List
 from pydantic import BaseModel, validator, StrictBool
 
@@ -30,6 +31,11 @@ class AdoptionPetCreate(AdoptionPetBase):
     #     return v.strip()
 
 
+class AdoptionPetSort(str, Enum):
+    popular = "popular"
+    ranked = "ranked"
+
+
 class AdoptionPetUpdateStatus(BaseModel):
     id: int
     status: str
@@ -72,6 +78,7 @@ class AdoptionPetResponse(BaseModel):
     additional_details: Optional[str] = None
     media: Optional[List] = None
     status: str
+    view_count: int = 0
     pet: PetInDBBase
 
     class Config:
@@ -9,6 +9,8 @@ from .pet import PetBase, PetInDBBase
 class LostPetBase(BaseModel):
     # pet_id: int
     last_seen_location: str
+    last_seen_latitude: Optional[float] = Field(None, ge=-90, le=90)
+    last_seen_longitude: Optional[float] = Field(None, ge=-180, le=180)
     last_seen_date: datetime
     additional_details: Optional[str] = None
 
@@ -37,6 +39,10 @@ class LostPetUpdate(BaseModel):
     additional_details: Optional[str] = None
 
 
+class LostPetUpdateStatus(BaseModel):
+    status: LostPetStatus
+
+
 class LostPetInDBBase(LostPetBase):
     id: int
     pet: PetInDBBase
@@ -60,6 +66,8 @@ class LostPetInDB(LostPetInDBBase):
 class LostPetDetailsResponse(BaseModel):
     id: int
     last_seen_location: str
+    last_seen_latitude: Optional[float] = None
+    last_seen_longitude: Optional[float] = None
     last_seen_date: datetime
     additional_details: Optional[str] = None
     status: str
@@ -1,8 +1,8 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
-from pydantic import BaseModel, validator
-from .lost_pet import LostPetInDBBase
+from pydantic import BaseModel, Field, validator
+from .lost_pet import LostPetInDBBase, LostPetDetailsResponse
 from .user import UserInDBBase
 
 
@@ -11,10 +11,14 @@ class LostPetReportBase(BaseModel):
     reporter_id: int
     details: str
     report_location: str
+    report_latitude: Optional[float] = Field(None, ge=-90, le=90)
+    report_longitude: Optional[float] = Field(None, ge=-180, le=180)
     image_url: Optional[str] = None
 
 
 class LostPetReportCreate(LostPetReportBase):
+    image_hash: Optional[str] = None
+
     @validator("details")
     def details_not_empty(cls, v: str):
         if not v or not v.strip():
@@ -74,6 +78,8 @@ class LostPetReportDetailsResponse(BaseModel):
     details: str
     reporter: ReporterBasicInfo
     report_location: str
+    report_latitude: Optional[float] = None
+    report_longitude: Optional[float] = None
     report_date: datetime
     image_url: str
     is_matched: Optional[bool] = None
@@ -87,4 +93,15 @@ class LostPetReportDetailsResponse(BaseModel):
 
 
 class LostPetReportMatchUpdate(BaseModel):
-    is_matched: bool
\ No newline at end of file
+    is_matched: bool
+
+
+class LostPetReportCandidate(BaseModel):
+    lost_pet: LostPetDetailsResponse
+    image_distance: Optional[int] = None
+    score: float
+
+
+class LostPetReportCandidatesResponse(BaseModel):
+    report_id: int
+    items: List[LostPetReportCandidate]
@@ -26,6 +26,7 @@ class PetBase(BaseModel):
 
 class PetCreate(PetBase):
     gender: PetGender = PetGender.MALE
+    image_hash: Optional[str] = None
 
     @validator("type")
     def type_not_empty(cls, v: str):
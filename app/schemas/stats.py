@@ -0,0 +1,36 @@
+from datetime import datetime
+from enum import Enum
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class StatMetric(str, Enum):
+    adoption_pet_views = "adoption_pet_views"  # by pet type
+    adoptions_created = "adoptions_created"
+    adoptions_approved = "adoptions_approved"  # total = days from request to adoption
+    lost_pets_reported = "lost_pets_reported"  # by pet type
+
+
+class StatGranularity(str, Enum):
+    hour = "hour"
+    day = "day"
+
+
+class StatBucket(BaseModel):
+    bucket_start: datetime
+    dimension: str
+    count: int
+    total: float
+    average: Optional[float] = None
+
+    class Config:
+        from_attributes = True
+
+
+class StatSeriesResponse(BaseModel):
+    metric: StatMetric
+    granularity: StatGranularity
+    start: datetime
+    end: datetime
+    items: List[StatBucket]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+from enum import Enum
 from app.models.vaccination import VaccineType
 from app.schemas.pet import PetInDBBase
 
@@ -16,6 +17,9 @@ class VaccinationBase(BaseModel):
 class VaccinationCreate(VaccinationBase):
     pass
 
+class VaccinationImportRow(VaccinationBase):
+    administered_date: Optional[datetime] = Field(None, description="When the vaccine was administered, the import time when left out")
+
 class VaccinationUpdate(BaseModel):
     vaccine_type: Optional[VaccineType] = Field(None, description="Type of vaccine administered")
     owner: Optional[str] = Field(None, description="Name of pet owner")
@@ -43,4 +47,27 @@ class VaccinationInDB(VaccinationInDBBase):
 
 class VaccinationListResponse(BaseModel):
     items: List[VaccinationResponse]
-    total: int
\ No newline at end of file
+    total: int
+    next_cursor: Optional[str] = None
+
+class PetVaccinationStatusResponse(BaseModel):
+    pet_id: int
+    vaccine_type: VaccineType
+    record_id: int = Field(..., description="The latest vaccination record of this type")
+    administered_date: datetime
+    expiration_date: datetime
+    is_current: bool = Field(..., description="The latest vaccination hasn't expired yet")
+
+class VaccinationFileFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+class VaccinationImportError(BaseModel):
+    line: int = Field(..., description="Line of the file the row ends on")
+    error: str
+
+class VaccinationImportResponse(BaseModel):
+    created: int
+    failed: int
+    errors: List[VaccinationImportError]
+    errors_truncated: bool = Field(False, description="Only the first errors are listed")
@@ -0,0 +1,70 @@
+"""
+Adoption pet view flusher.
+
+Moves the view increments buffered by adoption_pet_view_counter into the
+denormalized adoption_pets.view_count column, one batched UPDATE per flush.
+The API process runs it in a background thread (which also picks up the
+views it had to buffer in memory while redis was down), it can also run
+on its own.
+
+Run with: python -m app.tasks.adoption_pet_views
+"""
+import logging
+import threading
+from typing import Optional
+
+from app.core.database import SessionLocal
+from app.crud.adoption_pet import apply_adoption_pet_view_counts
+from app.utils.constants import VIEW_FLUSH_INTERVAL_SECONDS
+from app.utils.view_counter import adoption_pet_view_counter
+
+_stop = threading.Event()
+_thread: Optional[threading.Thread] = None
+
+
+def flush_view_counts() -> int:
+    """Flush the buffered views once. Returns the number of pets updated."""
+    counts = adoption_pet_view_counter.drain()
+    if not counts:
+        return 0
+
+    db = SessionLocal()
+    try:
+        return apply_adoption_pet_view_counts(db, counts)
+    except Exception:
+        logging.exception(f"Failed to flush the views of {len(counts)} adoption pets")
+        # keep them for the next flush
+        adoption_pet_view_counter.restore(counts)
+        return 0
+    finally:
+        db.close()
+
+
+def run_worker(stop: threading.Event = _stop) -> None:
+    logging.info("Adoption pet view flusher started")
+    while not stop.wait(VIEW_FLUSH_INTERVAL_SECONDS):
+        flush_view_counts()
+    # last flush on the way out
+    flush_view_counts()
+
+
+def start_background_flusher() -> None:
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        _stop.clear()
+        _thread = threading.Thread(target=run_worker, name="adoption-pet-view-flusher", daemon=True)
+        _thread.start()
+
+
+def stop_background_flusher() -> None:
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=VIEW_FLUSH_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        run_worker()
+    except KeyboardInterrupt:
+        flush_view_counts()
@@ -0,0 +1,57 @@
+"""
+Adoption feed score refresher.
+
+Scores the adoption pets created or edited since its last run (the
+watermark is kept in job_watermarks), so the ranked feed is a range read
+of the (status, feed_score) index. Views move the scores of the viewed
+pets when they are flushed, see app/tasks/adoption_pet_views.py.
+
+Run with: python -m app.tasks.feed_scores [--once]
+"""
+import logging
+import sys
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.crud.adoption_pet import refresh_adoption_pet_feed_scores
+from app.utils.constants import FEED_REFRESH_BATCH_SIZE, FEED_REFRESH_INTERVAL_SECONDS
+
+
+def refresh_feed_scores(db: Session) -> int:
+    """Catch the scores up with every change. Returns the number of pets scored."""
+    scored = 0
+    while True:
+        rows = refresh_adoption_pet_feed_scores(db, batch_size=FEED_REFRESH_BATCH_SIZE)
+        scored += rows
+        if rows < FEED_REFRESH_BATCH_SIZE:
+            return scored
+
+
+def run_worker() -> None:
+    logging.info("Feed score worker started")
+    while True:
+        db = SessionLocal()
+        try:
+            scored = refresh_feed_scores(db)
+            if scored:
+                logging.info(f"Scored {scored} adoption pets")
+        except Exception:
+            db.rollback()
+            logging.exception("Failed to refresh the adoption feed scores")
+        finally:
+            db.close()
+        time.sleep(FEED_REFRESH_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if "--once" in sys.argv:
+        db = SessionLocal()
+        try:
+            logging.info(f"Scored {refresh_feed_scores(db)} adoption pets")
+        finally:
+            db.close()
+    else:
+        run_worker()
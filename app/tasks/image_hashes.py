@@ -0,0 +1,39 @@
+"""
+Pet and lost pet report image hash backfill.
+
+Hashes, in batches of IMAGE_HASH_BACKFILL_BATCH, the images of pets and
+sighting reports uploaded before image hashing existed; both are hashed on
+upload since, so the read paths never hash. Running API processes pick the
+new pet hashes up when their lost pet indexes are next rebuilt.
+
+Run with: python -m app.tasks.image_hashes
+"""
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.crud.lost_pet_report import backfill_lost_pet_report_image_hashes
+from app.crud.pet import backfill_pet_image_hashes
+from app.utils.constants import IMAGE_HASH_BACKFILL_BATCH
+
+
+def backfill_image_hashes(db: Session) -> int:
+    """Hash every pet and report image without a hash. Returns the number of rows processed."""
+    processed = 0
+    for backfill in (backfill_pet_image_hashes, backfill_lost_pet_report_image_hashes):
+        while True:
+            rows = backfill(db, limit=IMAGE_HASH_BACKFILL_BATCH)
+            processed += rows
+            if rows < IMAGE_HASH_BACKFILL_BATCH:
+                break
+    return processed
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        logging.info(f"Hashed the images of {backfill_image_hashes(db)} pets and reports")
+    finally:
+        db.close()
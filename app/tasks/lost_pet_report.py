@@ -0,0 +1,172 @@
+"""
+Lost pet match worker.
+
+Consumes the ids of new sighting reports, ranks the open lost pet cases for
+every report collected within a batch window in a single pass over the case
+index, stores the rankings and notifies the owners of strong matches.
+
+A batch is moved from the queue to a processing set and only removed from
+it once processed, so the reports of a worker that crashed mid-batch are
+queued again when the worker starts. Run a single worker; processing a
+report twice is harmless, its candidates are replaced and owners are only
+notified once.
+
+Run with: python -m app.tasks.lost_pet_report
+"""
+import json
+import logging
+import time
+from typing import List, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.crud.lost_pet_report import (
+    get_lost_pet_reports_for_matching,
+    get_match_candidates_to_notify,
+    mark_match_candidates_notified,
+    rank_lost_pet_report_candidates,
+    save_lost_pet_match_candidates,
+)
+from app.utils.constants import (
+    MATCH_BATCH_MAX_SIZE,
+    MATCH_BATCH_WINDOW_SECONDS,
+    MATCH_CANDIDATES_PER_REPORT,
+    MATCH_NOTIFY_THRESHOLD,
+    MATCH_POLL_INTERVAL_SECONDS,
+)
+from app.utils.redis import RedisHelper
+
+LOST_PET_REPORT_MATCH_QUEUE = "qc_pet_adoption:lost_pet_report_matching"
+LOST_PET_REPORT_MATCH_PROCESSING = "qc_pet_adoption:lost_pet_report_matching:processing"
+NOTIFICATION_QUEUE = "qc_pet_adoption:notifications"
+
+redis = RedisHelper()
+
+
+def enqueue_report_for_matching(report_id: int) -> bool:
+    return redis.add_to_redis_set(LOST_PET_REPORT_MATCH_QUEUE, str(report_id))
+
+
+def collect_report_batch() -> List[int]:
+    """
+    Wait for the first queued report, then keep collecting for the batch
+    window so a burst of reports is ranked together.
+    """
+    batch = redis.move_redis_set_members(
+        LOST_PET_REPORT_MATCH_QUEUE, LOST_PET_REPORT_MATCH_PROCESSING, MATCH_BATCH_MAX_SIZE
+    )
+    if not batch:
+        return []
+
+    deadline = time.monotonic() + MATCH_BATCH_WINDOW_SECONDS
+    while len(batch) < MATCH_BATCH_MAX_SIZE and time.monotonic() < deadline:
+        time.sleep(min(0.5, max(deadline - time.monotonic(), 0)))
+        batch.extend(
+            redis.move_redis_set_members(
+                LOST_PET_REPORT_MATCH_QUEUE, LOST_PET_REPORT_MATCH_PROCESSING, MATCH_BATCH_MAX_SIZE - len(batch)
+            )
+        )
+
+    return sorted({int(report_id) for report_id in batch})
+
+
+def finish_report_batch(report_ids: Sequence[int]) -> None:
+    redis.remove_from_redis_set(LOST_PET_REPORT_MATCH_PROCESSING, [str(report_id) for report_id in report_ids])
+
+
+def requeue_report_batch(report_ids: Sequence[int]) -> int:
+    """
+    Move a failed batch from processing back to the queue, it's retried on
+    the next poll. A report that couldn't be moved stays in processing and is
+    queued again when the worker restarts. Returns how many were moved.
+    """
+    moved = redis.move_to_redis_set(
+        LOST_PET_REPORT_MATCH_PROCESSING, LOST_PET_REPORT_MATCH_QUEUE, [str(report_id) for report_id in report_ids]
+    )
+    if len(moved) < len(report_ids):
+        logging.warning(f"Left {len(report_ids) - len(moved)} lost pet reports in processing")
+    return len(moved)
+
+
+def requeue_interrupted_reports() -> int:
+    """Queue again the reports a crashed worker left in processing. Returns how many."""
+    requeued = 0
+    while True:
+        moved = redis.move_redis_set_members(
+            LOST_PET_REPORT_MATCH_PROCESSING, LOST_PET_REPORT_MATCH_QUEUE, MATCH_BATCH_MAX_SIZE
+        )
+        if not moved:
+            return requeued
+        requeued += len(moved)
+
+
+def notify_match_owners(db: Session, report_ids: Sequence[int]) -> int:
+    """Queue one notification per strong (report, lost pet) match, at most once."""
+    candidates = get_match_candidates_to_notify(db, report_ids, MATCH_NOTIFY_THRESHOLD)
+
+    notified = []
+    for candidate in candidates:
+        pet = candidate.lost_pet.pet
+        redis_data = {
+            "queue_type": "lost_pet_match_notification",
+            "email": pet.owner.email,
+            "name": pet.owner.full_name,
+            "pet_name": pet.name,
+            "pet_image_url": pet.image_url,
+            "report_id": candidate.report_id,
+            "report_location": candidate.report.report_location,
+            "report_image_url": candidate.report.image_url,
+            "score": candidate.score,
+        }
+        if redis.add_to_redis_set(NOTIFICATION_QUEUE, json.dumps(redis_data)):
+            notified.append(candidate.id)
+        else:
+            logging.warning(f"Failed to queue match notification {candidate.id}")
+
+    mark_match_candidates_notified(db, notified)
+
+    return len(notified)
+
+
+def process_report_batch(db: Session, report_ids: Sequence[int]) -> int:
+    """Rank, store and notify a batch of reports. Returns the number of reports processed."""
+    reports = get_lost_pet_reports_for_matching(db, report_ids)
+    if not reports:
+        return 0
+
+    ranked = rank_lost_pet_report_candidates(db, reports, limit=MATCH_CANDIDATES_PER_REPORT)
+    save_lost_pet_match_candidates(db, reports, ranked)
+    notify_match_owners(db, [report.id for report in reports])
+
+    return len(reports)
+
+
+def run_worker() -> None:
+    logging.info("Lost pet match worker started")
+    requeued = requeue_interrupted_reports()
+    if requeued:
+        logging.info(f"Queued {requeued} interrupted lost pet reports again")
+    while True:
+        report_ids = collect_report_batch()
+        if not report_ids:
+            time.sleep(MATCH_POLL_INTERVAL_SECONDS)
+            continue
+
+        db = SessionLocal()
+        try:
+            processed = process_report_batch(db, report_ids)
+            finish_report_batch(report_ids)
+            logging.info(f"Matched {processed} lost pet reports")
+        except Exception:
+            db.rollback()
+            logging.exception(f"Failed to match lost pet reports {report_ids}")
+            requeue_report_batch(report_ids)
+            time.sleep(MATCH_POLL_INTERVAL_SECONDS)
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_worker()
@@ -0,0 +1,158 @@
+"""
+Vaccination expiry reminders.
+
+Walks the live records not reminded of yet that expire within the next
+VACCINATION_REMINDER_DAYS in (expiration_date, id) order, a chunked range
+read of the (deleted_at, reminded_at, expiration_date) index. The records
+of a chunk are added to a redis hash per contact, then flagged with
+reminded_at, so every record is reminded of once whenever it enters the
+window: imported late, entered late or edited to expire earlier. Changing
+the expiry of a record clears the flag. One digest notification per
+contact is then queued with every record collected for it.
+
+Records expired already are not reminded of.
+
+Run with: python -m app.tasks.vaccination_reminders [--once]
+"""
+import json
+import logging
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.crud.vaccination import get_expiring_vaccination_records, mark_vaccination_records_reminded
+from app.utils.constants import (
+    VACCINATION_REMINDER_BATCH_SIZE,
+    VACCINATION_REMINDER_DAYS,
+    VACCINATION_REMINDER_INTERVAL_SECONDS,
+)
+from app.utils.notifications import NOTIFICATION_QUEUE
+from app.utils.redis import RedisHelper
+
+# record id -> record of one contact, and the contacts with a digest to send
+REMINDER_DIGEST = "qc_pet_adoption:vaccination_reminders:{contact}"
+REMINDER_DIGESTS = "qc_pet_adoption:vaccination_reminder_digests"
+DIGEST_POP_SIZE = 500
+
+redis = RedisHelper()
+
+
+def collect_expiring_records(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Add the records not reminded of yet expiring until the reminder horizon
+    to the digests of their contacts. Returns the number of records collected.
+    """
+    now = now or datetime.utcnow()
+    until = now + timedelta(days=VACCINATION_REMINDER_DAYS)
+    after: Optional[Tuple[datetime, int]] = None
+
+    collected = 0
+    while True:
+        rows = get_expiring_vaccination_records(db, now, until, after, limit=VACCINATION_REMINDER_BATCH_SIZE)
+        if not rows:
+            return collected
+
+        digests: Dict[str, Dict[str, str]] = {}
+        for row in rows:
+            digest = REMINDER_DIGEST.format(contact=row.contact.strip().lower())
+            # keyed by record id, a chunk collected again after a failed commit isn't reminded twice
+            digests.setdefault(digest, {})[str(row.id)] = json.dumps(
+                {
+                    "record_id": row.id,
+                    "pet_id": row.pet_id,
+                    "pet_name": row.pet_name,
+                    "vaccine_type": row.vaccine_type.value,
+                    "owner": row.owner,
+                    "contact": row.contact,
+                    "expiration_date": row.expiration_date.isoformat(),
+                }
+            )
+        if not redis.add_to_redis_hashes(digests, REMINDER_DIGESTS):
+            # not flagged, the chunk is collected again by the next run
+            logging.warning(f"Failed to store the reminders of {len(rows)} vaccination records in redis")
+            return collected
+
+        mark_vaccination_records_reminded(db, [row.id for row in rows], now)
+        db.commit()
+        last = rows[-1]
+        after = (last.expiration_date, last.id)
+        collected += len(rows)
+        if len(rows) < VACCINATION_REMINDER_BATCH_SIZE:
+            return collected
+
+
+def send_reminder_digests() -> int:
+    """Queue one notification per contact with collected records. Returns the number queued."""
+    sent = 0
+    while True:
+        digests = redis.pop_from_redis_set(REMINDER_DIGESTS, DIGEST_POP_SIZE)
+        if not digests:
+            return sent
+
+        for index, digest in enumerate(digests):
+            fields = redis.pop_redis_hash(digest)
+            if fields is None:
+                _requeue_digests(digests[index:])
+                return sent
+            if not fields:
+                continue
+            records = sorted((json.loads(value) for value in fields.values()), key=lambda r: r["expiration_date"])
+            contact = records[0]["contact"]
+            redis_data = {
+                "queue_type": "vaccination_reminder",
+                "email": contact if "@" in contact else None,
+                "contact": contact,
+                "name": records[-1]["owner"],
+                "records": records,
+            }
+            if not redis.add_to_redis_set(NOTIFICATION_QUEUE, json.dumps(redis_data)):
+                logging.warning(f"Failed to queue the vaccination reminder digest {digest}")
+                redis.add_to_redis_hashes({digest: fields}, REMINDER_DIGESTS)
+                _requeue_digests(digests[index + 1:])
+                return sent
+            sent += 1
+
+
+def _requeue_digests(digests) -> None:
+    """Leave the digests popped but not sent for the next run."""
+    for digest in digests:
+        redis.add_to_redis_set(REMINDER_DIGESTS, digest)
+
+
+def send_vaccination_reminders(db: Session) -> int:
+    collected = collect_expiring_records(db)
+    if collected:
+        logging.info(f"Collected {collected} expiring vaccination records")
+    return send_reminder_digests()
+
+
+def run_worker() -> None:
+    logging.info("Vaccination reminder worker started")
+    while True:
+        db = SessionLocal()
+        try:
+            sent = send_vaccination_reminders(db)
+            if sent:
+                logging.info(f"Queued {sent} vaccination reminder digests")
+        except Exception:
+            db.rollback()
+            logging.exception("Failed to send the vaccination reminders")
+        finally:
+            db.close()
+        time.sleep(VACCINATION_REMINDER_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if "--once" in sys.argv:
+        db = SessionLocal()
+        try:
+            logging.info(f"Queued {send_vaccination_reminders(db)} vaccination reminder digests")
+        finally:
+            db.close()
+    else:
+        run_worker()
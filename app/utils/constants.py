@@ -26,4 +26,81 @@ API_V1_STR: str = "/v1"
 API_ROOT_PATH= "/api" if ENVIRONMENT == "prod" else "/"
 
 REDIS_HOST = config("REDIS_HOST") if ENVIRONMENT == "prod" else "0.0.0.0"
-REDIS_PASSWORD= config("REDIS_PASSWORD")
\ No newline at end of file
+REDIS_PASSWORD= config("REDIS_PASSWORD")
+
+# Lost pet matching
+LOST_PET_INDEX_TTL_SECONDS = config("LOST_PET_INDEX_TTL_SECONDS", default=300, cast=int)
+IMAGE_MATCH_MAX_DISTANCE = config("IMAGE_MATCH_MAX_DISTANCE", default=12, cast=int)
+IMAGE_HASH_BACKFILL_BATCH = config("IMAGE_HASH_BACKFILL_BATCH", default=200, cast=int)
+
+# Lost pet match worker
+MATCH_BATCH_WINDOW_SECONDS = config("MATCH_BATCH_WINDOW_SECONDS", default=5, cast=float)
+MATCH_BATCH_MAX_SIZE = config("MATCH_BATCH_MAX_SIZE", default=200, cast=int)
+MATCH_POLL_INTERVAL_SECONDS = config("MATCH_POLL_INTERVAL_SECONDS", default=2, cast=float)
+MATCH_CANDIDATES_PER_REPORT = config("MATCH_CANDIDATES_PER_REPORT", default=10, cast=int)
+MATCH_NOTIFY_THRESHOLD = config("MATCH_NOTIFY_THRESHOLD", default=0.75, cast=float)
+
+# Adoption contracts
+CONTRACT_CACHE_SIZE = config("CONTRACT_CACHE_SIZE", default=128, cast=int)
+CONTRACT_JOB_WORKERS = config("CONTRACT_JOB_WORKERS", default=0, cast=int)  # 0 = one per cpu
+CONTRACT_JOB_MAX_ADOPTIONS = config("CONTRACT_JOB_MAX_ADOPTIONS", default=500, cast=int)
+CONTRACT_JOB_TTL_SECONDS = config("CONTRACT_JOB_TTL_SECONDS", default=3600, cast=int)
+CONTRACT_PDF_CONVERTER = config("CONTRACT_PDF_CONVERTER", default="soffice")
+CONTRACT_PDF_TIMEOUT_SECONDS = config("CONTRACT_PDF_TIMEOUT_SECONDS", default=120, cast=int)
+
+# Adoption pet views
+VIEW_FLUSH_INTERVAL_SECONDS = config("VIEW_FLUSH_INTERVAL_SECONDS", default=30, cast=float)
+VIEW_REDIS_RETRY_SECONDS = config("VIEW_REDIS_RETRY_SECONDS", default=30, cast=float)
+VIEW_REDIS_TIMEOUT_SECONDS = config("VIEW_REDIS_TIMEOUT_SECONDS", default=0.2, cast=float)
+
+# Analytics rollups
+ROLLUP_INTERVAL_SECONDS = config("ROLLUP_INTERVAL_SECONDS", default=300, cast=float)
+ROLLUP_BATCH_SIZE = config("ROLLUP_BATCH_SIZE", default=5000, cast=int)
+ROLLUP_LAG_SECONDS = config("ROLLUP_LAG_SECONDS", default=60, cast=int)
+
+# Adoption feed ranking
+FEED_HALF_LIFE_HOURS = config("FEED_HALF_LIFE_HOURS", default=72, cast=float)
+FEED_VIEW_WEIGHT = config("FEED_VIEW_WEIGHT", default=0.1, cast=float)
+FEED_MEDIA_BONUS = config("FEED_MEDIA_BONUS", default=0.5, cast=float)
+FEED_REFRESH_INTERVAL_SECONDS = config("FEED_REFRESH_INTERVAL_SECONDS", default=60, cast=float)
+FEED_REFRESH_BATCH_SIZE = config("FEED_REFRESH_BATCH_SIZE", default=1000, cast=int)
+FEED_REFRESH_LAG_SECONDS = config("FEED_REFRESH_LAG_SECONDS", default=5, cast=int)
+
+# Similar adoption pets
+SIMILAR_PETS_INDEX_TTL_SECONDS = config("SIMILAR_PETS_INDEX_TTL_SECONDS", default=300, cast=int)
+SIMILAR_PETS_MAX = config("SIMILAR_PETS_MAX", default=20, cast=int)
+SIMILAR_PETS_CACHE_SIZE = config("SIMILAR_PETS_CACHE_SIZE", default=2048, cast=int)
+
+# Response cache of the public read endpoints
+RESPONSE_CACHE_ENABLED = config("RESPONSE_CACHE_ENABLED", default=True, cast=bool)
+RESPONSE_CACHE_REDIS = config("RESPONSE_CACHE_REDIS", default=False, cast=bool)
+RESPONSE_CACHE_TTL_SECONDS = config("RESPONSE_CACHE_TTL_SECONDS", default=60, cast=int)
+RESPONSE_CACHE_MAX_ENTRIES = config("RESPONSE_CACHE_MAX_ENTRIES", default=2048, cast=int)
+RESPONSE_CACHE_MAX_BODY_BYTES = config("RESPONSE_CACHE_MAX_BODY_BYTES", default=1048576, cast=int)
+
+# Slow query log
+SLOW_QUERY_THRESHOLD_MS = config("SLOW_QUERY_THRESHOLD_MS", default=100, cast=float)
+SLOW_QUERY_EXPLAIN = config("SLOW_QUERY_EXPLAIN", default=False, cast=bool)
+SLOW_QUERY_MAX_FINGERPRINTS = config("SLOW_QUERY_MAX_FINGERPRINTS", default=500, cast=int)
+SLOW_QUERY_SAMPLES = config("SLOW_QUERY_SAMPLES", default=1000, cast=int)
+
+# Vaccination expiry reminders
+VACCINATION_REMINDER_DAYS = config("VACCINATION_REMINDER_DAYS", default=14, cast=int)
+VACCINATION_REMINDER_BATCH_SIZE = config("VACCINATION_REMINDER_BATCH_SIZE", default=1000, cast=int)
+VACCINATION_REMINDER_INTERVAL_SECONDS = config("VACCINATION_REMINDER_INTERVAL_SECONDS", default=3600, cast=float)
+
+# Vaccination import / export
+VACCINATION_IMPORT_BATCH_SIZE = config("VACCINATION_IMPORT_BATCH_SIZE", default=1000, cast=int)
+VACCINATION_IMPORT_MAX_ERRORS = config("VACCINATION_IMPORT_MAX_ERRORS", default=1000, cast=int)
+VACCINATION_EXPORT_BATCH_SIZE = config("VACCINATION_EXPORT_BATCH_SIZE", default=1000, cast=int)
+
+# Vaccination listing
+VACCINATION_TOTAL_CACHE_TTL_SECONDS = config("VACCINATION_TOTAL_CACHE_TTL_SECONDS", default=60, cast=float)
+VACCINATION_TOTAL_CACHE_MAX_ENTRIES = config("VACCINATION_TOTAL_CACHE_MAX_ENTRIES", default=1024, cast=int)
+
+# Request profiler, off unless PROFILING_ENABLED is set
+PROFILING_ENABLED = config("PROFILING_ENABLED", default=False, cast=bool)
+PROFILING_HEADER = config("PROFILING_HEADER", default="X-Profile")
+PROFILING_INTERVAL_MS = config("PROFILING_INTERVAL_MS", default=5, cast=float)
+PROFILING_MAX_PROFILES = config("PROFILING_MAX_PROFILES", default=50, cast=int)
+PROFILING_MAX_SAMPLES = config("PROFILING_MAX_SAMPLES", default=20000, cast=int)
@@ -0,0 +1,162 @@
+import copy
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import quote
+
+from docxtpl import DocxTemplate
+
+from app.utils.constants import CONTRACT_CACHE_SIZE, CONTRACT_PDF_TIMEOUT_SECONDS
+
+CONTRACT_TEMPLATE_PATH = (
+    Path(__file__).resolve().parent.parent / "templates" / "Adoption_Contract_Template.docx"
+)
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def build_contract_context(adoption_details) -> Dict[str, Any]:
+    """Data to pass in the contract document"""
+    pet = adoption_details.adoption_pet.pet
+    adopter = adoption_details.adopter
+    return {
+        "pet_breed": pet.breed,
+        "pet_color": pet.color,
+        "pet_gender": pet.gender,
+        "pet_type": pet.type,
+        "pet_name": pet.name,
+        "adopter": adopter.full_name,
+        "contact_no": adopter.contact,
+        "address": f"{adopter.home_street} {adopter.city}",
+        "date": f"{datetime.now().strftime('%B, %d %Y')}",
+    }
+
+
+def contract_filename(context: Dict[str, Any], extension: str = "docx") -> str:
+    """
+    Download name of a contract. Only letters, digits, _ and - of the adopter
+    name are kept, it is never used as a path on disk.
+    """
+    adopter = re.sub(r"[^A-Za-z0-9_-]", "", (context.get("adopter") or "").replace(" ", "_")) or "adopter"
+    return f"{adopter}_adoption_contract_document.{extension}"
+
+
+def content_disposition(filename: str) -> str:
+    """Attachment header value, RFC 5987 encoded when the name isn't plain ascii."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+class ContractRenderer(object):
+    """
+    Render adoption contracts from a template parsed once per process.
+
+    Every render works on a deep copy of the parsed document tree, and the
+    resulting bytes can be cached (LRU) under a hash of the rendered context,
+    so downloading the same contract again is free and any change to the
+    adoption, the pet, the adopter or the date renders a new one.
+    """
+
+    def __init__(self, template_path: Path = CONTRACT_TEMPLATE_PATH, cache_size: int = CONTRACT_CACHE_SIZE) -> None:
+        self.template_path = template_path
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._template_bytes: Optional[bytes] = None
+        self._docx = None
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._docx is None:
+                self._template_bytes = self.template_path.read_bytes()
+                template = DocxTemplate(io.BytesIO(self._template_bytes))
+                template.init_docx()
+                self._docx = template.docx
+
+    def render(self, context: Dict[str, Any]) -> bytes:
+        if self._docx is None:
+            self._load()
+
+        template = DocxTemplate(io.BytesIO(self._template_bytes))
+        template.docx = copy.deepcopy(self._docx)
+        template.render(context)
+
+        output = io.BytesIO()
+        template.save(output)
+        return output.getvalue()
+
+    def render_cached(self, context: Dict[str, Any]) -> bytes:
+        key = hashlib.sha256(json.dumps(context, sort_keys=True, default=str).encode()).hexdigest()
+        with self._lock:
+            content = self._cache.get(key)
+            if content is not None:
+                self._cache.move_to_end(key)
+                return content
+
+        content = self.render(context)
+
+        with self._lock:
+            self._cache[key] = content
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        return content
+
+
+contract_renderer = ContractRenderer()
+
+
+def convert_to_pdf(docx_path: Path, converter: str) -> Path:
+    """
+    Convert a docx file to pdf next to it with a headless LibreOffice.
+
+    Every process gets its own LibreOffice profile, concurrent instances
+    sharing one profile lock each other out.
+    """
+    profile = Path(tempfile.gettempdir()) / f"contract_soffice_profile_{os.getpid()}"
+    subprocess.run(
+        [
+            converter,
+            f"-env:UserInstallation={profile.as_uri()}",
+            "--headless",
+            "--convert-to",
+            "pdf",
+            "--outdir",
+            str(docx_path.parent),
+            str(docx_path),
+        ],
+        check=True,
+        capture_output=True,
+        timeout=CONTRACT_PDF_TIMEOUT_SECONDS,
+    )
+
+    pdf_path = docx_path.with_suffix(".pdf")
+    if not pdf_path.exists():
+        raise RuntimeError(f"{converter} did not produce {pdf_path.name}")
+    docx_path.unlink()
+    return pdf_path
+
+
+def render_contract_file(
+    context: Dict[str, Any], output_path: str, pdf_converter: Optional[str] = None
+) -> str:
+    """
+    Render one contract to output_path (a .docx path), converting it to pdf
+    when a converter is given. Runs in the contract job worker processes,
+    each of them parsing the template once through its own renderer.
+    """
+    docx_path = Path(output_path)
+    docx_path.write_bytes(contract_renderer.render(context))
+    if pdf_converter:
+        return str(convert_to_pdf(docx_path, pdf_converter))
+    return str(docx_path)
@@ -0,0 +1,210 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.constants import (
+    CONTRACT_JOB_TTL_SECONDS,
+    CONTRACT_JOB_WORKERS,
+    CONTRACT_PDF_CONVERTER,
+)
+from app.utils.contract import render_contract_file
+
+ZIP_CHUNK_SIZE = 64 * 1024
+
+
+class ContractJobStatus(object):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+def pdf_converter_path() -> Optional[str]:
+    """Full path of the local pdf converter or None if it isn't installed."""
+    return shutil.which(CONTRACT_PDF_CONVERTER)
+
+
+class _ZipStream(object):
+    """Write-only file object whose written bytes are drained by the zip generator."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ContractJob(object):
+    def __init__(self, adoption_ids: List[int], file_format: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.adoption_ids = adoption_ids
+        self.format = file_format
+        self.status = ContractJobStatus.QUEUED
+        self.completed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.files: Dict[int, str] = {}
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.directory = Path(tempfile.mkdtemp(prefix=f"contract_job_{self.id}_"))
+        self._expires_at = time.monotonic() + CONTRACT_JOB_TTL_SECONDS
+
+    @property
+    def total(self) -> int:
+        return len(self.adoption_ids)
+
+    @property
+    def failed(self) -> int:
+        return len(self.errors)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (ContractJobStatus.COMPLETED, ContractJobStatus.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "format": self.format,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "errors": list(self.errors),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+    def iter_zip(self) -> Iterator[bytes]:
+        """Stream the rendered contracts as a zip archive without building it in memory."""
+        stream = _ZipStream()
+        # docx files are zip archives already, deflating them again gains nothing
+        compression = zipfile.ZIP_DEFLATED if self.format == "pdf" else zipfile.ZIP_STORED
+        with zipfile.ZipFile(stream, mode="w", compression=compression) as archive:
+            for adoption_id in sorted(self.files):
+                path = Path(self.files[adoption_id])
+                with open(path, "rb") as source, archive.open(path.name, mode="w") as target:
+                    while True:
+                        chunk = source.read(ZIP_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        target.write(chunk)
+                        data = stream.drain()
+                        if data:
+                            yield data
+        # the central directory is written when the archive closes
+        data = stream.drain()
+        if data:
+            yield data
+
+
+class ContractJobManager(object):
+    """
+    Render batches of contracts in a pool of worker processes.
+
+    Jobs live in this process: their progress is updated as the worker
+    futures complete, the rendered files are kept in a per job temporary
+    directory and everything is removed once the job expires.
+    """
+
+    def __init__(self, max_workers: int = CONTRACT_JOB_WORKERS) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, ContractJob] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # a worker killed mid-render breaks the whole pool, start a new one
+        if self._executor is None or getattr(self._executor, "_broken", False):
+            # spawn: forking a server process that already runs threads isn't safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                job for job in self._jobs.values()
+                if job.is_finished and job._expires_at < now
+            ]
+            for job in expired:
+                del self._jobs[job.id]
+
+        for job in expired:
+            shutil.rmtree(job.directory, ignore_errors=True)
+
+    def submit(
+        self, contracts: List[Tuple[int, Dict[str, Any]]], file_format: str = "docx"
+    ) -> ContractJob:
+        """Queue (adoption_id, contract context) pairs for rendering."""
+        self._purge_expired()
+
+        converter = pdf_converter_path() if file_format == "pdf" else None
+        job = ContractJob([adoption_id for adoption_id, _ in contracts], file_format)
+        with self._lock:
+            self._jobs[job.id] = job
+            executor = self._get_executor()
+            job.status = ContractJobStatus.RUNNING
+
+        for adoption_id, context in contracts:
+            # named by the id alone, the adopter name has no business in a path
+            output_path = job.directory / f"{adoption_id}.docx"
+            future = executor.submit(render_contract_file, context, str(output_path), converter)
+            future.add_done_callback(
+                lambda done, adoption_id=adoption_id: self._on_done(job, adoption_id, done)
+            )
+
+        return job
+
+    def _on_done(self, job: ContractJob, adoption_id: int, future: Future) -> None:
+        with self._lock:
+            try:
+                job.files[adoption_id] = future.result()
+                job.completed += 1
+            except Exception as e:
+                logging.error(f"Contract job {job.id} failed for adoption {adoption_id}: {e}")
+                job.errors.append({"adoption_id": adoption_id, "error": str(e)})
+
+            if job.completed + job.failed == job.total:
+                job.status = (
+                    ContractJobStatus.COMPLETED if job.completed else ContractJobStatus.FAILED
+                )
+                job.finished_at = datetime.now()
+                job._expires_at = time.monotonic() + CONTRACT_JOB_TTL_SECONDS
+
+    def get(self, job_id: str) -> Optional[ContractJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            jobs, self._jobs = list(self._jobs.values()), {}
+
+        if executor is not None:
+            executor.shutdown(wait=False)
+        for job in jobs:
+            shutil.rmtree(job.directory, ignore_errors=True)
+
+
+contract_job_manager = ContractJobManager()
@@ -0,0 +1,48 @@
+"""
+Per process cache of list totals by filter.
+
+Counting the rows matching a filter reads every one of them, so on a large
+table the total costs far more than the page it comes with. The total of a
+filter is reused for ttl_seconds instead, and writes to the counted table
+call invalidate, which drops every total of the process. Totals of other
+processes lag by up to ttl_seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Tuple
+
+
+class CountCache(object):
+    """LRU of (total, expires_at) by filter key."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[int, float]]" = OrderedDict()
+        # bumped by invalidate, a count started before is not stored
+        self._generation = 0
+
+    def get_or_count(self, key: Hashable, count: Callable[[], int]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[0]
+            generation = self._generation
+
+        total = count()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (total, now + self.ttl_seconds)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return total
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
@@ -0,0 +1,38 @@
+import logging
+from collections import defaultdict, namedtuple
+from typing import Callable, Dict, List
+
+# Emitted once an adoption status change is committed. adoption is the
+# AdoptionInDB of the updated request, fully loaded, so handlers never query.
+AdoptionStatusChanged = namedtuple(
+    "AdoptionStatusChanged", ["adoption", "previous_status"]
+)
+
+# Emitted by writes once committed, tags names the cached responses the
+# change makes stale (see app/utils/response_cache.py).
+ResponseCacheInvalidated = namedtuple("ResponseCacheInvalidated", ["tags"])
+
+
+class EventBus(object):
+    """
+    In-process dispatch of domain events to the handlers registered for
+    their type. Handlers run synchronously after the change is committed, a
+    failing handler is logged and never undoes the change or the response.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: Dict[type, List[Callable]] = defaultdict(list)
+
+    def register(self, event_type: type, handler: Callable) -> None:
+        if handler not in self._handlers[event_type]:
+            self._handlers[event_type].append(handler)
+
+    def emit(self, event) -> None:
+        for handler in self._handlers.get(type(event), []):
+            try:
+                handler(event)
+            except Exception as e:
+                logging.error(f"Event handler {handler.__name__} failed for {type(event).__name__}: {e}")
+
+
+event_bus = EventBus()
@@ -0,0 +1,61 @@
+"""
+Feed score of adoption pets.
+
+The feed ranks pets by a weight that halves every FEED_HALF_LIFE_HOURS:
+a new listing is worth 1 (1 + FEED_MEDIA_BONUS with media) and every view
+FEED_VIEW_WEIGHT, both decaying from the moment they happened. Instead of
+decaying every pet over time, each contribution is stored grown by
+exp(t / tau) from a fixed epoch, which scales every pet by the same factor
+and so leaves the order unchanged. A score therefore only changes when
+the pet gets views or is edited. Scores are kept as logarithms so they
+never overflow.
+"""
+
+import math
+from datetime import datetime
+from typing import Optional
+
+from app.utils.constants import FEED_HALF_LIFE_HOURS, FEED_MEDIA_BONUS, FEED_VIEW_WEIGHT
+
+
+FEED_EPOCH = datetime(2024, 1, 1)
+TAU_HOURS = FEED_HALF_LIFE_HOURS / math.log(2)
+
+
+def _growth(at: datetime) -> float:
+    if at.tzinfo is not None:
+        at = at.replace(tzinfo=None)
+    return (at - FEED_EPOCH).total_seconds() / 3600.0 / TAU_HOURS
+
+
+def log_add(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    """log(exp(a) + exp(b)), None standing for log(0)."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def has_media(media) -> bool:
+    return bool(media)
+
+
+def base_score(created_at: datetime, media) -> float:
+    """Score of the listing itself."""
+    weight = 1.0 + (FEED_MEDIA_BONUS if has_media(media) else 0.0)
+    return math.log(weight) + _growth(created_at)
+
+
+def add_views(view_score: Optional[float], count: int, at: datetime) -> Optional[float]:
+    """Add count views seen at `at` to the view part of a score."""
+    if count <= 0:
+        return view_score
+    return log_add(view_score, math.log(FEED_VIEW_WEIGHT * count) + _growth(at))
+
+
+def feed_score(created_at: Optional[datetime], media, view_score: Optional[float]) -> Optional[float]:
+    if created_at is None:
+        return view_score
+    return log_add(base_score(created_at, media), view_score)
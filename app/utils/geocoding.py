@@ -0,0 +1,100 @@
+import math
+import re
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+_PREFIXES = re.compile(r"\b(brgy|bgy|barangay|barrio)\b")
+
+
+def normalize_place(text: Optional[str]) -> str:
+    """Lowercase a place name and reduce it to space separated words."""
+    text = _PREFIXES.sub(" ", (text or "").lower())
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def bounding_box(
+    latitude: float, longitude: float, radius_km: float
+) -> Tuple[float, float, float, float]:
+    """Return (min_lat, max_lat, min_lon, max_lon) enclosing a radius around a point."""
+    lat_delta = radius_km / KM_PER_DEGREE
+    lon_delta = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+    return (
+        latitude - lat_delta,
+        latitude + lat_delta,
+        longitude - lon_delta,
+        longitude + lon_delta,
+    )
+
+
+def bounding_box_filter(lat_column, lon_column, min_lat, max_lat, min_lon, max_lon):
+    """SQL range filter on a (lat, lon) pair, served by the composite coordinate index."""
+    return and_(
+        lat_column.between(min_lat, max_lat),
+        lon_column.between(min_lon, max_lon),
+    )
+
+
+def radius_filter(lat_column, lon_column, latitude: float, longitude: float, radius_km: float):
+    """
+    SQL filter for rows within radius_km of a point.
+
+    The bounding box narrows the scan through the coordinate index and the
+    equirectangular distance (accurate to well under 1% at city scale)
+    trims the corners, using only arithmetic every backend supports.
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    lon_scale = math.cos(math.radians(latitude))
+    d_lat = lat_column - latitude
+    d_lon = (lon_column - longitude) * lon_scale
+    return and_(
+        bounding_box_filter(lat_column, lon_column, min_lat, max_lat, min_lon, max_lon),
+        d_lat * d_lat + d_lon * d_lon <= (radius_km / KM_PER_DEGREE) ** 2,
+    )
+
+
+class Gazetteer(object):
+    """
+    In-process lookup of known places by name.
+
+    A free-text location resolves to the longest known place name it
+    contains as whole words, barangays winning over the city they are in.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._places: Optional[List[Tuple[str, bool, float, float]]] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._places is not None
+
+    def load(self, places: Iterable[Tuple[str, str, Optional[str], float, float]]) -> None:
+        """Load (normalized_name, name, city, latitude, longitude) rows."""
+        entries = []
+        for normalized_name, name, city, latitude, longitude in places:
+            is_city = normalize_place(city) == normalized_name
+            entries.append((normalized_name, is_city, latitude, longitude))
+        # barangays first, then longest names first
+        entries.sort(key=lambda entry: (entry[1], -len(entry[0])))
+
+        with self._lock:
+            self._places = entries
+
+    def geocode(self, text: Optional[str]) -> Optional[Tuple[float, float]]:
+        haystack = f" {normalize_place(text)} "
+        if not haystack.strip() or not self._places:
+            return None
+
+        for normalized_name, _, latitude, longitude in self._places:
+            if f" {normalized_name} " in haystack:
+                return latitude, longitude
+
+        return None
+
+
+gazetteer = Gazetteer()
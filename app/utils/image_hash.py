@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from app.utils.constants import LOST_PET_INDEX_TTL_SECONDS
+
+# app/ directory, uploads are served from app/static
+APP_DIR = Path(__file__).resolve().parent.parent
+
+HASH_SIZE = 8
+
+
+def image_path_from_url(image_url: str) -> Path:
+    """
+    Map a public image url (e.g. /static/uploads/pets/...) to the file on disk.
+    """
+    return APP_DIR / image_url.lstrip("/")
+
+
+def compute_image_hash(image_path) -> Optional[str]:
+    """
+    Compute the 64-bit difference hash (dHash) of an image.
+
+    The image is shrunk to a 9x8 grayscale thumbnail and every bit records
+    whether a pixel is brighter than its right neighbour, so resized or
+    re-encoded copies of the same photo land within a few bits of each other.
+    Returns the hash as a 16 character hex string or None if the file can't be read.
+    """
+    try:
+        with Image.open(image_path) as image:
+            thumbnail = image.convert("L").resize(
+                (HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS
+            )
+            pixels = list(thumbnail.getdata())
+    except (OSError, ValueError) as e:
+        logging.warning(f"Failed to hash image {image_path}: {e}")
+        return None
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | int(pixels[offset + col] > pixels[offset + col + 1])
+
+    return f"{value:016x}"
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class BKTree(object):
+    """
+    Burkhard-Keller tree over integer hashes using the Hamming distance.
+
+    Every node keeps the ids sharing its hash and its children keyed by their
+    distance to the node, so a radius search only descends into children whose
+    edge lies within [d - radius, d + radius] (triangle inequality).
+    """
+
+    def __init__(self) -> None:
+        self._root = None
+        self.size = 0
+
+    def add(self, value: int, item_id: int) -> None:
+        self.size += 1
+        if self._root is None:
+            self._root = (value, [item_id], {})
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                node[1].append(item_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item_id], {})
+                return
+            node = child
+
+    def search(self, value: int, radius: int) -> List[Tuple[int, int, int]]:
+        """Return (distance, hash, item_id) for every item within radius."""
+        if self._root is None:
+            return []
+
+        results = []
+        stack = [self._root]
+        while stack:
+            node_value, item_ids, children = stack.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= radius:
+                results.extend((distance, node_value, item_id) for item_id in item_ids)
+            low, high = distance - radius, distance + radius
+            for edge, child in children.items():
+                if low <= edge <= high:
+                    stack.append(child)
+
+        return results
+
+
+class LostPetImageIndex(object):
+    """
+    In-process BK-tree of the image hashes of open lost pet cases.
+
+    The index is rebuilt from the database when it is older than its ttl so
+    status changes made by other workers are eventually picked up, and kept
+    current in between through add/discard.
+    """
+
+    def __init__(self, ttl_seconds: int = LOST_PET_INDEX_TTL_SECONDS) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._tree = BKTree()
+        self._hashes: Dict[int, int] = {}
+        self._loaded_at: Optional[float] = None
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or (
+            time.monotonic() - self._loaded_at > self.ttl_seconds
+        )
+
+    def load(self, rows: Iterable[Tuple[int, str]]) -> None:
+        """Rebuild the index from (lost_pet_id, image_hash) rows."""
+        hashes = {lost_pet_id: int(image_hash, 16) for lost_pet_id, image_hash in rows}
+        tree = BKTree()
+        for lost_pet_id, value in hashes.items():
+            tree.add(value, lost_pet_id)
+
+        with self._lock:
+            self._tree = tree
+            self._hashes = hashes
+            self._loaded_at = time.monotonic()
+
+    def add(self, lost_pet_id: int, image_hash: Optional[str]) -> None:
+        if not image_hash:
+            self.discard(lost_pet_id)
+            return
+
+        value = int(image_hash, 16)
+        with self._lock:
+            if self._hashes.get(lost_pet_id) == value:
+                return
+            self._hashes[lost_pet_id] = value
+            self._tree.add(value, lost_pet_id)
+
+    def discard(self, lost_pet_id: int) -> None:
+        with self._lock:
+            self._hashes.pop(lost_pet_id, None)
+            # removed entries stay in the tree as tombstones, rebuild once they dominate
+            if self._tree.size > 2 * len(self._hashes) + 64:
+                tree = BKTree()
+                for item_id, value in self._hashes.items():
+                    tree.add(value, item_id)
+                self._tree = tree
+
+    def search(
+        self, image_hash: str, max_distance: int, limit: int
+    ) -> List[Tuple[int, int]]:
+        """Return up to limit (lost_pet_id, distance) pairs, closest first."""
+        value = int(image_hash, 16)
+        with self._lock:
+            matches = {
+                item_id: distance
+                for distance, node_value, item_id in self._tree.search(value, max_distance)
+                if self._hashes.get(item_id) == node_value
+            }
+
+        ranked = sorted(matches.items(), key=lambda match: (match[1], match[0]))
+        return ranked[:limit]
+
+
+lost_pet_image_index = LostPetImageIndex()
@@ -0,0 +1,240 @@
+"""
+Per request database and latency instrumentation.
+
+The engine hooks attribute every SQL statement, the rows it returned or
+changed and its time to the request being served, found through a
+contextvar (FastAPI copies the context into the threadpool running sync
+routes and dependencies). The middleware turns the totals into a
+Server-Timing header and into per route histograms exposed in the
+Prometheus text format on /metrics. Metrics are per process. Statements
+above the slow query threshold also go to the slow query log.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from app.utils.slow_queries import slow_query_log
+
+# upper bounds of the histogram buckets, +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# paths that are not instrumented
+EXCLUDED_PATHS = {"/metrics", "/health"}
+
+
+class RequestStats(object):
+    """Database work done while serving one request."""
+
+    __slots__ = ("scope", "statements", "rows", "db_seconds")
+
+    def __init__(self, scope=None) -> None:
+        self.scope = scope
+        self.statements = 0
+        self.rows = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: "ContextVar[Optional[RequestStats]]" = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started_at"].pop()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.rows += max(cursor.rowcount, 0)
+        stats.db_seconds += elapsed
+    if elapsed >= slow_query_log.threshold_seconds:
+        route = route_label(stats.scope) if stats is not None and stats.scope is not None else None
+        slow_query_log.record(conn, statement, parameters, executemany, elapsed, route=route)
+
+
+def instrument_engine(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+_INF_BUCKET = 'le="+Inf"'
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+class Histogram(object):
+    """Prometheus style histogram with a fixed label set."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> ([count per bucket, +Inf last], sum)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Sequence[str], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(tuple(labels), ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total[0]) for labels, (counts, total) in sorted(self._series.items())]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_bound(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, _INF_BUCKET)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Counter(object):
+    """Prometheus style counter with a fixed label set."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Sequence[str], amount: float = 1) -> None:
+        with self._lock:
+            self._series[tuple(labels)] = self._series.get(tuple(labels), 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, value in series:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request.",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in SQL statements per request.",
+    ("method", "route"),
+    LATENCY_BUCKETS,
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "SQL statements run per request.",
+    ("method", "route"),
+    STATEMENT_BUCKETS,
+)
+REQUEST_DB_ROWS = Counter(
+    "http_request_db_rows_total",
+    "Rows returned or changed by the SQL statements of requests.",
+    ("method", "route"),
+)
+
+METRICS = (REQUEST_DURATION, REQUEST_DB_DURATION, REQUEST_DB_STATEMENTS, REQUEST_DB_ROWS)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def route_label(scope) -> str:
+    """Path template of the matched route, so labels don't grow with ids."""
+    route = scope.get("route")
+    if route is None and "app" in scope:
+        # answered before routing, e.g. from the response cache
+        for candidate in scope["app"].router.routes:
+            if candidate.matches(scope)[0] == Match.FULL:
+                route = candidate
+                break
+    path = getattr(route, "path", None)
+    return path or "unmatched"
+
+
+class InstrumentationMiddleware(object):
+    """
+    ASGI middleware timing each request with its database work, adding
+    Server-Timing (db and app durations) to the response and recording the
+    route histograms once the response is complete.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        started_at = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                app_ms = (time.perf_counter() - started_at) * 1000
+                server_timing = (
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.statements} queries", '
+                    f"app;dur={app_ms:.1f}"
+                )
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", server_timing.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            method, route = scope["method"], route_label(scope)
+            REQUEST_DURATION.observe((method, route, str(status_code)), time.perf_counter() - started_at)
+            REQUEST_DB_DURATION.observe((method, route), stats.db_seconds)
+            REQUEST_DB_STATEMENTS.observe((method, route), stats.statements)
+            REQUEST_DB_ROWS.inc((method, route), stats.rows)
@@ -0,0 +1,298 @@
+import enum
+import re
+import threading
+import time
+import zlib
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.constants import LOST_PET_INDEX_TTL_SECONDS
+from app.utils.geocoding import KM_PER_DEGREE
+
+# Attributes of the pet seen in a sighting report
+MatchQuery = namedtuple(
+    "MatchQuery",
+    ["type", "breed", "color", "size", "gender", "seen_at", "location", "latitude", "longitude"],
+    defaults=(None, None),
+)
+
+# Row of an open lost pet case as loaded from the database
+LostPetCase = namedtuple(
+    "LostPetCase",
+    [
+        "id", "type", "breed", "color", "size", "gender",
+        "last_seen_date", "last_seen_location", "last_seen_latitude", "last_seen_longitude",
+    ],
+    defaults=(None, None),
+)
+
+ATTRIBUTE_WEIGHTS = {
+    "breed": 0.20,
+    "color": 0.20,
+    "size": 0.10,
+    "gender": 0.10,
+    "date": 0.20,
+    "location": 0.20,
+}
+
+# sightings are compared against cases with this decay (days) on the last seen date
+DATE_DECAY_DAYS = 14.0
+
+# and this decay (km) on the distance when both sides have coordinates
+LOCATION_DECAY_KM = 2.0
+
+LOCATION_STOPWORDS = {
+    "brgy", "barangay", "st", "street", "ave", "avenue", "rd", "road",
+    "city", "qc", "quezon", "near", "the", "of", "in", "at", "and",
+}
+
+_EPOCH = datetime(1970, 1, 1)
+_POPCOUNT_8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _normalize(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, enum.Enum):
+        value = value.value
+    value = str(value).strip().lower()
+    return value or None
+
+
+def _coordinate(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+def _to_epoch(value: Optional[datetime]) -> float:
+    if value is None:
+        return np.nan
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH).total_seconds()
+
+
+def location_mask(text: Optional[str]) -> int:
+    """
+    Hash the words of a free-text location into a 64-bit set, so the token
+    overlap of two locations is popcount(a & b) / popcount(a | b).
+    """
+    mask = 0
+    for token in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        if token in LOCATION_STOPWORDS or len(token) < 2:
+            continue
+        mask |= 1 << (zlib.crc32(token.encode()) & 63)
+    return mask
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    """Per element popcount of an uint64 array."""
+    counts = _POPCOUNT_8[values.view(np.uint8)]
+    return counts.reshape(values.shape + (8,)).sum(axis=-1, dtype=np.int32)
+
+
+class CategoryEncoder(object):
+    """Map category labels to small integer codes, 0 meaning unknown."""
+
+    def __init__(self) -> None:
+        self._codes: Dict[str, int] = {}
+
+    def encode(self, value) -> int:
+        value = _normalize(value)
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._codes) + 1
+        return code
+
+    def lookup(self, value) -> int:
+        """Like encode but never grows the vocabulary (unseen labels match nothing)."""
+        value = _normalize(value)
+        if value is None:
+            return 0
+        return self._codes.get(value, -1)
+
+
+class LostPetMatcher(object):
+    """
+    Columnar snapshot of the open lost pet cases scored with NumPy.
+
+    Every case occupies a slot in a set of parallel arrays (category codes,
+    last seen timestamp, location token mask, coordinates), so ranking a
+    sighting against all open cases is a handful of vectorized operations
+    instead of a Python loop. Cases are upserted/removed incrementally and the snapshot is
+    rebuilt from the database when it is older than its ttl.
+    """
+
+    CATEGORIES = ("type", "breed", "color", "size", "gender")
+
+    def __init__(self, ttl_seconds: int = LOST_PET_INDEX_TTL_SECONDS) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._encoders = {name: CategoryEncoder() for name in self.CATEGORIES}
+        self._loaded_at: Optional[float] = None
+        self._reset(capacity=0)
+
+    def _reset(self, capacity: int) -> None:
+        self._slots: Dict[int, int] = {}
+        self._size = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.codes = {name: np.zeros(capacity, dtype=np.int32) for name in self.CATEGORIES}
+        self.last_seen = np.full(capacity, np.nan, dtype=np.float64)
+        self.locations = np.zeros(capacity, dtype=np.uint64)
+        self.latitudes = np.full(capacity, np.nan, dtype=np.float64)
+        self.longitudes = np.full(capacity, np.nan, dtype=np.float64)
+
+    def _grow(self, capacity: int) -> None:
+        def resize(array, fill):
+            grown = np.full(capacity, fill, dtype=array.dtype)
+            grown[: len(array)] = array
+            return grown
+
+        self.ids = resize(self.ids, 0)
+        self.active = resize(self.active, False)
+        self.codes = {name: resize(array, 0) for name, array in self.codes.items()}
+        self.last_seen = resize(self.last_seen, np.nan)
+        self.locations = resize(self.locations, 0)
+        self.latitudes = resize(self.latitudes, np.nan)
+        self.longitudes = resize(self.longitudes, np.nan)
+
+    def _write(self, slot: int, case: LostPetCase) -> None:
+        self.ids[slot] = case.id
+        self.active[slot] = True
+        for name in self.CATEGORIES:
+            self.codes[name][slot] = self._encoders[name].encode(getattr(case, name))
+        self.last_seen[slot] = _to_epoch(case.last_seen_date)
+        self.locations[slot] = location_mask(case.last_seen_location)
+        self.latitudes[slot] = _coordinate(case.last_seen_latitude)
+        self.longitudes[slot] = _coordinate(case.last_seen_longitude)
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or (
+            time.monotonic() - self._loaded_at > self.ttl_seconds
+        )
+
+    def load(self, cases: Iterable[LostPetCase]) -> None:
+        """Rebuild the snapshot from scratch."""
+        cases = list(cases)
+        with self._lock:
+            self._reset(capacity=max(len(cases), 16))
+            for slot, case in enumerate(cases):
+                self._write(slot, case)
+                self._slots[case.id] = slot
+            self._size = len(cases)
+            self._loaded_at = time.monotonic()
+
+    def upsert(self, case: LostPetCase) -> None:
+        with self._lock:
+            slot = self._slots.get(case.id)
+            if slot is None:
+                if self._size == len(self.ids):
+                    self._grow(max(16, 2 * len(self.ids)))
+                slot = self._size
+                self._size += 1
+                self._slots[case.id] = slot
+            self._write(slot, case)
+
+    def remove(self, lost_pet_id: int) -> None:
+        with self._lock:
+            slot = self._slots.pop(lost_pet_id, None)
+            if slot is not None:
+                self.active[slot] = False
+
+            # compact once removed slots make up most of the snapshot
+            if self._size > 64 and len(self._slots) < self._size // 2:
+                keep = np.flatnonzero(self.active[: self._size])
+                self.ids = self.ids[keep]
+                self.active = self.active[keep]
+                self.codes = {name: array[keep] for name, array in self.codes.items()}
+                self.last_seen = self.last_seen[keep]
+                self.locations = self.locations[keep]
+                self.latitudes = self.latitudes[keep]
+                self.longitudes = self.longitudes[keep]
+                self._size = len(keep)
+                self._slots = {int(case_id): slot for slot, case_id in enumerate(self.ids)}
+
+    def score_many(self, queries: Sequence[MatchQuery]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every query against every open case in one pass.
+
+        Returns (ids, scores) where scores has shape (len(queries), len(ids))
+        and lies in [0, 1]. Unknown attributes on either side earn half credit,
+        a pet type mismatch zeroes the score.
+        """
+        with self._lock:
+            live = np.flatnonzero(self.active[: self._size])
+            ids = self.ids[live]
+            codes = {name: array[live] for name, array in self.codes.items()}
+            last_seen = self.last_seen[live]
+            locations = self.locations[live]
+            latitudes = self.latitudes[live]
+            longitudes = self.longitudes[live]
+            query_codes = {
+                name: np.array(
+                    [self._encoders[name].lookup(getattr(q, name)) for q in queries],
+                    dtype=np.int32,
+                )[:, None]
+                for name in self.CATEGORIES
+            }
+
+        def category_score(name):
+            case_codes = codes[name][None, :]
+            wanted = query_codes[name]
+            unknown = (case_codes == 0) | (wanted == 0)
+            return np.where(unknown, 0.5, (case_codes == wanted).astype(np.float64))
+
+        scores = np.zeros((len(queries), len(ids)), dtype=np.float64)
+        for name in ("breed", "color", "size", "gender"):
+            scores += ATTRIBUTE_WEIGHTS[name] * category_score(name)
+
+        # days between the case going missing and the sighting, sightings
+        # from before the pet was lost (more than a day earlier) score nothing
+        seen_at = np.array([_to_epoch(q.seen_at) for q in queries], dtype=np.float64)[:, None]
+        days = (seen_at - last_seen[None, :]) / 86400.0
+        date_score = np.where(days >= -1.0, np.exp(-np.clip(days, 0, None) / DATE_DECAY_DAYS), 0.0)
+        scores += ATTRIBUTE_WEIGHTS["date"] * np.nan_to_num(date_score, nan=0.5)
+
+        # location: distance decay when both sides are geocoded, word overlap otherwise
+        query_locations = np.array([location_mask(q.location) for q in queries], dtype=np.uint64)[:, None]
+        shared = _popcount(query_locations & locations[None, :])
+        union = _popcount(query_locations | locations[None, :])
+        location_score = np.divide(
+            shared, union, out=np.zeros(shared.shape, dtype=np.float64), where=union > 0
+        )
+
+        query_lat = np.array([_coordinate(q.latitude) for q in queries], dtype=np.float64)[:, None]
+        query_lon = np.array([_coordinate(q.longitude) for q in queries], dtype=np.float64)[:, None]
+        d_lat = query_lat - latitudes[None, :]
+        d_lon = (query_lon - longitudes[None, :]) * np.cos(np.radians(query_lat))
+        distance_km = KM_PER_DEGREE * np.sqrt(d_lat * d_lat + d_lon * d_lon)
+        location_score = np.where(
+            np.isnan(distance_km), location_score, np.exp(-distance_km / LOCATION_DECAY_KM)
+        )
+        scores += ATTRIBUTE_WEIGHTS["location"] * location_score
+
+        type_score = category_score("type")
+        scores *= np.where(type_score == 0.0, 0.0, 1.0)
+
+        return ids, scores
+
+    def top_k(
+        self, ids: np.ndarray, scores: np.ndarray, limit: int, min_score: float = 0.0
+    ) -> List[Tuple[int, float]]:
+        """Return the limit best (lost_pet_id, score) pairs of one score row."""
+        if len(ids) == 0:
+            return []
+        limit = min(limit, len(ids))
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [
+            (int(ids[i]), float(scores[i])) for i in best if scores[i] > min_score
+        ]
+
+
+lost_pet_matcher = LostPetMatcher()
@@ -0,0 +1,34 @@
+import json
+import logging
+
+from app.utils.events import AdoptionStatusChanged, EventBus, event_bus
+from app.utils.redis import RedisHelper
+
+NOTIFICATION_QUEUE = "qc_pet_adoption:notifications"
+
+redis = RedisHelper()
+
+
+def notify_adoption_screening(event: AdoptionStatusChanged) -> None:
+    """Queue the screening schedule email for the adopter."""
+    adoption = event.adoption
+    if adoption.status != "screening":
+        return
+
+    formatted_schedule = adoption.schedule.strftime("%B %d %Y, %I:%M %p") if adoption.schedule else None
+
+    redis_data = {
+        "queue_type": "notification",
+        "pet_image_url": adoption.adoption_pet.pet.image_url,
+        "pet_name": adoption.adoption_pet.pet.name,
+        "found_in": adoption.adoption_pet.found_in,
+        "additional_details": adoption.adoption_pet.additional_details,
+        "schedule": formatted_schedule,
+        "email": adoption.adopter.email if adoption.adopter else None,
+    }
+    if not redis.add_to_redis_set(NOTIFICATION_QUEUE, json.dumps(redis_data)):
+        logging.warning(f"Failed to store in the queue {adoption.id} in redis")
+
+
+def register_notification_handlers(bus: EventBus = event_bus) -> None:
+    bus.register(AdoptionStatusChanged, notify_adoption_screening)
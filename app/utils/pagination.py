@@ -0,0 +1,46 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor of the sort key of the last row of a page."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, datetime_positions: Sequence[int] = ()) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list):
+            raise ValueError("cursor is not a list")
+        for position in datetime_positions:
+            if values[position] is not None:
+                values[position] = datetime.fromisoformat(values[position])
+        return values
+    except (binascii.Error, ValueError, IndexError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def keyset_after(columns: Sequence[Any], values: Sequence[Any], descending: Optional[Sequence[bool]] = None):
+    """
+    SQL filter for rows sorting after values on columns, i.e. the row
+    value comparison (a, b, c) > (x, y, z) spelled out as nested OR/AND,
+    which every backend can serve from an index on the same columns.
+    """
+    descending = descending or [False] * len(columns)
+    clause = None
+    for column, value, desc in reversed(list(zip(columns, values, descending))):
+        after = column < value if desc else column > value
+        clause = after if clause is None else or_(after, and_(column == value, clause))
+    return clause
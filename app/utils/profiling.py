@@ -0,0 +1,343 @@
+"""
+Opt-in sampling profiler of single requests.
+
+A request is profiled when its route is in the profiled routes, when it
+falls in the sample rate, or when it carries the X-Profile header with the
+token of a superuser. While at least one profiled request runs, a sampler
+thread reads the stack of every thread each PROFILING_INTERVAL_MS and
+gives it to the profile of the request the thread is working for: the
+profile is kept in a contextvar, read from the context the thread runs in,
+found on the frame of the asyncio handle or of the anyio worker (sync
+routes and dependencies) that entered it. Finished profiles go to a ring
+buffer of PROFILING_MAX_PROFILES and are exported in the speedscope or
+collapsed stack (flamegraph.pl) format. Settings and profiles are per
+process; with nothing to profile a request only costs a few checks.
+"""
+import asyncio
+import contextvars
+import itertools
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# the worker threads of anyio run the sync routes and dependencies
+from anyio._backends import _asyncio as anyio_asyncio
+from jose import jwt
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import SessionLocal
+from app.core.security import ALGORITHM
+from app.models.user import User
+from app.utils.constants import (
+    PROFILING_HEADER,
+    PROFILING_INTERVAL_MS,
+    PROFILING_MAX_PROFILES,
+    PROFILING_MAX_SAMPLES,
+    SECRET_KEY,
+)
+from app.utils.instrumentation import route_label
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (function, file, first line)
+FrameKey = Tuple[str, str, int]
+
+# frames entering a contextvars.Context: the code of the frame and how to read the context from its locals
+_DISPATCH_FRAMES = {
+    asyncio.events.Handle._run.__code__: lambda local: getattr(local.get("self"), "_context", None),
+    anyio_asyncio.WorkerThread.run.__code__: lambda local: local.get("context"),
+}
+_IDLE_CODE = queue.Queue.get.__code__
+
+
+class Profile(object):
+    """Stack samples of one request."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, method: str, path: str, trigger: str, interval_seconds: float) -> None:
+        self.id = next(self._ids)
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.trigger = trigger
+        self.interval_seconds = interval_seconds
+        self.started_at = datetime.utcnow()
+        self.duration_seconds = 0.0
+        self.status_code: Optional[int] = None
+        self.sample_count = 0
+        # stack -> samples, and the seconds they stand for
+        self.stacks: Counter = Counter()
+        self.seconds: Counter = Counter()
+        self.finished = False
+
+    def add(self, stack: Tuple[FrameKey, ...], seconds: float) -> None:
+        if self.sample_count < PROFILING_MAX_SAMPLES:
+            self.sample_count += 1
+            self.stacks[stack] += 1
+            self.seconds[stack] += seconds
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_seconds * 1000,
+            "status_code": self.status_code,
+            "samples": self.sample_count,
+        }
+
+    def collapsed(self) -> str:
+        """One "outer;...;inner count" line per distinct stack, for flamegraph.pl or speedscope."""
+        lines = [
+            ";".join(_frame_name(frame) for frame in stack) + f" {count}"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1])
+        ]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> Dict[str, Any]:
+        """The profile as a speedscope sampled profile, weights in milliseconds."""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[FrameKey, int] = {}
+        samples = []
+        weights = []
+        for stack, seconds in self.seconds.items():
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    name, filename, line = frame
+                    frames.append({"name": name, "file": _relative(filename), "line": line})
+            samples.append([index[frame] for frame in stack])
+            weights.append(seconds * 1000)
+        name = f"{self.method} {self.route or self.path} #{self.id}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "app.utils.profiling",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+@lru_cache(maxsize=4096)
+def _relative(filename: str) -> str:
+    """Path in the repository, or in the longest sys.path entry holding it."""
+    if filename.startswith(APP_ROOT + os.sep):
+        return os.path.relpath(filename, APP_ROOT)
+    roots = [path for path in sys.path if path and filename.startswith(path + os.sep)]
+    if roots:
+        return os.path.relpath(filename, max(roots, key=len))
+    return filename
+
+
+def _frame_name(frame: FrameKey) -> str:
+    name, filename, line = frame
+    return f"{name} ({_relative(filename)}:{line})"
+
+
+_active_profile: "contextvars.ContextVar[Optional[Profile]]" = contextvars.ContextVar("active_profile", default=None)
+
+
+def _request_stack(frame) -> Tuple[Optional[Profile], Tuple[FrameKey, ...]]:
+    """
+    Profile of the context the thread runs in and the stack above the frame
+    that entered that context, outermost first.
+    """
+    stack: List[FrameKey] = []
+    child = None
+    while frame is not None:
+        read_context = _DISPATCH_FRAMES.get(frame.f_code)
+        if read_context is not None:
+            if child is _IDLE_CODE:
+                # a worker waiting for work still holds the context of its last call
+                return None, ()
+            context = read_context(frame.f_locals)
+            if isinstance(context, contextvars.Context):
+                profile = context.get(_active_profile)
+                if profile is not None:
+                    stack.reverse()
+                    return profile, tuple(stack)
+            return None, ()
+        child = frame.f_code
+        stack.append((child.co_name, child.co_filename, child.co_firstlineno))
+        frame = frame.f_back
+    return None, ()
+
+
+class StackSampler(object):
+    """Thread sampling every thread while at least one profile is active."""
+
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self._lock = threading.Lock()
+        self._active = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._active += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def _run(self) -> None:
+        sampled_at = time.perf_counter()
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+            time.sleep(self.interval_seconds)
+            # weighted by the time since the last sample, longer than the interval when the GIL was busy
+            now = time.perf_counter()
+            self.sample(now - sampled_at)
+            sampled_at = now
+
+    @staticmethod
+    def sample(seconds: float) -> None:
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            profile, stack = _request_stack(frame)
+            if profile is not None and not profile.finished:
+                profile.add(stack, seconds)
+
+
+def _user_is_superuser(token: str) -> bool:
+    try:
+        user_id = int(jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["sub"])
+    except (jwt.JWTError, KeyError, ValueError):
+        return False
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        return bool(user and user.is_active and user.is_superuser)
+    finally:
+        db.close()
+
+
+class RequestProfiler(object):
+    """What to profile, the sampler and the ring buffer of finished profiles."""
+
+    def __init__(
+        self,
+        interval_ms: float = PROFILING_INTERVAL_MS,
+        max_profiles: int = PROFILING_MAX_PROFILES,
+        header: str = PROFILING_HEADER,
+    ) -> None:
+        self.sampler = StackSampler(interval_ms / 1000.0)
+        self.header = header.lower().encode("latin-1")
+        self.routes: FrozenSet[str] = frozenset()
+        self.sample_rate = 0.0
+        self._lock = threading.Lock()
+        self._profiles: Deque[Profile] = deque(maxlen=max_profiles)
+
+    def configure(self, routes: Iterable[str], sample_rate: float) -> None:
+        self.routes = frozenset(routes)
+        self.sample_rate = sample_rate
+
+    async def trigger(self, scope) -> Optional[str]:
+        """Why the request is profiled, None when it isn't."""
+        if self.routes and route_label(scope) in self.routes:
+            return "route"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        headers = dict(scope["headers"])
+        if self.header in headers:
+            scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and await run_in_threadpool(_user_is_superuser, token):
+                return "header"
+        return None
+
+    def start(self, scope, trigger: str) -> Tuple[Profile, contextvars.Token]:
+        profile = Profile(scope["method"], scope["path"], trigger, self.sampler.interval_seconds)
+        token = _active_profile.set(profile)
+        self.sampler.acquire()
+        return profile, token
+
+    def finish(self, profile: Profile, token: contextvars.Token, scope, duration_seconds: float) -> None:
+        self.sampler.release()
+        _active_profile.reset(token)
+        profile.finished = True
+        profile.duration_seconds = duration_seconds
+        profile.route = route_label(scope)
+        with self._lock:
+            self._profiles.append(profile)
+
+    def profiles(self) -> List[Profile]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+request_profiler = RequestProfiler()
+
+
+class ProfilingMiddleware(object):
+    """
+    ASGI middleware profiling the requests picked by the profiler, the id of
+    the profile is returned in the X-Profile-Id header.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler = request_profiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = await self.profiler.trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile, token = self.profiler.start(scope, trigger)
+        started_at = time.perf_counter()
+
+        async def send_with_profile_id(message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", str(profile.id).encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            self.profiler.finish(profile, token, scope, time.perf_counter() - started_at)
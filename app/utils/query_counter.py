@@ -0,0 +1,44 @@
+"""
+Count the SQL statements an engine runs, to pin the number of queries of
+an endpoint and catch N+1 regressions:
+
+    with assert_num_queries(engine, 5):
+        client.get("/v1/lost-pet-report/list")
+"""
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter(object):
+    """Statements executed on engine while active, executemany counts once."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.statements: List[str] = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+@contextmanager
+def assert_num_queries(engine: Engine, expected: int) -> Iterator[QueryCounter]:
+    """Fail when the block runs a number of statements other than expected."""
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count != expected:
+        statements = "\n".join(f"{i}. {statement}" for i, statement in enumerate(counter.statements, 1))
+        raise AssertionError(f"Expected {expected} queries, {counter.count} were run:\n{statements}")
@@ -1,23 +1,40 @@
+import threading
+from typing import Dict, Tuple
+
 import redis
 from app.utils.constants import REDIS_PASSWORD, REDIS_HOST
 from redis.exceptions import RedisError
 
+# one client, and so one connection pool, per (timeout, retry) setting of the process
+_clients: Dict[Tuple[float, bool], redis.Redis] = {}
+_clients_lock = threading.Lock()
+
+
+def _client(timeout_seconds: float, retry_on_timeout: bool) -> redis.Redis:
+    key = (timeout_seconds, retry_on_timeout)
+    with _clients_lock:
+        if key not in _clients:
+            # connects lazily, the pooled connections are reused by every call
+            _clients[key] = redis.Redis(
+                host=REDIS_HOST,
+                port=6379,
+                password=REDIS_PASSWORD,
+                decode_responses=True,
+                db=0,
+                socket_connect_timeout=timeout_seconds,
+                socket_timeout=timeout_seconds,
+                retry_on_timeout=retry_on_timeout,
+            )
+        return _clients[key]
+
 
 class RedisHelper(object):
-    def __init__(self) -> None:
-        pass
+    def __init__(self, timeout_seconds: float = 60, retry_on_timeout: bool = True) -> None:
+        # connect and read timeout of every command
+        self.client = _client(timeout_seconds, retry_on_timeout)
 
     def redis_connection(self, host=None):
-        return redis.Redis(
-            host=REDIS_HOST,
-            port=6379,
-            password=REDIS_PASSWORD,
-            decode_responses=True,
-            db=0,
-            socket_connect_timeout=60,
-            socket_timeout=60,
-            retry_on_timeout=True,
-        )
+        return self.client
 
     def redis_connection_pipeline(self):
         return self.redis_connection().pipeline()
@@ -30,3 +47,119 @@ class RedisHelper(object):
         except RedisError as e:
             print(f"Redis error: {e}")
             return False
+
+    def pop_from_redis_set(self, set_name: str, count: int = 1):
+        try:
+            r = self.redis_connection()
+            return r.spop(set_name, count) or []
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return []
+
+    def move_redis_set_members(self, set_name: str, destination: str, count: int = 1):
+        """SMOVE up to count members of set_name to destination, the members moved, [] if redis failed."""
+        try:
+            r = self.redis_connection()
+            members = r.srandmember(set_name, count) or []
+            if not members:
+                return []
+            return self._smove(r, set_name, destination, members)
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return []
+
+    def move_to_redis_set(self, set_name: str, destination: str, members: list):
+        """SMOVE the given members of set_name to destination, the members moved, [] if redis failed."""
+        if not members:
+            return []
+        try:
+            return self._smove(self.redis_connection(), set_name, destination, members)
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return []
+
+    @staticmethod
+    def _smove(r, set_name: str, destination: str, members: list):
+        pipe = r.pipeline()
+        for member in members:
+            pipe.smove(set_name, destination, member)
+        # a member another client moved first isn't ours
+        return [member for member, moved in zip(members, pipe.execute()) if moved]
+
+    def remove_from_redis_set(self, set_name: str, members: list):
+        try:
+            r = self.redis_connection()
+            r.srem(set_name, *members)
+            return True
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return False
+
+    def increment_redis_hash(self, hash_name: str, field: str, amount: int = 1):
+        try:
+            r = self.redis_connection()
+            return r.hincrby(hash_name, field, amount)
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return None
+
+    def pop_redis_hash(self, hash_name: str):
+        """Read and delete a hash in one transaction, None if redis failed."""
+        try:
+            pipe = self.redis_connection_pipeline()
+            pipe.hgetall(hash_name)
+            pipe.delete(hash_name)
+            values, _ = pipe.execute()
+            return values
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return None
+
+    def add_to_redis_hashes(self, hashes: dict, set_name: str):
+        """HSET the fields of every hash and add its name to set_name in one transaction, False if redis failed."""
+        try:
+            pipe = self.redis_connection_pipeline()
+            for hash_name, fields in hashes.items():
+                pipe.hset(hash_name, mapping=fields)
+                pipe.sadd(set_name, hash_name)
+            pipe.execute()
+            return True
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return False
+
+    def get_redis_values(self, keys: list):
+        """MGET, None if redis failed."""
+        try:
+            r = self.redis_connection()
+            return r.mget(keys)
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return None
+
+    def increment_redis_keys(self, keys: list):
+        """INCR every key in one round trip, None if redis failed."""
+        try:
+            pipe = self.redis_connection_pipeline()
+            for key in keys:
+                pipe.incr(key)
+            return pipe.execute()
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return None
+
+    def get_redis_value(self, key: str):
+        try:
+            r = self.redis_connection()
+            return r.get(key)
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return None
+
+    def set_redis_value(self, key: str, value: str, ttl_seconds: int):
+        try:
+            r = self.redis_connection()
+            return r.set(key, value, ex=ttl_seconds)
+        except RedisError as e:
+            print(f"Redis error: {e}")
+            return None
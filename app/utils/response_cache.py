@@ -0,0 +1,345 @@
+"""
+HTTP response cache of the anonymous read endpoints.
+
+Responses are stored as the serialized bytes the endpoint produced, keyed by
+path and sorted query string, so a hit skips the database, pydantic and
+JSON encoding altogether. Each entry carries tags (e.g. "adoption_pet:12",
+"adoption_pets") and remembers the version of every tag when it was
+rendered; writes emit ResponseCacheInvalidated with the tags they touch,
+which bumps those versions and so retires every entry rendered before.
+
+Entries live in this process and, with RESPONSE_CACHE_REDIS, in redis too,
+where tag versions are then shared by every process. Without redis a write
+only retires the entries of its own process, the others expire after
+RESPONSE_CACHE_TTL_SECONDS.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.utils.constants import (
+    RESPONSE_CACHE_ENABLED,
+    RESPONSE_CACHE_MAX_BODY_BYTES,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_REDIS,
+    RESPONSE_CACHE_TTL_SECONDS,
+    VIEW_REDIS_RETRY_SECONDS,
+)
+from app.utils.events import EventBus, ResponseCacheInvalidated, event_bus
+from app.utils.redis import RedisHelper
+
+# tags of the cached endpoints, formatted with the path parameters
+PET_TAG = "pet:{pet_id}"
+ADOPTION_PET_TAG = "adoption_pet:{adoption_pet_id}"
+ADOPTION_PETS_TAG = "adoption_pets"
+LOST_PETS_TAG = "lost_pets"
+
+REDIS_PREFIX = "qc_pet_adoption:response_cache"
+
+# headers of the original response that are not replayed from the cache
+_UNCACHED_HEADERS = {b"content-length", b"etag", b"x-cache", b"date", b"server"}
+
+# tag -> (version in this process, version in redis or None without redis)
+TagVersions = Dict[str, Tuple[int, Optional[int]]]
+
+CachedResponse = namedtuple("CachedResponse", ["body", "headers", "etag", "versions", "expires_at"])
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check, weak comparison as RFC 9110 asks for GETs."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def cache_key(path: str, query_string: bytes) -> str:
+    query = sorted(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
+    return f"{path}?{urlencode(query)}" if query else path
+
+
+class ResponseCache(object):
+    """Tag versioned store of serialized responses, see the module docstring."""
+
+    def __init__(
+        self,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS,
+        use_redis: bool = RESPONSE_CACHE_REDIS,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis = RedisHelper() if use_redis else None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._redis_down_until = 0.0
+
+    def _redis_available(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self) -> None:
+        self._redis_down_until = time.monotonic() + VIEW_REDIS_RETRY_SECONDS
+
+    def tag_versions(self, tags: Sequence[str]) -> TagVersions:
+        remote: List[Optional[int]] = [None] * len(tags)
+        if tags and self._redis_available():
+            values = self.redis.get_redis_values([f"{REDIS_PREFIX}:tag:{tag}" for tag in tags])
+            if values is None:
+                self._redis_failed()
+            else:
+                remote = [int(value or 0) for value in values]
+        with self._lock:
+            return {tag: (self._versions.get(tag, 0), version) for tag, version in zip(tags, remote)}
+
+    def get(self, key: str, versions: TagVersions) -> Optional[CachedResponse]:
+        """The entry of key if it was rendered at the current tag versions."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.versions == versions and entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    return entry
+                del self._entries[key]
+
+        if not self._redis_available():
+            return None
+        raw = self.redis.get_redis_value(f"{REDIS_PREFIX}:entry:{key}")
+        if raw is None:
+            return None
+        stored = json.loads(raw)
+        entry = CachedResponse(
+            body=stored["body"].encode("utf-8"),
+            headers=[(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored["headers"]],
+            etag=stored["etag"],
+            versions={tag: tuple(version) for tag, version in stored["versions"].items()},
+            expires_at=stored["expires_at"],
+        )
+        # the local half of the versions is per process, only the redis half is shared
+        if {tag: version[1] for tag, version in entry.versions.items()} != {
+            tag: version[1] for tag, version in versions.items()
+        } or entry.expires_at <= now:
+            return None
+        entry = entry._replace(versions=versions)
+        self._store_local(key, entry)
+        return entry
+
+    def _store_local(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set(
+        self, key: str, versions: TagVersions, body: bytes, headers: List[Tuple[bytes, bytes]]
+    ) -> CachedResponse:
+        """Store a response rendered at versions, read before rendering it."""
+        entry = CachedResponse(
+            body=body,
+            headers=headers,
+            etag=make_etag(body),
+            versions=versions,
+            expires_at=time.time() + self.ttl_seconds,
+        )
+        self._store_local(key, entry)
+
+        if self._redis_available() and all(version[1] is not None for version in versions.values()):
+            try:
+                text = body.decode("utf-8")
+            except UnicodeDecodeError:
+                return entry
+            stored = {
+                "body": text,
+                "headers": [(name.decode("latin-1"), value.decode("latin-1")) for name, value in headers],
+                "etag": entry.etag,
+                "versions": versions,
+                "expires_at": entry.expires_at,
+            }
+            if self.redis.set_redis_value(
+                f"{REDIS_PREFIX}:entry:{key}", json.dumps(stored), self.ttl_seconds
+            ) is None:
+                self._redis_failed()
+        return entry
+
+    def invalidate(self, *tags: str) -> None:
+        """Retire every entry carrying one of tags."""
+        if not tags:
+            return
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+        if self._redis_available():
+            if self.redis.increment_redis_keys([f"{REDIS_PREFIX}:tag:{tag}" for tag in tags]) is None:
+                self._redis_failed()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CacheRule(object):
+    """
+    A cached endpoint: path is the route path with {name} placeholders for
+    integer path parameters, tags the tag templates formatted with them and
+    on_hit an optional callback run with them, in the threadpool once the
+    response is sent, when served from the cache.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        tags: Sequence[str],
+        on_hit: Optional[Callable[[Dict[str, str]], None]] = None,
+    ) -> None:
+        pattern = ""
+        for literal, name in re.findall(r"([^{]*)(?:\{(\w+)\})?", path):
+            pattern += re.escape(literal)
+            if name:
+                pattern += rf"(?P<{name}>\d+)"
+        self.pattern = re.compile(pattern)
+        self.tags = tags
+        self.on_hit = on_hit
+
+    def match(self, path: str) -> Optional[Dict[str, str]]:
+        match = self.pattern.fullmatch(path)
+        return match.groupdict() if match else None
+
+    def tags_for(self, params: Dict[str, str]) -> List[str]:
+        return [tag.format(**params) for tag in self.tags]
+
+
+class ResponseCacheMiddleware(object):
+    """
+    ASGI middleware serving the GETs of rules from the cache, with an ETag
+    on every response and 304 Not Modified for a matching If-None-Match.
+    Only complete 200 responses without cookies are stored.
+    """
+
+    def __init__(self, app, cache: "ResponseCache", rules: Sequence[CacheRule]) -> None:
+        self.app = app
+        self.cache = cache
+        self.rules = rules
+
+    async def _call_cache(self, method, *args):
+        # redis round trips block, keep them off the event loop
+        if self.cache.redis is not None:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+
+    def _match(self, scope) -> Tuple[Optional[CacheRule], Dict[str, str]]:
+        path = scope["path"]
+        root_path = scope.get("root_path", "").rstrip("/")
+        if root_path and path.startswith(root_path + "/"):
+            path = path[len(root_path):]
+        for rule in self.rules:
+            params = rule.match(path)
+            if params is not None:
+                return rule, params
+        return None, {}
+
+    async def __call__(self, scope, receive, send) -> None:
+        if not RESPONSE_CACHE_ENABLED or scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        rule, params = self._match(scope)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        key = cache_key(scope["path"], scope.get("query_string", b""))
+        versions = await self._call_cache(self.cache.tag_versions, rule.tags_for(params))
+
+        entry = await self._call_cache(self.cache.get, key, versions)
+        if entry is not None:
+            await self._send_cached(send, entry, if_none_match, b"HIT")
+            if rule.on_hit is not None:
+                try:
+                    # callbacks may block (e.g. the view counter's redis write), after the response
+                    await run_in_threadpool(rule.on_hit, params)
+                except Exception as e:
+                    logging.error(f"Response cache hit callback failed for {key}: {e}")
+            return
+
+        start_message = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def capture(message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = Headers(raw=message.get("headers", []))
+                if message["status"] != 200 or "set-cookie" in headers:
+                    passthrough = True
+                    await send(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            size = sum(len(chunk) for chunk in chunks)
+            if message.get("more_body", False):
+                if size > RESPONSE_CACHE_MAX_BODY_BYTES:
+                    # too large to keep, stream it untouched
+                    passthrough = True
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                return
+
+            body = b"".join(chunks)
+            headers = [
+                (name, value) for name, value in start_message.get("headers", [])
+                if name.lower() not in _UNCACHED_HEADERS
+            ]
+            if size > RESPONSE_CACHE_MAX_BODY_BYTES:
+                entry = CachedResponse(body, headers, make_etag(body), versions, 0.0)
+            else:
+                entry = await self._call_cache(self.cache.set, key, versions, body, headers)
+            await self._send_cached(send, entry, if_none_match, b"MISS")
+
+        await self.app(scope, receive, capture)
+
+    @staticmethod
+    async def _send_cached(send, entry: CachedResponse, if_none_match: Optional[str], state: bytes) -> None:
+        headers = [(b"etag", entry.etag.encode("latin-1")), (b"x-cache", state)]
+        if etag_matches(if_none_match, entry.etag):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        headers = entry.headers + headers + [(b"content-length", str(len(entry.body)).encode("latin-1"))]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+
+def invalidate_cached_responses(event: ResponseCacheInvalidated) -> None:
+    response_cache.invalidate(*event.tags)
+
+
+def register_response_cache_handlers(bus: EventBus = event_bus) -> None:
+    bus.register(ResponseCacheInvalidated, invalidate_cached_responses)
+
+
+response_cache = ResponseCache()
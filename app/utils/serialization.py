@@ -0,0 +1,81 @@
+"""
+Fast serialization of list responses.
+
+List routes read plain rows (Projection) instead of ORM instances and
+render them with a pydantic TypeAdapter built once per response model,
+whose dump_json writes the JSON bytes in pydantic-core directly instead of
+going through jsonable_encoder and the json module.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def type_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def json_response(response_model: Any, content: Any, status_code: int = 200) -> Response:
+    """
+    Validate content against response_model, like FastAPI does for the
+    response_model of a route, and answer with the serialized bytes.
+    """
+    adapter = type_adapter(response_model)
+    body = adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+class Projection(object):
+    """
+    Columns of a read-only query labelled with their path in the response
+    ("pet.owner.email"), so rows become nested dicts without loading ORM
+    instances or relationships.
+    """
+
+    def __init__(self, columns: Dict[str, Any]) -> None:
+        self._columns = list(columns.values())
+        self._paths: List[Tuple[Tuple[str, ...], str]] = []
+        for path in columns:
+            *parents, name = path.split(".")
+            self._paths.append((tuple(parents), name))
+
+    @property
+    def columns(self) -> List[Any]:
+        return self._columns
+
+    def to_dict(self, row: Sequence[Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        for (parents, name), value in zip(self._paths, row):
+            target = result
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[name] = value
+        return result
+
+    def to_dicts(self, rows: Sequence[Sequence[Any]]) -> List[Dict[str, Any]]:
+        return [self.to_dict(row) for row in rows]
+
+
+def model_projection(response_model: Type[BaseModel], entities: Dict[str, Any]) -> Projection:
+    """
+    Projection of the fields of response_model, entities mapping the path of
+    the model and of each nested model ("" for the top level, "pet",
+    "pet.owner") to the mapped class holding its columns.
+    """
+    columns: Dict[str, Any] = {}
+
+    def walk(model: Type[BaseModel], prefix: str) -> None:
+        entity = entities[prefix]
+        for name, field in model.model_fields.items():
+            path = f"{prefix}.{name}" if prefix else name
+            annotation = field.annotation
+            if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+                walk(annotation, path)
+            else:
+                columns[path] = getattr(entity, name)
+
+    walk(response_model, "")
+    return Projection(columns)
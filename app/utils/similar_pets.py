@@ -0,0 +1,237 @@
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.constants import (
+    SIMILAR_PETS_CACHE_SIZE,
+    SIMILAR_PETS_INDEX_TTL_SECONDS,
+    SIMILAR_PETS_MAX,
+)
+from app.utils.lost_pet_matcher import CategoryEncoder
+
+# Row of an available adoption pet as loaded from the database
+SimilarPetCase = namedtuple(
+    "SimilarPetCase",
+    ["id", "type", "breed", "size", "color", "gender", "age", "is_vaccinated", "is_neutered"],
+)
+
+# weight of a mismatch per feature, the distance of two pets lies in [0, 1]
+FEATURE_WEIGHTS = {
+    "breed": 0.30,
+    "size": 0.20,
+    "color": 0.15,
+    "gender": 0.05,
+    "age": 0.20,
+    "is_vaccinated": 0.05,
+    "is_neutered": 0.05,
+}
+
+# pets this many years apart in age count as a full age mismatch
+AGE_SCALE_YEARS = 5.0
+
+_AGE_UNITS_YEARS = {"y": 1.0, "m": 1.0 / 12, "w": 1.0 / 52, "d": 1.0 / 365}
+
+
+def age_in_years(age) -> float:
+    """
+    Parse the free-text age of a pet ('2 years', '6 mos', '1 yr 3 months',
+    '3') into years, NaN when it can't be read.
+    """
+    if age is None:
+        return np.nan
+    text = str(age).strip().lower()
+    parts = re.findall(r"(\d+(?:\.\d+)?)\s*([a-z]*)", text)
+    if not parts:
+        return np.nan
+    years = 0.0
+    for number, unit in parts:
+        years += float(number) * _AGE_UNITS_YEARS.get(unit[:1], 1.0)
+    return years
+
+
+def _flag(value) -> float:
+    return np.nan if value is None else float(bool(value))
+
+
+class SimilarPetIndex(object):
+    """
+    Compact feature matrix of the available adoption pets.
+
+    Every pet occupies a row of an int32 matrix of category codes (type,
+    breed, size, color, gender) and a float matrix of numeric features
+    (age in years, vaccinated and neutered flags), so the distance of one
+    pet to all others is a few vectorized operations. Rows are upserted and
+    removed as availability changes, the matrix is rebuilt from the
+    database when older than its ttl, and the nearest neighbours of each
+    pet are cached until the next change.
+    """
+
+    CATEGORIES = ("type", "breed", "size", "color", "gender")
+    NUMERIC = ("age", "is_vaccinated", "is_neutered")
+
+    def __init__(
+        self,
+        ttl_seconds: int = SIMILAR_PETS_INDEX_TTL_SECONDS,
+        cache_size: int = SIMILAR_PETS_CACHE_SIZE,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._encoders = {name: CategoryEncoder() for name in self.CATEGORIES}
+        self._cache: "OrderedDict[int, List[Tuple[int, float]]]" = OrderedDict()
+        self._generation = 0
+        self._loaded_at: Optional[float] = None
+        self._reset(capacity=0)
+
+    def _reset(self, capacity: int) -> None:
+        self._changed()
+        self._slots: Dict[int, int] = {}
+        self._size = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.codes = np.zeros((capacity, len(self.CATEGORIES)), dtype=np.int32)
+        self.numeric = np.full((capacity, len(self.NUMERIC)), np.nan, dtype=np.float32)
+
+    def _grow(self, capacity: int) -> None:
+        def resize(array, fill):
+            grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            grown[: len(array)] = array
+            return grown
+
+        self.ids = resize(self.ids, 0)
+        self.active = resize(self.active, False)
+        self.codes = resize(self.codes, 0)
+        self.numeric = resize(self.numeric, np.nan)
+
+    def _features(self, case: SimilarPetCase, grow: bool) -> Tuple[np.ndarray, np.ndarray]:
+        encode = "encode" if grow else "lookup"
+        codes = np.array(
+            [getattr(self._encoders[name], encode)(getattr(case, name)) for name in self.CATEGORIES],
+            dtype=np.int32,
+        )
+        numeric = np.array(
+            [age_in_years(case.age), _flag(case.is_vaccinated), _flag(case.is_neutered)],
+            dtype=np.float32,
+        )
+        return codes, numeric
+
+    def _write(self, slot: int, case: SimilarPetCase) -> None:
+        self.ids[slot] = case.id
+        self.active[slot] = True
+        self.codes[slot], self.numeric[slot] = self._features(case, grow=True)
+
+    def _changed(self) -> None:
+        # neighbours computed before a change must not be cached after it
+        self._generation += 1
+        self._cache.clear()
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or (
+            time.monotonic() - self._loaded_at > self.ttl_seconds
+        )
+
+    def load(self, cases: Iterable[SimilarPetCase]) -> None:
+        """Rebuild the matrix from scratch."""
+        cases = list(cases)
+        with self._lock:
+            self._reset(capacity=max(len(cases), 16))
+            for slot, case in enumerate(cases):
+                self._write(slot, case)
+                self._slots[case.id] = slot
+            self._size = len(cases)
+            self._loaded_at = time.monotonic()
+
+    def upsert(self, case: SimilarPetCase) -> None:
+        with self._lock:
+            slot = self._slots.get(case.id)
+            if slot is None:
+                if self._size == len(self.ids):
+                    self._grow(max(16, 2 * len(self.ids)))
+                slot = self._size
+                self._size += 1
+                self._slots[case.id] = slot
+            self._write(slot, case)
+            self._changed()
+
+    def remove(self, adoption_pet_id: int) -> None:
+        with self._lock:
+            slot = self._slots.pop(adoption_pet_id, None)
+            if slot is None:
+                return
+            self.active[slot] = False
+            self._changed()
+
+            # compact once removed rows make up most of the matrix
+            if self._size > 64 and len(self._slots) < self._size // 2:
+                keep = np.flatnonzero(self.active[: self._size])
+                self.ids = self.ids[keep]
+                self.active = self.active[keep]
+                self.codes = self.codes[keep]
+                self.numeric = self.numeric[keep]
+                self._size = len(keep)
+                self._slots = {int(pet_id): slot for slot, pet_id in enumerate(self.ids)}
+
+    def distances(self, case: SimilarPetCase) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distance of a pet to every available pet of the same type.
+
+        Returns (ids, distances), distances in [0, 1]. A feature unknown on
+        either side counts as half a mismatch.
+        """
+        with self._lock:
+            live = np.flatnonzero(self.active[: self._size])
+            ids = self.ids[live]
+            codes = self.codes[live]
+            numeric = self.numeric[live]
+            query_codes, query_numeric = self._features(case, grow=False)
+
+        same_type = codes[:, 0] == query_codes[0]
+        ids, codes, numeric = ids[same_type], codes[same_type, 1:], numeric[same_type]
+
+        unknown = (codes == 0) | (query_codes[None, 1:] == 0)
+        mismatch = np.where(unknown, 0.5, (codes != query_codes[None, 1:]).astype(np.float32))
+
+        differences = np.abs(numeric - query_numeric[None, :])
+        differences[:, 0] = np.minimum(differences[:, 0] / AGE_SCALE_YEARS, 1.0)
+        differences = np.nan_to_num(differences, nan=0.5)
+
+        weights = np.array([FEATURE_WEIGHTS[name] for name in self.CATEGORIES[1:]], dtype=np.float32)
+        numeric_weights = np.array([FEATURE_WEIGHTS[name] for name in self.NUMERIC], dtype=np.float32)
+        return ids, mismatch @ weights + differences @ numeric_weights
+
+    def nearest(self, case: SimilarPetCase, limit: int = SIMILAR_PETS_MAX) -> List[Tuple[int, float]]:
+        """
+        The limit (adoption_pet_id, distance) pairs closest to a pet, the pet
+        itself excluded. The SIMILAR_PETS_MAX nearest are cached per pet.
+        """
+        with self._lock:
+            cached = self._cache.get(case.id)
+            if cached is not None:
+                self._cache.move_to_end(case.id)
+                return cached[:limit]
+            generation = self._generation
+
+        ids, distances = self.distances(case)
+        keep = ids != case.id
+        ids, distances = ids[keep], distances[keep]
+        count = min(max(limit, SIMILAR_PETS_MAX), len(ids))
+        if count == 0:
+            neighbours = []
+        else:
+            best = np.argpartition(distances, count - 1)[:count]
+            best = best[np.lexsort((-ids[best], distances[best]))]
+            neighbours = [(int(ids[i]), float(distances[i])) for i in best]
+
+        with self._lock:
+            if generation == self._generation:
+                self._cache[case.id] = neighbours
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return neighbours[:limit]
+
+
+similar_pet_index = SimilarPetIndex()
@@ -0,0 +1,179 @@
+"""
+Slow query log.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are grouped by fingerprint,
+the statement with its literals and bound parameters replaced by ? and
+IN lists collapsed, and aggregated with their count, total time and a
+window of recent durations for the percentiles. Each fingerprint keeps the
+routes and the app functions (first frame in app/crud, else in app/) that
+ran it and, with SLOW_QUERY_EXPLAIN, the plan of its first occurrence.
+The log is per process, fed by the engine hooks of
+app/utils/instrumentation.py.
+"""
+import os
+import re
+import sys
+import threading
+from collections import Counter, deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.utils.constants import (
+    SLOW_QUERY_EXPLAIN,
+    SLOW_QUERY_MAX_FINGERPRINTS,
+    SLOW_QUERY_SAMPLES,
+    SLOW_QUERY_THRESHOLD_MS,
+)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIPPED_FILES = {
+    os.path.join(APP_DIR, "utils", "slow_queries.py"),
+    os.path.join(APP_DIR, "utils", "instrumentation.py"),
+}
+
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """The statement with every literal or parameter as ?, lists as (...)."""
+    normalized = _COMMENTS.sub(" ", statement)
+    normalized = _STRINGS.sub("?", normalized)
+    normalized = _PLACEHOLDERS.sub("?", normalized)
+    normalized = _NUMBERS.sub("?", normalized)
+    normalized = _LISTS.sub("(...)", normalized)
+    return _SPACES.sub(" ", normalized).strip()
+
+
+def caller() -> Optional[str]:
+    """
+    The app function running the statement, e.g. "app/crud/pet.search_pets":
+    the innermost frame in app/crud, or else in app/ outside this log.
+    """
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and filename not in _SKIPPED_FILES:
+            module = os.path.relpath(filename, os.path.dirname(APP_DIR))[: -len(".py")].replace(os.sep, "/")
+            name = f"{module}.{frame.f_code.co_name}"
+            if module.startswith("app/crud/"):
+                return name
+            fallback = fallback or name
+        frame = frame.f_back
+    return fallback
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class SlowQuery(object):
+    """Aggregate of the slow executions of one fingerprint."""
+
+    def __init__(self, fingerprint: str, statement: str) -> None:
+        self.fingerprint = fingerprint
+        self.example = statement
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.durations: Deque[float] = deque(maxlen=SLOW_QUERY_SAMPLES)
+        self.routes: Counter = Counter()
+        self.callers: Counter = Counter()
+        self.explain: Optional[List[Any]] = None
+
+    def add(self, seconds: float, route: Optional[str], function: Optional[str]) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.durations.append(seconds)
+        if route:
+            self.routes[route] += 1
+        if function:
+            self.callers[function] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.durations)
+        return {
+            "fingerprint": self.fingerprint,
+            "example": self.example,
+            "count": self.count,
+            "total_ms": self.total_seconds * 1000,
+            "max_ms": self.max_seconds * 1000,
+            "p50_ms": _percentile(ordered, 0.50) * 1000,
+            "p99_ms": _percentile(ordered, 0.99) * 1000,
+            "routes": dict(self.routes.most_common(5)),
+            "callers": dict(self.callers.most_common(5)),
+            "explain": self.explain,
+        }
+
+
+class SlowQueryLog(object):
+    """Slow statements by fingerprint, see the module docstring."""
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+        max_fingerprints: int = SLOW_QUERY_MAX_FINGERPRINTS,
+        explain: bool = SLOW_QUERY_EXPLAIN,
+    ) -> None:
+        self.threshold_seconds = threshold_ms / 1000.0
+        self.max_fingerprints = max_fingerprints
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._queries: Dict[str, SlowQuery] = {}
+
+    def record(
+        self, conn, statement: str, parameters, executemany: bool, seconds: float, route: Optional[str]
+    ) -> None:
+        if seconds < self.threshold_seconds:
+            return
+        key = fingerprint(statement)
+        function = caller()
+        with self._lock:
+            query = self._queries.get(key)
+            first = query is None
+            if first:
+                if len(self._queries) >= self.max_fingerprints:
+                    # make room by forgetting the least costly fingerprint
+                    cheapest = min(self._queries.values(), key=lambda q: q.total_seconds)
+                    del self._queries[cheapest.fingerprint]
+                query = self._queries[key] = SlowQuery(key, statement)
+            query.add(seconds, route, function)
+
+        if first and self.explain and not executemany:
+            query.explain = self._explain(conn, statement, parameters)
+
+    @staticmethod
+    def _explain(conn, statement: str, parameters) -> Optional[List[Any]]:
+        """Plan of a SELECT, run on the raw connection so it isn't instrumented itself."""
+        if not statement.lstrip().lower().startswith("select"):
+            return None
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        try:
+            cursor = conn.connection.dbapi_connection.cursor()
+            try:
+                cursor.execute(prefix + statement, parameters)
+                columns = [column[0] for column in cursor.description or []]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except Exception as e:
+            return [{"error": str(e)}]
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        with self._lock:
+            queries = [query.as_dict() for query in self._queries.values()]
+        return sorted(queries, key=lambda query: query[order_by], reverse=True)[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._queries.clear()
+
+
+slow_query_log = SlowQueryLog()
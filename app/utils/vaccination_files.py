@@ -0,0 +1,109 @@
+"""
+Vaccination records as CSV or NDJSON files, one record per row or line,
+for the bulk import and export. Both directions stream: rows are parsed as
+the import consumes them and the export writes each batch of records as it
+is read, so neither holds the whole file in memory.
+"""
+import csv
+import io
+import json
+from collections import namedtuple
+from datetime import datetime
+from enum import Enum
+from typing import IO, Any, Iterable, Iterator, Sequence
+
+# columns of an export, the import reads the VaccinationImportRow ones and ignores the others
+EXPORT_FIELDS = (
+    "id",
+    "pet_id",
+    "vaccine_type",
+    "owner",
+    "contact",
+    "administered_by",
+    "administered_date",
+    "expiration_date",
+    "notes",
+    "created_at",
+    "updated_at",
+)
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# line: where the row ends in the file, data: its fields, error: why it couldn't be read
+FileRow = namedtuple("FileRow", ["line", "data", "error"])
+
+
+def _decoded_lines(file: IO[bytes]) -> Iterator[str]:
+    """Lines of a UTF-8 file, without a byte order mark, undecodable bytes replaced."""
+    for number, line in enumerate(file):
+        yield line.decode("utf-8-sig" if number == 0 else "utf-8", errors="replace")
+
+
+def _read_csv(lines: Iterator[str]) -> Iterator[FileRow]:
+    reader = csv.reader(lines)
+    header = [name.strip() for name in next(reader, [])]
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield FileRow(reader.line_num, None, f"Invalid CSV: {e}")
+            continue
+        if not any(values):
+            continue
+        if len(values) > len(header):
+            yield FileRow(reader.line_num, None, f"Expected at most {len(header)} values, got {len(values)}")
+            continue
+        # an empty cell is a missing value
+        yield FileRow(reader.line_num, {name: value for name, value in zip(header, values) if value != ""}, None)
+
+
+def _read_ndjson(lines: Iterator[str]) -> Iterator[FileRow]:
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield FileRow(number, None, f"Invalid JSON: {e}")
+            continue
+        if not isinstance(data, dict):
+            yield FileRow(number, None, "Expected a JSON object")
+            continue
+        yield FileRow(number, data, None)
+
+
+def read_rows(file: IO[bytes], file_format: str) -> Iterator[FileRow]:
+    """The rows of an uploaded file, read as they are iterated."""
+    lines = _decoded_lines(file)
+    return _read_csv(lines) if file_format == "csv" else _read_ndjson(lines)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def write_rows(batches: Iterable[Sequence[Sequence[Any]]], file_format: str) -> Iterator[str]:
+    """
+    The file of an export, one chunk per batch of rows, rows holding the
+    EXPORT_FIELDS values in order. A CSV starts with its header.
+    """
+    if file_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        yield buffer.getvalue()
+        for rows in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_plain(value) for value in row] for row in rows)
+            yield buffer.getvalue()
+    else:
+        for rows in batches:
+            yield "".join(
+                json.dumps({name: _plain(value) for name, value in zip(EXPORT_FIELDS, row)}) + "\n" for row in rows
+            )
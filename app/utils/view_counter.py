@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from app.utils.constants import VIEW_REDIS_RETRY_SECONDS, VIEW_REDIS_TIMEOUT_SECONDS
+from app.utils.redis import RedisHelper
+
+ADOPTION_PET_VIEWS_HASH = "qc_pet_adoption:adoption_pet_views"
+
+
+class ViewCounter(object):
+    """
+    Buffer of view increments waiting to be flushed into the database.
+
+    Views are counted with HINCRBY in a redis hash shared by every process,
+    on a client of its own that gives up after VIEW_REDIS_TIMEOUT_SECONDS
+    without retrying. While redis is unreachable they are counted in this
+    process instead and redis is only retried after VIEW_REDIS_RETRY_SECONDS,
+    so a redis outage costs one page view at most that timeout.
+    drain() hands back both buffers merged.
+    """
+
+    def __init__(self, hash_name: str = ADOPTION_PET_VIEWS_HASH) -> None:
+        self.hash_name = hash_name
+        self.redis = RedisHelper(timeout_seconds=VIEW_REDIS_TIMEOUT_SECONDS, retry_on_timeout=False)
+        self._lock = threading.Lock()
+        self._local: Counter = Counter()
+        self._redis_down_until = 0.0
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self) -> None:
+        self._redis_down_until = time.monotonic() + VIEW_REDIS_RETRY_SECONDS
+
+    def record(self, item_id: int, amount: int = 1) -> None:
+        if self._redis_available():
+            if self.redis.increment_redis_hash(self.hash_name, str(item_id), amount) is not None:
+                return
+            self._redis_failed()
+
+        with self._lock:
+            self._local[item_id] += amount
+
+    def drain(self) -> Dict[int, int]:
+        """Take every buffered increment, {item_id: views}."""
+        with self._lock:
+            counts, self._local = self._local, Counter()
+
+        if self._redis_available():
+            buffered = self.redis.pop_redis_hash(self.hash_name)
+            if buffered is None:
+                self._redis_failed()
+            else:
+                for item_id, amount in buffered.items():
+                    counts[int(item_id)] += int(amount)
+
+        return {item_id: amount for item_id, amount in counts.items() if amount}
+
+    def restore(self, counts: Dict[int, int]) -> None:
+        """Put back increments that could not be flushed."""
+        with self._lock:
+            self._local.update(counts)
+
+
+adoption_pet_view_counter = ViewCounter()
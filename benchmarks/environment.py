@@ -0,0 +1,76 @@
+"""
+Boot the app for a benchmark: the settings app/utils/constants.py requires,
+a database engine of our own (the MySQL of docker-compose-db.yaml or a
+SQLite file) bound to the app sessions, and the in-memory redis. Call
+setup, or prepare when the app sessions aren't used, before importing
+anything from app.
+"""
+import os
+import sys
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_ROOT, "benchmarks", ".data")
+DEFAULT_DATABASE_URL = "sqlite:///" + os.path.join(DATA_DIR, "bench.sqlite3")
+
+# required by app/utils/constants.py, the values of a .env win
+REQUIRED_SETTINGS = {
+    "MYSQL_USER": "bench",
+    "MYSQL_PASSWORD": "bench",
+    "MYSQL_DATABASE": "bench",
+    "SECRET_KEY": "benchmark-secret-key",
+    "REDIS_PASSWORD": "bench",
+}
+
+
+def database_url(url: str = None) -> str:
+    """url, else BENCH_DATABASE_URL, else the SQLite file of benchmarks/.data."""
+    return url or os.environ.get("BENCH_DATABASE_URL") or DEFAULT_DATABASE_URL
+
+
+def dialect_name(url: str) -> str:
+    return url.split(":", 1)[0].split("+", 1)[0]
+
+
+def prepare(response_cache: bool = True) -> None:
+    """Settings, working directory and redis of the app, before it is imported."""
+    # the app resolves app/static relative to the working directory
+    os.chdir(REPO_ROOT)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    for name, value in REQUIRED_SETTINGS.items():
+        os.environ.setdefault(name, value)
+    os.environ["RESPONSE_CACHE_ENABLED"] = "true" if response_cache else "false"
+
+    from benchmarks.fake_redis import install_fake_redis
+
+    install_fake_redis()
+
+
+def make_engine(url: str) -> Engine:
+    """Engine of url, a SQLite memory url keeps its one connection and database."""
+    if dialect_name(url) != "sqlite":
+        return create_engine(url, pool_pre_ping=True, pool_size=20, max_overflow=20)
+    options = {"connect_args": {"check_same_thread": False, "timeout": 30}}
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        options["poolclass"] = StaticPool
+    else:
+        os.makedirs(DATA_DIR, exist_ok=True)
+    return create_engine(url, **options)
+
+
+def setup(url: str = None, response_cache: bool = True) -> Engine:
+    """Engine of the benchmark database, installed as the app engine."""
+    prepare(response_cache)
+    engine = make_engine(database_url(url))
+
+    from app.core import database
+    from app.utils.instrumentation import instrument_engine
+
+    instrument_engine(engine)
+    database.engine = engine
+    database.SessionLocal.configure(bind=engine)
+    return engine
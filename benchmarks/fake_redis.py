@@ -0,0 +1,159 @@
+"""
+In-memory stand-in for the redis server, covering the commands
+RedisHelper (app/utils/redis.py) sends, so the app runs its redis code
+paths without a server. Values are kept as decoded strings, like the
+decode_responses connections of the app. Expiry is ignored: a benchmark
+run is shorter than any TTL the app sets.
+"""
+import random
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class FakePipeline(object):
+    """Queued commands run in one go by execute, like a MULTI/EXEC pipeline."""
+
+    def __init__(self, redis: "FakeRedis") -> None:
+        self._redis = redis
+        self._commands: List[Any] = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self._redis, name)
+
+        def queue(*args, **kwargs) -> "FakePipeline":
+            self._commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> List[Any]:
+        with self._redis.lock:
+            results = [method(*args, **kwargs) for method, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+
+class FakeRedis(object):
+    """Strings, sets and hashes of one redis database."""
+
+    def __init__(self, seed: int = 0) -> None:
+        self.lock = threading.RLock()
+        self._random = random.Random(seed)
+        self._data: Dict[str, Any] = {}
+
+    def pipeline(self) -> FakePipeline:
+        return FakePipeline(self)
+
+    def flushdb(self) -> bool:
+        with self.lock:
+            self._data.clear()
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self.lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    # strings
+
+    def get(self, name: str) -> Optional[str]:
+        with self.lock:
+            return self._data.get(name)
+
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        with self.lock:
+            return [self._data.get(key) for key in keys]
+
+    def set(self, name: str, value: Any, ex: Optional[int] = None) -> bool:
+        with self.lock:
+            self._data[name] = str(value)
+        return True
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self.lock:
+            value = int(self._data.get(name, 0)) + amount
+            self._data[name] = str(value)
+            return value
+
+    # sets
+
+    def sadd(self, name: str, *values: Any) -> int:
+        with self.lock:
+            members = self._data.setdefault(name, set())
+            before = len(members)
+            members.update(str(value) for value in values)
+            return len(members) - before
+
+    def spop(self, name: str, count: Optional[int] = None):
+        with self.lock:
+            members = self._data.get(name)
+            if not members:
+                return [] if count is not None else None
+            picked = self._random.sample(sorted(members), min(count or 1, len(members)))
+            members.difference_update(picked)
+            if not members:
+                del self._data[name]
+            return picked if count is not None else picked[0]
+
+    def srandmember(self, name: str, number: Optional[int] = None):
+        with self.lock:
+            members = sorted(self._data.get(name, ()))
+            picked = self._random.sample(members, min(number or 1, len(members)))
+            return picked if number is not None else (picked[0] if picked else None)
+
+    def smove(self, source: str, destination: str, value: Any) -> bool:
+        with self.lock:
+            members = self._data.get(source)
+            if not members or str(value) not in members:
+                return False
+            self.srem(source, value)
+            self.sadd(destination, value)
+            return True
+
+    def srem(self, name: str, *values: Any) -> int:
+        with self.lock:
+            members = self._data.get(name)
+            if not members:
+                return 0
+            before = len(members)
+            members.difference_update(str(value) for value in values)
+            if not members:
+                del self._data[name]
+            return before - len(members)
+
+    def scard(self, name: str) -> int:
+        with self.lock:
+            return len(self._data.get(name, ()))
+
+    # hashes
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        with self.lock:
+            values = self._data.setdefault(name, {})
+            value = int(values.get(key, 0)) + amount
+            values[key] = str(value)
+            return value
+
+    def hset(self, name: str, key: Optional[str] = None, value: Any = None, mapping: Optional[Dict] = None) -> int:
+        with self.lock:
+            values = self._data.setdefault(name, {})
+            fields = dict(mapping or {})
+            if key is not None:
+                fields[key] = value
+            added = len(set(fields) - set(values))
+            values.update((field, str(field_value)) for field, field_value in fields.items())
+            return added
+
+    def hgetall(self, name: str) -> Dict[str, str]:
+        with self.lock:
+            return dict(self._data.get(name, {}))
+
+
+fake_redis = FakeRedis()
+
+
+def install_fake_redis() -> FakeRedis:
+    """Point every RedisHelper at the shared in-memory redis."""
+    from app.utils.redis import RedisHelper
+
+    RedisHelper.redis_connection = lambda self, host=None: fake_redis
+    return fake_redis
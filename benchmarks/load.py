@@ -0,0 +1,400 @@
+"""
+Concurrent load test of the main endpoints.
+
+Boots app.main:app with uvicorn in this process against the benchmark
+database (seed it first with benchmarks.seed), then keeps --concurrency
+clients busy with a weighted mix of scenarios for --duration seconds.
+Reports per scenario throughput, latency percentiles and the SQL
+statements per request read from the Server-Timing header of the app, and
+compares them with the baseline of the dialect and scale:
+
+    python -m benchmarks.load --scale small --duration 30
+    python -m benchmarks.load --scale small --update-baseline
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import socket
+import sys
+import threading
+import time
+from collections import namedtuple
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks import environment
+from benchmarks.seed import BENCH_PASSWORD, BREEDS, COLORS, LOCATIONS, NAMES, SIZES, USERNAME_PREFIX
+
+BASELINE_DIR = os.path.join(environment.REPO_ROOT, "benchmarks", "baselines")
+# relative change of p95 or throughput tolerated before a regression is reported
+DEFAULT_TOLERANCE = 0.25
+# statements per request vary a little with the rows returned, a new query per request doesn't
+STATEMENT_TOLERANCE = 0.5
+_STATEMENTS = re.compile(r'desc="(\d+) queries"')
+
+Scenario = namedtuple("Scenario", ["name", "weight", "request"])
+
+
+class Context(object):
+    """What the scenarios draw their requests from, read from the seeded database."""
+
+    def __init__(self, engine) -> None:
+        from sqlalchemy import func, select
+
+        from app.core.security import create_access_token
+        from app.models import LostPet, LostPetReport, User
+
+        with engine.connect() as conn:
+            self.users = conn.execute(
+                select(User.id, User.username).where(User.username.startswith(USERNAME_PREFIX)).order_by(User.id)
+            ).all()
+            self.lost_pet_ids = conn.execute(select(LostPet.id).order_by(LostPet.id)).scalars().all()
+            self.last_report_id = conn.execute(select(func.max(LostPetReport.id))).scalar() or 0
+        if not self.users or not self.lost_pet_ids:
+            raise SystemExit("The benchmark database is empty, run python -m benchmarks.seed first")
+        self.tokens = {user_id: create_access_token(user_id) for user_id, _ in self.users[:50]}
+        self.image = _png(64)
+
+
+def _png(size: int) -> bytes:
+    from PIL import Image
+
+    noise = random.Random(size)
+    image = Image.new("RGB", (size, size))
+    image.putdata([(noise.randrange(256), noise.randrange(256), noise.randrange(256)) for _ in range(size * size)])
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def pet_list(client: httpx.Client, rng: random.Random, context: Context) -> httpx.Response:
+    pet_type = rng.choice([None, "Dog", "Cat"])
+    params = {
+        "purpose": rng.choice(["ADOPTION", "LOST_PET"]),
+        "skip": rng.randrange(0, 200, 20),
+        "limit": 20,
+    }
+    if pet_type:
+        params["type"] = pet_type
+        if rng.random() < 0.3:
+            params["breed"] = rng.choice(BREEDS[pet_type])
+    if rng.random() < 0.3:
+        params["color"] = rng.choice(COLORS)
+    return client.get("/v1/pet/list", params=params)
+
+
+def pet_search(client: httpx.Client, rng: random.Random, context: Context) -> httpx.Response:
+    term = rng.choice([rng.choice(NAMES), rng.choice(COLORS), rng.choice(BREEDS[rng.choice(["Dog", "Cat"])])])
+    return client.get(f"/v1/pet/search/{term}", params={"skip": 0, "limit": 20})
+
+
+def adoption_list(client: httpx.Client, rng: random.Random, context: Context) -> httpx.Response:
+    params: Dict[str, Any] = {"skip": rng.randrange(0, 100, 10), "limit": 10}
+    if rng.random() < 0.5:
+        params["pet_type"] = rng.choice(["Dog", "Cat"])
+    if rng.random() < 0.3:
+        params["size"] = rng.choice(SIZES)
+    sort_by = rng.choice([None, "popular", "ranked"])
+    if sort_by:
+        params["sort_by"] = sort_by
+    return client.get("/v1/adoption-pet/list-available", params=params)
+
+
+def lost_pet_report_create(client: httpx.Client, rng: random.Random, context: Context) -> httpx.Response:
+    reporter_id = rng.choice(list(context.tokens))
+    location, latitude, longitude = rng.choice(LOCATIONS)
+    return client.post(
+        "/v1/lost-pet-report/add",
+        headers={"Authorization": f"Bearer {context.tokens[reporter_id]}"},
+        data={
+            "lost_pet_id": str(rng.choice(context.lost_pet_ids)),
+            "reporter_id": str(reporter_id),
+            "details": "Seen near the gate, wearing a red collar.",
+            "report_location": location,
+            "report_latitude": str(latitude),
+            "report_longitude": str(longitude),
+        },
+        files={"image_file": ("sighting.png", context.image, "image/png")},
+    )
+
+
+def login(client: httpx.Client, rng: random.Random, context: Context) -> httpx.Response:
+    _, username = rng.choice(context.users)
+    return client.post("/v1/auth/login", data={"username": username, "password": BENCH_PASSWORD})
+
+
+SCENARIOS = [
+    Scenario("pet_list", 30, pet_list),
+    Scenario("pet_search", 20, pet_search),
+    Scenario("adoption_list", 30, adoption_list),
+    Scenario("lost_pet_report_create", 10, lost_pet_report_create),
+    Scenario("login", 10, login),
+]
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class ScenarioStats(object):
+    """Samples of one scenario, appended by every worker."""
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.statements: List[int] = []
+        self.errors = 0
+        self.cache_hits = 0
+
+    def add(self, response: Optional[httpx.Response], seconds: float) -> None:
+        self.latencies.append(seconds)
+        if response is None or response.status_code >= 400:
+            self.errors += 1
+            return
+        if response.headers.get("x-cache") == "HIT":
+            self.cache_hits += 1
+            return
+        # statements of the requests that reached the route, so they don't move with the hit ratio
+        match = _STATEMENTS.search(response.headers.get("server-timing", ""))
+        if match:
+            self.statements.append(int(match.group(1)))
+
+    def summary(self, duration: float) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        requests = len(ordered)
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "rps": round(requests / duration, 2) if duration else 0.0,
+            "mean_ms": round(sum(ordered) / requests * 1000, 2) if requests else 0.0,
+            "p50_ms": round(_percentile(ordered, 0.50) * 1000, 2),
+            "p95_ms": round(_percentile(ordered, 0.95) * 1000, 2),
+            "p99_ms": round(_percentile(ordered, 0.99) * 1000, 2),
+            "statements_per_request": (
+                round(sum(self.statements) / len(self.statements), 2) if self.statements else None
+            ),
+            "cache_hit_ratio": round(self.cache_hits / requests, 3) if requests else 0.0,
+        }
+
+
+def run_load(
+    base_url: str,
+    context: Context,
+    scenarios: List[Scenario],
+    concurrency: int,
+    duration: float,
+    seed: int,
+    warmup: float = 0.0,
+) -> Dict[str, Any]:
+    """Weighted scenario mix from concurrency threads, samples of the warmup dropped."""
+    stats = {scenario.name: ScenarioStats() for scenario in scenarios}
+    lock = threading.Lock()
+    started_at = time.perf_counter()
+    measure_from = started_at + warmup
+    deadline = measure_from + duration
+
+    def worker(index: int) -> None:
+        rng = random.Random(seed * 1000 + index)
+        weights = [scenario.weight for scenario in scenarios]
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            while True:
+                scenario = rng.choices(scenarios, weights=weights)[0]
+                sent_at = time.perf_counter()
+                if sent_at >= deadline:
+                    return
+                try:
+                    response = scenario.request(client, rng, context)
+                except httpx.HTTPError:
+                    response = None
+                elapsed = time.perf_counter() - sent_at
+                if sent_at >= measure_from:
+                    with lock:
+                        stats[scenario.name].add(response, elapsed)
+
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - measure_from
+
+    total = ScenarioStats()
+    for scenario_stats in stats.values():
+        total.latencies.extend(scenario_stats.latencies)
+        total.statements.extend(scenario_stats.statements)
+        total.errors += scenario_stats.errors
+        total.cache_hits += scenario_stats.cache_hits
+    return {
+        "scenarios": {name: scenario_stats.summary(elapsed) for name, scenario_stats in stats.items()},
+        "total": total.summary(elapsed),
+    }
+
+
+class Server(object):
+    """uvicorn serving the app from a background thread."""
+
+    def __init__(self, app, port: int = 0) -> None:
+        import uvicorn
+
+        self.port = port or _free_port()
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "Server":
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise SystemExit("The app failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cleanup(engine, context: Context) -> None:
+    """Remove the reports created by the run and their uploads, back to the seeded data set."""
+    from sqlalchemy import delete
+
+    from app.api.routes.lost_pet_report import UPLOAD_DIR
+    from app.models import LostPetMatchCandidate, LostPetReport
+
+    with engine.begin() as conn:
+        conn.execute(delete(LostPetMatchCandidate).where(LostPetMatchCandidate.report_id > context.last_report_id))
+        conn.execute(delete(LostPetReport).where(LostPetReport.id > context.last_report_id))
+    for user_id, username in context.users:
+        shutil.rmtree(UPLOAD_DIR / str(user_id) / username, ignore_errors=True)
+        try:
+            os.rmdir(UPLOAD_DIR / str(user_id))
+        except OSError:
+            pass
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Regressions against the baseline: more statements per request, or p95
+    and throughput worse than the tolerance. Latencies only compare between
+    runs on the same machine, statement counts compare everywhere.
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if not previous or not current["requests"]:
+            continue
+        statements, previous_statements = current["statements_per_request"], previous["statements_per_request"]
+        if (statements or 0) > (previous_statements or 0) + STATEMENT_TOLERANCE:
+            regressions.append(
+                f"{name}: {statements} statements per request, {previous_statements} in the baseline"
+            )
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms, {previous['p95_ms']}ms in the baseline")
+        if previous["rps"] and current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: {current['rps']} requests/s, {previous['rps']} in the baseline")
+        if current["errors"] > previous["errors"]:
+            regressions.append(f"{name}: {current['errors']} errors, {previous['errors']} in the baseline")
+    return regressions
+
+
+def print_report(results: Dict[str, Any], stream=sys.stdout) -> None:
+    columns = ("requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "statements_per_request", "cache_hit_ratio")
+    headers = ("requests", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms", "stmts/req", "cache hits")
+    print(f"{'scenario':<24}" + "".join(f"{header:>11}" for header in headers), file=stream)
+    rows = list(results["scenarios"].items()) + [("total", results["total"])]
+    for name, summary in rows:
+        values = ["-" if summary[column] is None else str(summary[column]) for column in columns]
+        print(f"{name:<24}" + "".join(f"{value:>11}" for value in values), file=stream)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to BENCH_DATABASE_URL, else a SQLite file")
+    parser.add_argument("--scale", default="small", help="name of the seeded scale, picks the baseline file")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds measured")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds run before measuring")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--scenario", action="append", choices=[scenario.name for scenario in SCENARIOS],
+        help="run only these scenarios, repeatable",
+    )
+    parser.add_argument("--no-response-cache", action="store_true", help="disable the response cache of the app")
+    parser.add_argument("--baseline", help="baseline file, benchmarks/baselines/<dialect>-<scale>.json by default")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with 1 when a regression is found")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+
+    url = environment.database_url(args.database_url)
+    engine = environment.setup(url, response_cache=not args.no_response_cache)
+    from app.main import app
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+    context = Context(engine)
+    try:
+        with Server(app) as server:
+            measured = run_load(
+                server.url, context, scenarios, args.concurrency, args.duration, args.seed, warmup=args.warmup
+            )
+    finally:
+        cleanup(engine, context)
+
+    results = {
+        "dialect": environment.dialect_name(url),
+        "scale": args.scale,
+        "concurrency": args.concurrency,
+        "duration_seconds": args.duration,
+        "response_cache": not args.no_response_cache,
+        "python": platform.python_version(),
+        **measured,
+    }
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{results['dialect']}-{args.scale}.json")
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {os.path.relpath(baseline_path)}")
+        return
+    if not os.path.exists(baseline_path):
+        print(f"\nNo baseline at {os.path.relpath(baseline_path)}, record one with --update-baseline")
+        return
+
+    with open(baseline_path) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if not regressions:
+        print(f"\nNo regression against {os.path.relpath(baseline_path)}")
+        return
+    print(f"\nRegressions against {os.path.relpath(baseline_path)}:")
+    for regression in regressions:
+        print(f"  {regression}")
+    if args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Micro-benchmarks of the CRUD reads and serialization hot paths.
+
+Each size gets its own in-memory SQLite database seeded with
+benchmarks.seed (size is the number of pets, the other tables follow, see
+scale_counts), then every benchmark is timed pytest-benchmark style:
+repeated calls until --min-time, at least --min-rounds, with min, median,
+mean and stddev per call. The scaling table at the end compares the
+medians across sizes; the exponent is the slope of log(median) against
+log(size), about 0 for a function independent of the data size and 1 for
+one growing linearly with it.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --sizes 1000,100000 --benchmark get_pets --json micro.json
+
+The 1M size holds about 5M rows, seeding it takes a few minutes and about
+2GB of memory; --on-disk seeds into temporary SQLite files instead.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks import environment
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+# objects validated per call by the model_validate benchmarks
+VALIDATE_BATCH = 100
+
+# setup(engine) returns the state run(state) is called with, setup isn't timed
+Benchmark = namedtuple("Benchmark", ["name", "setup", "run"])
+
+
+def _crud(function: Callable, **kwargs) -> Tuple[Callable, Callable]:
+    """A read in a session of its own, like a request has."""
+
+    def setup(engine):
+        from sqlalchemy.orm import sessionmaker
+
+        return sessionmaker(bind=engine, autoflush=False)
+
+    def run(session_factory) -> None:
+        with session_factory() as db:
+            function(db, **kwargs)
+
+    return setup, run
+
+
+def _validate(model: Any, load: Callable) -> Tuple[Callable, Callable]:
+    """model_validate of VALIDATE_BATCH loaded ORM instances, the load isn't timed."""
+
+    def setup(engine):
+        from sqlalchemy.orm import Session
+
+        # kept open, relationships the load left out are lazy loaded by the warmup call
+        db = Session(engine)
+        return model, load(db), db
+
+    def run(state) -> None:
+        schema, instances, _ = state
+        for instance in instances:
+            schema.model_validate(instance)
+
+    return setup, run
+
+
+def _adoption_pets(db) -> List[Any]:
+    from sqlalchemy.orm import joinedload
+
+    from app.models import AdoptionPet, Pet
+
+    return (
+        db.query(AdoptionPet)
+        .options(joinedload(AdoptionPet.pet).joinedload(Pet.owner))
+        .limit(VALIDATE_BATCH)
+        .all()
+    )
+
+
+def _lost_pet_reports(db) -> List[Any]:
+    from app.crud.lost_pet_report import get_lost_pet_reports
+
+    return get_lost_pet_reports(db, limit=VALIDATE_BATCH)
+
+
+def benchmarks() -> List[Benchmark]:
+    from app.crud.adoption_pet import get_pets_available
+    from app.crud.lost_pet import get_lost_pets
+    from app.crud.pet import get_pets, search_pets
+    from app.crud.vaccination import get_vaccination_records, vaccination_totals
+    from app.schemas.adoption_pet import AdoptionPetInDB, AdoptionPetSort
+    from app.schemas.lost_pet_report import LostPetReportDetailsResponse
+
+    def get_vaccination_records_counted(db, **kwargs):
+        # the total is cached per filter, this times the count it saves too
+        vaccination_totals.invalidate()
+        return get_vaccination_records(db, **kwargs)
+
+    return [
+        Benchmark("get_pets", *_crud(get_pets, limit=20, purpose="LOST_PET")),
+        Benchmark("get_pets[type,color]", *_crud(get_pets, limit=20, type="Dog", color="Brown", purpose="ADOPTION")),
+        Benchmark("search_pets", *_crud(search_pets, search_term="Aspin", limit=20)),
+        Benchmark("get_pets_available", *_crud(get_pets_available, limit=10)),
+        Benchmark(
+            "get_pets_available[popular]",
+            *_crud(get_pets_available, limit=10, sort_by=AdoptionPetSort.popular),
+        ),
+        Benchmark("get_lost_pets", *_crud(get_lost_pets, limit=10)),
+        Benchmark("get_vaccination_records", *_crud(get_vaccination_records, limit=10)),
+        Benchmark(
+            "get_vaccination_records[vaccine_type]",
+            *_crud(get_vaccination_records, limit=10, vaccine_type="Rabies"),
+        ),
+        Benchmark("get_vaccination_records[counted]", *_crud(get_vaccination_records_counted, limit=10)),
+        Benchmark("AdoptionPetInDB.model_validate", *_validate(AdoptionPetInDB, _adoption_pets)),
+        Benchmark(
+            "LostPetReportDetailsResponse.model_validate",
+            *_validate(LostPetReportDetailsResponse, _lost_pet_reports),
+        ),
+    ]
+
+
+def measure(run: Callable, state: Any, min_time: float, min_rounds: int, max_rounds: int) -> Dict[str, float]:
+    """Seconds per call, after one warmup call."""
+    run(state)
+    durations: List[float] = []
+    started_at = time.perf_counter()
+    while len(durations) < min_rounds or (
+        len(durations) < max_rounds and time.perf_counter() - started_at < min_time
+    ):
+        call_started_at = time.perf_counter()
+        run(state)
+        durations.append(time.perf_counter() - call_started_at)
+    return {
+        "rounds": len(durations),
+        "min": min(durations),
+        "max": max(durations),
+        "mean": statistics.mean(durations),
+        "stddev": statistics.stdev(durations) if len(durations) > 1 else 0.0,
+        "median": statistics.median(durations),
+    }
+
+
+def exponent(medians: Dict[int, float]) -> Optional[float]:
+    """Slope of log(median) against log(size) between the smallest and largest size."""
+    sizes = sorted(medians)
+    if len(sizes) < 2 or not medians[sizes[0]] or not medians[sizes[-1]]:
+        return None
+    return math.log(medians[sizes[-1]] / medians[sizes[0]]) / math.log(sizes[-1] / sizes[0])
+
+
+def _format_size(size: int) -> str:
+    for unit, scale in (("M", 1_000_000), ("k", 1_000)):
+        if size >= scale and size % scale == 0:
+            return f"{size // scale}{unit}"
+    return str(size)
+
+
+def print_size(size: int, results: Dict[str, Dict[str, float]], stream=sys.stdout) -> None:
+    columns = ("min", "median", "mean", "stddev", "max")
+    print(f"\n{_format_size(size)} pets (times in ms)", file=stream)
+    print(f"{'benchmark':<46}" + "".join(f"{column:>10}" for column in columns) + f"{'rounds':>8}", file=stream)
+    for name, stats in results.items():
+        values = "".join(f"{stats[column] * 1000:>10.3f}" for column in columns)
+        print(f"{name:<46}{values}{stats['rounds']:>8}", file=stream)
+
+
+def print_scaling(results: Dict[int, Dict[str, Dict[str, float]]], stream=sys.stdout) -> None:
+    sizes = sorted(results)
+    names = list(results[sizes[0]])
+    print("\nMedian ms by number of pets", file=stream)
+    print(
+        f"{'benchmark':<46}" + "".join(f"{_format_size(size):>10}" for size in sizes) + f"{'exponent':>10}",
+        file=stream,
+    )
+    for name in names:
+        medians = {size: results[size][name]["median"] for size in sizes if name in results[size]}
+        values = "".join(f"{medians[size] * 1000:>10.3f}" if size in medians else f"{'-':>10}" for size in sizes)
+        slope = exponent(medians)
+        print(f"{name:<46}{values}{'-' if slope is None else format(slope, '.2f'):>10}", file=stream)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--sizes", default=",".join(str(size) for size in DEFAULT_SIZES), help="comma separated numbers of pets",
+    )
+    parser.add_argument("--benchmark", action="append", help="run only the benchmarks of this name, repeatable")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds each benchmark is repeated for")
+    parser.add_argument("--min-rounds", type=int, default=5)
+    parser.add_argument("--max-rounds", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--on-disk", action="store_true", help="seed temporary SQLite files instead of memory")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    environment.prepare()
+    from benchmarks.seed import DEFAULT_SEED, seed
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    selected = [
+        benchmark for benchmark in benchmarks() if not args.benchmark or benchmark.name in args.benchmark
+    ]
+    results: Dict[int, Dict[str, Dict[str, float]]] = {}
+    for size in sizes:
+        path = None
+        if args.on_disk:
+            handle, path = tempfile.mkstemp(suffix=".sqlite3")
+            os.close(handle)
+        engine = environment.make_engine(f"sqlite:///{path}" if path else "sqlite://")
+        try:
+            started_at = time.perf_counter()
+            seed(engine, size, args.seed if args.seed is not None else DEFAULT_SEED)
+            print(f"Seeded {_format_size(size)} pets in {time.perf_counter() - started_at:.1f}s", file=sys.stderr)
+            results[size] = {}
+            for benchmark in selected:
+                state = benchmark.setup(engine)
+                results[size][benchmark.name] = measure(
+                    benchmark.run, state, args.min_time, args.min_rounds, args.max_rounds
+                )
+            print_size(size, results[size])
+        finally:
+            engine.dispose()
+            if path:
+                os.remove(path)
+
+    print_scaling(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(
+                {
+                    "sizes": sizes,
+                    "results": {str(size): by_name for size, by_name in results.items()},
+                    "exponents": {
+                        benchmark.name: exponent({size: results[size][benchmark.name]["median"] for size in sizes})
+                        for benchmark in selected
+                    },
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
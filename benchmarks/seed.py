@@ -0,0 +1,411 @@
+"""
+Deterministic data set of the benchmarks.
+
+The same seed and scale always produce the same rows, ids included, so
+runs against a fresh database are comparable. Volumes follow the pet
+count of the scale: ADOPTION and LOST_PET pets get their adoption or lost
+pet record, adoption pets get views and lost pets get sighting reports.
+Every user has the password BENCH_PASSWORD and a bench_ username.
+
+    python -m benchmarks.seed --scale small --reset
+"""
+import argparse
+import random
+import time
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import bindparam, func, insert, update
+from sqlalchemy.engine import Engine
+
+BENCH_PASSWORD = "bench-password"
+USERNAME_PREFIX = "bench_user_"
+DEFAULT_SEED = 20240601
+CHUNK_SIZE = 5000
+# created_at of the data set spreads over the year before this date
+EPOCH = datetime(2025, 1, 1)
+
+# pets per scale, the other volumes are derived in scale_counts
+SCALES = {
+    "small": 2_000,
+    "medium": 20_000,
+    "large": 200_000,
+}
+
+ScaleCounts = namedtuple(
+    "ScaleCounts",
+    [
+        "users",
+        "pets",
+        "adoption_pets",
+        "adoption_pet_views",
+        "lost_pets",
+        "lost_pet_reports",
+        "vaccination_records",
+    ],
+)
+
+BREEDS = {
+    "Dog": ["Aspin", "Shih Tzu", "Labrador", "Beagle", "Golden Retriever", "Chihuahua", "Poodle", "Husky"],
+    "Cat": ["Puspin", "Persian", "Siamese", "Maine Coon", "British Shorthair", "Bengal"],
+}
+TYPE_WEIGHTS = {"Dog": 0.65, "Cat": 0.35}
+COLORS = ["Black", "White", "Brown", "Gray", "Orange", "Cream", "Black and White", "Tricolor"]
+SIZES = ["Small", "Medium", "Large"]
+AGES = ["3 months", "6 months", "1 year", "2 years", "3 years", "5 years", "8 years"]
+NAMES = [
+    "Bantay", "Chichi", "Mingming", "Brownie", "Choco", "Luna", "Max", "Bella",
+    "Coco", "Milo", "Kitkat", "Tiger", "Snow", "Peanut", "Lucky", "Princess",
+]
+WORDS = [
+    "friendly", "shy", "playful", "calm", "collar", "red", "blue", "scar", "limp",
+    "microchipped", "spotted", "near", "market", "school", "church", "park", "gate",
+    "barks", "loves", "treats", "kids", "leash", "trained", "rescued", "street",
+]
+# barangays of Quezon City with their approximate center
+LOCATIONS = [
+    ("Bagong Pag-asa", 14.6565, 121.0325),
+    ("Batasan Hills", 14.6826, 121.0977),
+    ("Commonwealth", 14.6960, 121.0864),
+    ("Cubao", 14.6190, 121.0537),
+    ("Diliman", 14.6530, 121.0685),
+    ("Fairview", 14.7336, 121.0590),
+    ("Kamuning", 14.6299, 121.0384),
+    ("Novaliches", 14.7205, 121.0397),
+    ("Project 4", 14.6275, 121.0760),
+    ("San Francisco del Monte", 14.6395, 121.0220),
+    ("Tandang Sora", 14.6790, 121.0450),
+    ("UP Campus", 14.6538, 121.0645),
+]
+ADOPTION_STATUSES = ["AVAILABLE"] * 8 + ["ADOPTED"] * 2
+LOST_PET_STATUSES = ["REPORTED"] * 5 + ["SEARCHING"] * 3 + ["FOUND", "REUNITED"]
+VACCINES = {
+    "Dog": ["RABIES", "DISTEMPER", "PARVOVIRUS", "ADENOVIRUS", "BORDETELLA", "LEPTOSPIROSIS"],
+    "Cat": ["FELINE_RABIES", "FELINE_DISTEMPER", "FELINE_CALICIVIRUS", "FELINE_HERPESVIRUS"],
+}
+
+
+def scale_counts(pets: int) -> ScaleCounts:
+    adoption_pets = pets * 2 // 5
+    lost_pets = pets * 2 // 5
+    return ScaleCounts(
+        users=max(pets // 10, 10),
+        pets=pets,
+        adoption_pets=adoption_pets,
+        adoption_pet_views=adoption_pets * 5,
+        lost_pets=lost_pets,
+        lost_pet_reports=lost_pets,
+        vaccination_records=pets,
+    )
+
+
+PetMeta = namedtuple("PetMeta", ["id", "created_at", "type", "owner_id"])
+
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int = CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    rows = iter(rows)
+    chunk = list(islice(rows, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(rows, size))
+
+
+class Generator(object):
+    """
+    Rows of every table, drawn from one seeded random stream. The tables are
+    generated one after the other in the order of seed, streamed so a large
+    scale doesn't hold every row in memory; what later tables refer to is
+    kept in PetMeta tuples.
+    """
+
+    def __init__(self, counts: ScaleCounts, seed: int = DEFAULT_SEED, hashed_password: str = "") -> None:
+        self.counts = counts
+        self.random = random.Random(seed)
+        self.hashed_password = hashed_password
+        self._owners: List[Tuple[str, str]] = []
+        self._pets: List[PetMeta] = []
+        self._lost_pets: List[Tuple[int, datetime]] = []
+        # adoption pet id -> views
+        self.view_counts: Counter = Counter()
+        # (pet id, vaccine type) -> its latest record
+        self._latest_vaccinations: Dict[Tuple[int, str], Dict[str, Any]] = {}
+
+    def _timestamp(self, days: int = 365) -> datetime:
+        return EPOCH - timedelta(seconds=self.random.randrange(days * 24 * 3600))
+
+    def _text(self, words: int) -> str:
+        return " ".join(self.random.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    def _location(self):
+        name, latitude, longitude = self.random.choice(LOCATIONS)
+        # within ~1.5 km of the barangay center
+        return (
+            name,
+            round(latitude + self.random.uniform(-0.0135, 0.0135), 6),
+            round(longitude + self.random.uniform(-0.0135, 0.0135), 6),
+        )
+
+    def users(self) -> Iterator[Dict[str, Any]]:
+        for user_id in range(1, self.counts.users + 1):
+            first_name = self.random.choice(["Juan", "Maria", "Jose", "Ana", "Paolo", "Liza", "Mark", "Grace"])
+            last_name = self.random.choice(["Santos", "Reyes", "Cruz", "Bautista", "Garcia", "Mendoza"])
+            created_at = self._timestamp(720)
+            full_name = f"{first_name} {last_name}"
+            contact = f"09{self.random.randrange(10 ** 9):09d}"
+            self._owners.append((full_name, contact))
+            yield {
+                "id": user_id,
+                "email": f"{USERNAME_PREFIX}{user_id}@example.com",
+                "username": f"{USERNAME_PREFIX}{user_id}",
+                "hashed_password": self.hashed_password,
+                "full_name": full_name,
+                "first_name": first_name,
+                "last_name": last_name,
+                "contact": contact,
+                "city": "Quezon City",
+                "country": "Philippines",
+                "is_active": True,
+                # a few admins, so admin featured listings aren't empty
+                "is_superuser": user_id % 50 == 1,
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+
+    def pets(self) -> Iterator[Dict[str, Any]]:
+        """Adoption pets first, then lost pets, then pets only vaccinated."""
+        counts = self.counts
+        for pet_id in range(1, counts.pets + 1):
+            if pet_id <= counts.adoption_pets:
+                purpose = "ADOPTION"
+            elif pet_id <= counts.adoption_pets + counts.lost_pets:
+                purpose = "LOST_PET"
+            else:
+                purpose = "VACCINATION"
+            pet_type = self.random.choices(list(TYPE_WEIGHTS), weights=list(TYPE_WEIGHTS.values()))[0]
+            created_at = self._timestamp()
+            row = {
+                "id": pet_id,
+                "type": pet_type,
+                "name": self.random.choice(NAMES),
+                "breed": self.random.choice(BREEDS[pet_type]),
+                "gender": self.random.choice(["MALE", "FEMALE"]),
+                "age": self.random.choice(AGES),
+                "color": self.random.choice(COLORS),
+                "size": self.random.choice(SIZES),
+                "description": self._text(self.random.randint(8, 30)),
+                "image_url": f"/static/uploads/pets/bench/{pet_id}.png",
+                "is_for_adoption": purpose == "ADOPTION",
+                "purpose": purpose,
+                "owner_id": self.random.randint(1, counts.users),
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+            self._pets.append(PetMeta(pet_id, created_at, pet_type, row["owner_id"]))
+            yield row
+
+    def adoption_pets(self) -> Iterator[Dict[str, Any]]:
+        """The first pets, view_count is set once the views are inserted."""
+        for adoption_pet_id, pet in enumerate(self._pets[: self.counts.adoption_pets], 1):
+            name, _, _ = self._location()
+            media = [
+                f"/static/uploads/pets/bench/{pet.id}-{index}.png"
+                for index in range(self.random.choice([0, 0, 1, 2, 3]))
+            ]
+            yield {
+                "id": adoption_pet_id,
+                "pet_id": pet.id,
+                "found_in": name,
+                "is_vaccinated": self.random.random() < 0.7,
+                "is_neutered": self.random.random() < 0.5,
+                "additional_details": self._text(10),
+                "media": media or None,
+                "status": self.random.choice(ADOPTION_STATUSES),
+                "created_at": pet.created_at,
+                "updated_at": pet.created_at,
+                "view_count": 0,
+            }
+
+    def adoption_pet_views(self) -> Iterator[Dict[str, Any]]:
+        """Views skewed to a few popular pets, counted in view_counts."""
+        adoption_pets = self.counts.adoption_pets
+        for view_id in range(1, self.counts.adoption_pet_views + 1):
+            # pareto rank, the first pets of the shuffled order get most views
+            index = min(int(self.random.paretovariate(1.2)) - 1, adoption_pets - 1)
+            index = (index * 7919) % adoption_pets
+            # adoption pet i is pet i
+            pet = self._pets[index]
+            self.view_counts[index + 1] += 1
+            viewed_at = pet.created_at + timedelta(seconds=self.random.randrange(30 * 24 * 3600))
+            yield {
+                "id": view_id,
+                "adoption_pet_id": index + 1,
+                "viewed_at": viewed_at,
+                "created_at": viewed_at,
+                "updated_at": viewed_at,
+            }
+
+    def lost_pets(self) -> Iterator[Dict[str, Any]]:
+        counts = self.counts
+        lost = self._pets[counts.adoption_pets: counts.adoption_pets + counts.lost_pets]
+        for lost_pet_id, pet in enumerate(lost, 1):
+            name, latitude, longitude = self._location()
+            self._lost_pets.append((lost_pet_id, pet.created_at))
+            yield {
+                "id": lost_pet_id,
+                "pet_id": pet.id,
+                "last_seen_location": name,
+                "last_seen_latitude": latitude,
+                "last_seen_longitude": longitude,
+                "last_seen_date": pet.created_at - timedelta(hours=self.random.randint(1, 72)),
+                "additional_details": self._text(12),
+                "status": self.random.choice(LOST_PET_STATUSES),
+                "created_at": pet.created_at,
+                "updated_at": pet.created_at,
+            }
+
+    def lost_pet_reports(self) -> Iterator[Dict[str, Any]]:
+        for report_id in range(1, self.counts.lost_pet_reports + 1):
+            lost_pet_id, lost_at = self.random.choice(self._lost_pets)
+            name, latitude, longitude = self._location()
+            report_date = lost_at + timedelta(hours=self.random.randint(1, 240))
+            yield {
+                "id": report_id,
+                "lost_pet_id": lost_pet_id,
+                "reporter_id": self.random.randint(1, self.counts.users),
+                "details": self._text(self.random.randint(6, 20)),
+                "report_location": name,
+                "report_latitude": latitude,
+                "report_longitude": longitude,
+                "report_date": report_date,
+                "image_url": f"/static/uploads/lost_pet_reports/bench/{report_id}.png",
+                "is_matched": self.random.random() < 0.5,
+                "created_at": report_date,
+                "updated_at": report_date,
+            }
+
+    def vaccination_records(self) -> Iterator[Dict[str, Any]]:
+        for record_id in range(1, self.counts.vaccination_records + 1):
+            pet = self.random.choice(self._pets)
+            full_name, contact = self._owners[pet.owner_id - 1]
+            administered_date = self._timestamp(3 * 365)
+            record = {
+                "id": record_id,
+                "pet_id": pet.id,
+                "vaccine_type": self.random.choice(VACCINES[pet.type]),
+                "owner": full_name[:36],
+                "contact": contact,
+                "administered_date": administered_date,
+                "administered_by": self.random.choice(["QC Vet Clinic", "Dr. Reyes", "Dr. Santos", "Mobile Clinic"]),
+                "expiration_date": administered_date + timedelta(days=365),
+                "notes": self._text(6),
+                "created_at": administered_date,
+                "updated_at": administered_date,
+            }
+            key = (record["pet_id"], record["vaccine_type"])
+            latest = self._latest_vaccinations.get(key)
+            if latest is None or (administered_date, record_id) > (latest["administered_date"], latest["id"]):
+                self._latest_vaccinations[key] = record
+            yield record
+
+    def pet_vaccination_statuses(self) -> Iterator[Dict[str, Any]]:
+        """The statuses app/crud/vaccination.py keeps, after vaccination_records ran."""
+        for (pet_id, vaccine_type), record in sorted(self._latest_vaccinations.items()):
+            yield {
+                "pet_id": pet_id,
+                "vaccine_type": vaccine_type,
+                "record_id": record["id"],
+                "administered_date": record["administered_date"],
+                "expiration_date": record["expiration_date"],
+                "updated_at": record["administered_date"],
+            }
+
+
+def seed(engine: Engine, pets: int = SCALES["small"], seed: int = DEFAULT_SEED, reset: bool = False) -> ScaleCounts:
+    """
+    Create the tables and insert the data set of pets pets. A database
+    already holding users is only seeded again with reset, which drops
+    every table first.
+    """
+    from app.core.database import Base
+    from app.core.security import get_password_hash
+    from app.models import (
+        AdoptionPet,
+        AdoptionPetViews,
+        LostPet,
+        LostPetReport,
+        Pet,
+        PetVaccinationStatus,
+        User,
+        VaccinationRecord,
+    )
+
+    counts = scale_counts(pets)
+    if reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        existing = conn.execute(func.count(User.id).select()).scalar()
+        if existing:
+            raise SystemExit(f"The database already holds {existing} users, seed with --reset to replace them")
+
+        generator = Generator(counts, seed, hashed_password=get_password_hash(BENCH_PASSWORD))
+        for model, rows in (
+            (User, generator.users()),
+            (Pet, generator.pets()),
+            (AdoptionPet, generator.adoption_pets()),
+            (AdoptionPetViews, generator.adoption_pet_views()),
+            (LostPet, generator.lost_pets()),
+            (LostPetReport, generator.lost_pet_reports()),
+            (VaccinationRecord, generator.vaccination_records()),
+            (PetVaccinationStatus, generator.pet_vaccination_statuses()),
+        ):
+            for chunk in _chunks(rows):
+                conn.execute(insert(model.__table__), chunk)
+
+        table = AdoptionPet.__table__
+        view_counts = [{"b_id": key, "views": value} for key, value in sorted(generator.view_counts.items())]
+        for chunk in _chunks(view_counts):
+            conn.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values(view_count=bindparam("views"), updated_at=table.c.updated_at),
+                chunk,
+            )
+    return counts
+
+
+def refresh_derived(engine: Engine) -> None:
+    """Feed scores of the seeded adoption pets, as the feed worker would compute them."""
+    from sqlalchemy.orm import Session
+
+    from app.crud.adoption_pet import refresh_adoption_pet_feed_scores
+
+    with Session(engine) as db:
+        while refresh_adoption_pet_feed_scores(db):
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="defaults to BENCH_DATABASE_URL, else a SQLite file")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--reset", action="store_true", help="drop every table of the database first")
+    args = parser.parse_args()
+
+    from benchmarks.environment import setup
+
+    engine = setup(args.database_url)
+    started_at = time.perf_counter()
+    counts = seed(engine, SCALES[args.scale], args.seed, reset=args.reset)
+    refresh_derived(engine)
+    print(f"Seeded {engine.url.render_as_string(hide_password=True)} in {time.perf_counter() - started_at:.1f}s")
+    for name, count in counts._asdict().items():
+        print(f"  {name:<20} {count:>9}")
+
+
+if __name__ == "__main__":
+    main()
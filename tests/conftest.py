@@ -0,0 +1,44 @@
+"""
+The app on an in-memory SQLite database and the in-memory redis of the
+benchmarks, both emptied before every test, and the lost and similar pet indexes
+of the process rebuilt from them. The response cache is off so every request
+reaches the database.
+
+    pip install -r tests/requirements.txt
+    python -m pytest
+"""
+import pytest
+from benchmarks import environment
+
+engine = environment.setup("sqlite://", response_cache=False)
+
+from sqlalchemy.orm import Session  # noqa: E402
+from starlette.testclient import TestClient  # noqa: E402
+
+from app.core.database import Base  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.image_hash import lost_pet_image_index  # noqa: E402
+from app.utils.lost_pet_matcher import lost_pet_matcher  # noqa: E402
+from app.utils.similar_pets import similar_pet_index  # noqa: E402
+from benchmarks.fake_redis import fake_redis  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.create_all(engine)
+    fake_redis.flushdb()
+    for index in (lost_pet_matcher, lost_pet_image_index, similar_pet_index):
+        index._loaded_at = None
+    yield engine
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def db(database):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def client(database):
+    return TestClient(app)
@@ -0,0 +1,100 @@
+"""Rows of the tests, with the required columns filled in."""
+import itertools
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.models import Adoption, AdoptionPet, LostPet, LostPetReport, Pet, User, VaccinationRecord
+
+_sequence = itertools.count(1)
+
+
+def make_user(db: Session, **values) -> User:
+    number = next(_sequence)
+    user = User(
+        email=f"user{number}@example.com",
+        username=f"user{number}",
+        hashed_password="not-a-hash",
+        full_name=f"User {number}",
+        **values,
+    )
+    db.add(user)
+    db.flush()
+    return user
+
+
+def make_pet(db: Session, owner: User = None, **values) -> Pet:
+    values = {
+        "type": "Dog",
+        "name": "Bantay",
+        "breed": "Aspin",
+        "color": "Brown",
+        "size": "Medium",
+        "description": "Friendly.",
+        **values,
+    }
+    pet = Pet(owner_id=(owner or make_user(db)).id, **values)
+    db.add(pet)
+    db.flush()
+    return pet
+
+
+def make_lost_pet(db: Session, pet: Pet = None, **values) -> LostPet:
+    values = {"last_seen_location": "Batasan Hills", "last_seen_date": datetime(2026, 10, 1), **values}
+    lost_pet = LostPet(pet_id=(pet or make_pet(db)).id, **values)
+    db.add(lost_pet)
+    db.flush()
+    return lost_pet
+
+
+def make_report(db: Session, lost_pet: LostPet = None, reporter: User = None, **values) -> LostPetReport:
+    values = {
+        "details": "Seen near the market.",
+        "report_location": "Batasan Hills",
+        "report_date": datetime(2026, 10, 2),
+        "image_url": "/static/uploads/lost_pet_reports/test.png",
+        "is_matched": True,
+        **values,
+    }
+    report = LostPetReport(
+        lost_pet_id=(lost_pet or make_lost_pet(db)).id,
+        reporter_id=(reporter or make_user(db)).id,
+        **values,
+    )
+    db.add(report)
+    db.flush()
+    return report
+
+
+def make_adoption_pet(db: Session, pet: Pet = None, **values) -> AdoptionPet:
+    values = {"found_in": "Batasan Hills", **values}
+    adoption_pet = AdoptionPet(pet_id=(pet or make_pet(db)).id, **values)
+    db.add(adoption_pet)
+    db.flush()
+    return adoption_pet
+
+
+def make_adoption(db: Session, adoption_pet: AdoptionPet = None, adopter: User = None, **values) -> Adoption:
+    adoption = Adoption(
+        adoption_pet_id=(adoption_pet or make_adoption_pet(db)).id,
+        adopter_id=(adopter or make_user(db)).id,
+        **values,
+    )
+    db.add(adoption)
+    db.flush()
+    return adoption
+
+
+def make_vaccination(db: Session, pet: Pet = None, **values) -> VaccinationRecord:
+    values = {
+        "vaccine_type": "RABIES",
+        "owner": "Juan",
+        "contact": "juan@example.com",
+        "administered_by": "QC Vet",
+        "expiration_date": datetime(2027, 10, 1),
+        **values,
+    }
+    record = VaccinationRecord(pet_id=(pet or make_pet(db)).id, **values)
+    db.add(record)
+    db.flush()
+    return record
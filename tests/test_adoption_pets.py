@@ -0,0 +1,42 @@
+from app.crud.pet import delete_pet, update_pet
+from app.models import AdoptionPet
+from tests.factories import make_adoption_pet, make_pet
+
+
+def test_new_pets_are_ranked_at_once(client, db):
+    older_pet_id, newer_pet_id = make_pet(db).id, make_pet(db).id
+    db.commit()
+
+    for pet_id, media in ((older_pet_id, None), (newer_pet_id, ["/static/uploads/pets/bantay.png"])):
+        response = client.post(
+            "/v1/adoption-pet/add",
+            json={"pet_id": pet_id, "found_in": "Batasan Hills", "is_vaccinated": True, "is_neutered": False, "media": media},
+        )
+        assert response.status_code == 201
+
+    assert db.query(AdoptionPet).filter(AdoptionPet.feed_score.is_(None)).count() == 0
+    ranked = client.get("/v1/adoption-pet/list-available", params={"sort_by": "ranked"}).json()
+    # newer and with media, so ahead
+    assert [item["pet"]["id"] for item in ranked] == [newer_pet_id, older_pet_id]
+
+
+def _similar(client, adoption_pet_id):
+    response = client.get(f"/v1/adoption-pet/{adoption_pet_id}/similar")
+    assert response.status_code == 200
+    return [item["id"] for item in response.json()]
+
+
+def test_similar_pets_follow_pet_edits(client, db):
+    listed = make_adoption_pet(db, pet=make_pet(db, age="2")).id
+    close = make_adoption_pet(db, pet=make_pet(db, age="3")).id
+    other = make_adoption_pet(db, pet=make_pet(db, breed="Poodle", color="White", size="Small", age="9"))
+    db.commit()
+
+    assert _similar(client, listed) == [close, other.id]
+
+    # the pet now matches the listed one exactly
+    update_pet(db, db_pet=other.pet, pet_in={"breed": "Aspin", "color": "Brown", "size": "Medium", "age": "2"})
+    assert _similar(client, listed) == [other.id, close]
+
+    delete_pet(db, pet_id=other.pet_id)
+    assert _similar(client, listed) == [close]
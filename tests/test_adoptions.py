@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from app.models import Adoption
+from tests.factories import make_adoption, make_adoption_pet
+
+
+def test_single_approval_refused_when_the_pet_has_one(client, db):
+    adoption_pet = make_adoption_pet(db)
+    make_adoption(db, adoption_pet=adoption_pet, status="approved")
+    adoption_id = make_adoption(db, adoption_pet=adoption_pet).id
+    db.commit()
+
+    response = client.patch(f"/v1/adoption/adoptions/{adoption_id}/status", json={"status": "approved"})
+
+    assert response.status_code == 409
+    assert db.get(Adoption, adoption_id).status == "pending"
+
+
+def test_bulk_approval_refused_when_the_pet_has_one(client, db):
+    adoption_pet = make_adoption_pet(db)
+    make_adoption(db, adoption_pet=adoption_pet, status="approved")
+    adoption_id = make_adoption(db, adoption_pet=adoption_pet).id
+    other_id = make_adoption(db).id
+    db.commit()
+
+    response = client.patch(
+        "/v1/adoption/adoptions/status", json={"adoption_ids": [adoption_id, other_id], "status": "approved"}
+    )
+
+    assert response.status_code == 409
+    assert db.get(Adoption, adoption_id).status == "pending"
+    assert db.get(Adoption, other_id).status == "pending"
+
+
+def test_bulk_approval_reports_every_changed_request(client, db):
+    adoption_pet = make_adoption_pet(db)
+    adoption_id = make_adoption(db, adoption_pet=adoption_pet).id
+    sibling_id = make_adoption(db, adoption_pet=adoption_pet).id
+    rejected_id = make_adoption(db, status="rejected").id
+    db.commit()
+
+    response = client.patch(
+        "/v1/adoption/adoptions/status",
+        json={"adoption_ids": [adoption_id, rejected_id], "status": "approved", "reject_siblings": True},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert {item["id"]: item["status"] for item in body["items"]} == {adoption_id: "approved", sibling_id: "rejected"}
+    assert body["skipped"] == [rejected_id]
+
+
+def test_adoption_list_pages_with_the_cursor(client, db):
+    adoption_ids = [make_adoption(db, created_at=datetime(2026, 10, day)).id for day in (1, 2, 3)]
+    db.commit()
+
+    first = client.get("/v1/adoption/adoptions", params={"limit": 2}).json()
+    second = client.get("/v1/adoption/adoptions", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+
+    assert [item["id"] for item in first["items"] + second["items"]] == adoption_ids
+    assert first["total"] == 3
+    assert second["next_cursor"] is None
+
+
+def test_adoption_list_refuses_an_empty_page(client):
+    assert client.get("/v1/adoption/adoptions", params={"limit": 0}).status_code == 422
+    assert client.get("/v1/adoption/adoptions", params={"limit": -1}).status_code == 422
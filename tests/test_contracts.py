@@ -0,0 +1,47 @@
+import time
+import zipfile
+from io import BytesIO
+
+from app.utils.contract import ContractRenderer, contract_filename
+from app.utils.contract_jobs import ContractJobManager
+
+CONTEXT = {
+    "pet_breed": "Aspin",
+    "pet_color": "Brown",
+    "pet_gender": "MALE",
+    "pet_type": "Dog",
+    "pet_name": "Bantay",
+    "contact_no": None,
+    "address": "",
+    "date": "October, 19 2026",
+}
+
+
+def test_download_name_keeps_only_plain_characters():
+    assert contract_filename({"adopter": "Juan dela Cruz"}) == "Juan_dela_Cruz_adoption_contract_document.docx"
+    assert contract_filename({"adopter": "../../etc/C/c"}, "pdf") == "etcCc_adoption_contract_document.pdf"
+    assert contract_filename({"adopter": "/"}) == "adopter_adoption_contract_document.docx"
+
+
+def test_job_files_are_named_by_adoption():
+    manager = ContractJobManager(max_workers=1)
+    try:
+        job = manager.submit([(1, {**CONTEXT, "adopter": "C/c"}), (2, {**CONTEXT, "adopter": "../x"})])
+        deadline = time.monotonic() + 60
+        while not job.is_finished and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+        assert job.errors == []
+        with zipfile.ZipFile(BytesIO(b"".join(job.iter_zip()))) as archive:
+            assert archive.namelist() == ["1.docx", "2.docx"]
+    finally:
+        manager.shutdown()
+
+
+def test_cached_render_follows_the_context():
+    renderer = ContractRenderer()
+    first = renderer.render_cached({**CONTEXT, "adopter": "Juan"})
+
+    assert renderer.render_cached({**CONTEXT, "adopter": "Juan"}) is first
+    assert renderer.render_cached({**CONTEXT, "adopter": "Maria"}) is not first
+    assert renderer.render_cached({**CONTEXT, "adopter": "Juan", "date": "October, 20 2026"}) is not first
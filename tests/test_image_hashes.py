@@ -0,0 +1,42 @@
+from app.crud.lost_pet_report import get_lost_pet_reports_for_matching
+from app.models import LostPetReport, Pet
+from app.tasks.image_hashes import backfill_image_hashes
+from tests.factories import make_lost_pet, make_pet, make_report
+
+
+def test_backfill_keeps_the_pets_live(db):
+    pet_id = make_pet(db, image_url="/static/uploads/pets/missing.png").id
+    db.commit()
+
+    assert backfill_image_hashes(db) == 1
+
+    db.expire_all()
+    pet = db.get(Pet, pet_id)
+    # the file can't be read, so the pet isn't retried
+    assert pet.image_hash == ""
+    assert pet.deleted_at is None
+
+
+def test_candidates_leave_the_hashes_to_the_backfill(client, db):
+    pet_id = make_pet(db, image_url="/static/uploads/pets/missing.png").id
+    report_id = make_report(db, lost_pet=make_lost_pet(db)).id
+    db.commit()
+
+    assert client.get(f"/v1/lost-pet-report/{report_id}/candidates").status_code == 200
+    assert [report.id for report in get_lost_pet_reports_for_matching(db, [report_id])] == [report_id]
+
+    db.expire_all()
+    assert db.get(Pet, pet_id).image_hash is None
+    assert db.get(LostPetReport, report_id).image_hash is None
+
+
+def test_backfill_hashes_the_reports(db):
+    report_id = make_report(db).id
+    db.commit()
+
+    assert backfill_image_hashes(db) == 1
+
+    db.expire_all()
+    report = db.get(LostPetReport, report_id)
+    assert report.image_hash == ""
+    assert report.deleted_at is None
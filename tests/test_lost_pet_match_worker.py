@@ -0,0 +1,62 @@
+import pytest
+from redis.exceptions import RedisError
+
+from app.models import LostPetMatchCandidate
+from app.tasks import lost_pet_report as worker
+from benchmarks.fake_redis import fake_redis
+from tests.factories import make_lost_pet, make_report
+
+
+@pytest.fixture(autouse=True)
+def no_batch_window(monkeypatch):
+    monkeypatch.setattr(worker, "MATCH_BATCH_WINDOW_SECONDS", 0)
+
+
+def test_interrupted_batch_is_queued_again():
+    worker.enqueue_report_for_matching(7)
+
+    assert worker.collect_report_batch() == [7]
+    # the worker crashed before finishing the batch
+    assert worker.requeue_interrupted_reports() == 1
+    assert worker.collect_report_batch() == [7]
+
+
+def test_failed_batch_is_queued_again():
+    worker.enqueue_report_for_matching(7)
+    report_ids = worker.collect_report_batch()
+
+    assert worker.requeue_report_batch(report_ids) == 1
+    assert fake_redis.scard(worker.LOST_PET_REPORT_MATCH_PROCESSING) == 0
+    assert worker.collect_report_batch() == [7]
+
+
+def test_batch_stays_in_processing_when_requeue_fails(monkeypatch):
+    worker.enqueue_report_for_matching(7)
+    report_ids = worker.collect_report_batch()
+
+    def smove(*args):
+        raise RedisError("connection lost")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(fake_redis, "smove", smove)
+        assert worker.requeue_report_batch(report_ids) == 0
+
+    # not lost, the worker queues it again on restart
+    assert fake_redis.scard(worker.LOST_PET_REPORT_MATCH_PROCESSING) == 1
+    assert worker.requeue_interrupted_reports() == 1
+    assert worker.collect_report_batch() == [7]
+
+
+def test_processed_batch_leaves_processing(db):
+    report_id = make_report(db).id
+    make_lost_pet(db)
+    db.commit()
+    worker.enqueue_report_for_matching(report_id)
+
+    report_ids = worker.collect_report_batch()
+    assert worker.process_report_batch(db, report_ids) == 1
+    worker.finish_report_batch(report_ids)
+
+    assert fake_redis.scard(worker.LOST_PET_REPORT_MATCH_PROCESSING) == 0
+    assert worker.requeue_interrupted_reports() == 0
+    assert db.query(LostPetMatchCandidate).filter_by(report_id=report_id).count() > 0
@@ -0,0 +1,30 @@
+from app.models import LostPet
+from app.models.pet import LostPetStatus
+from app.utils.lost_pet_matcher import lost_pet_matcher
+from tests.factories import make_lost_pet, make_report
+
+
+def test_status_change_keeps_the_case_live(client, db):
+    lost_pet_id = make_lost_pet(db).id
+    db.commit()
+
+    response = client.patch(f"/v1/lost-pet/{lost_pet_id}/status", json={"status": "SEARCHING"})
+
+    assert response.status_code == 200
+    lost_pet = db.get(LostPet, lost_pet_id)
+    assert lost_pet.deleted_at is None
+    assert lost_pet.status == LostPetStatus.SEARCHING
+    assert lost_pet_id in [case["id"] for case in client.get("/v1/lost-pet/list", params={"limit": 50}).json()]
+    assert lost_pet_id in lost_pet_matcher._slots
+    assert client.patch(f"/v1/lost-pet/{lost_pet_id}/status", json={"status": "FOUND"}).status_code == 200
+
+
+def test_report_candidates_leave_out_the_reported_case(client, db):
+    report_id = make_report(db, lost_pet=make_lost_pet(db)).id
+    other_id = make_lost_pet(db).id
+    db.commit()
+
+    response = client.get(f"/v1/lost-pet-report/{report_id}/candidates")
+
+    assert response.status_code == 200
+    assert [item["lost_pet"]["id"] for item in response.json()["items"]] == [other_id]
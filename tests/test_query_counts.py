@@ -0,0 +1,48 @@
+"""Statements run by the lost pet report endpoints, whatever the page size."""
+import pytest
+
+from app.utils.query_counter import assert_num_queries
+from tests.conftest import engine
+from tests.factories import make_report, make_user
+
+
+@pytest.mark.parametrize("reports", [2, 8])
+def test_report_list_statements(client, db, reports):
+    reporter = make_user(db)
+    for _ in range(reports):
+        make_report(db, reporter=reporter)
+    db.commit()
+
+    with assert_num_queries(engine, 5):
+        response = client.get("/v1/lost-pet-report/list", params={"limit": 20})
+
+    assert response.status_code == 200
+    assert len(response.json()) == reports
+
+
+def test_report_detail_statements(client, db):
+    report_id = make_report(db).id
+    db.commit()
+
+    with assert_num_queries(engine, 1):
+        response = client.get(f"/v1/lost-pet-report/{report_id}")
+
+    assert response.status_code == 200
+    assert response.json()["id"] == report_id
+
+
+def test_report_match_update_statements(client, db):
+    report_id = make_report(db, is_matched=False).id
+    db.commit()
+
+    with assert_num_queries(engine, 2):
+        response = client.patch(f"/v1/lost-pet-report/{report_id}/match", json={"is_matched": True})
+
+    assert response.status_code == 200
+    assert response.json()["is_matched"] is True
+
+
+def test_report_match_update_of_missing_report(client):
+    response = client.patch("/v1/lost-pet-report/404/match", json={"is_matched": True})
+
+    assert response.status_code == 404
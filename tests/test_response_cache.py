@@ -0,0 +1,87 @@
+import pytest
+
+from app.crud.pet import update_pet
+from app.utils import response_cache as response_cache_module
+from app.utils.response_cache import response_cache
+from tests.factories import make_adoption_pet, make_lost_pet
+from tests.test_vaccinations import ROW
+
+
+@pytest.fixture
+def cached(monkeypatch):
+    """The response cache in front of the app, as it runs by default."""
+    monkeypatch.setattr(response_cache_module, "RESPONSE_CACHE_ENABLED", True)
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+def _get(client, path, **params):
+    response = client.get(path, params=params)
+    assert response.status_code == 200
+    return response.headers["x-cache"], response.json()
+
+
+def test_pet_edit_evicts_the_pet_and_its_listing(cached, client, db):
+    adoption_pet = make_adoption_pet(db)
+    pet, adoption_pet_id = adoption_pet.pet, adoption_pet.id
+    db.commit()
+    assert _get(client, f"/v1/pet/{pet.id}")[0] == "MISS"
+    assert _get(client, f"/v1/pet/{pet.id}")[0] == "HIT"
+    assert _get(client, f"/v1/adoption-pet/{adoption_pet_id}")[0] == "MISS"
+    assert _get(client, f"/v1/adoption-pet/{adoption_pet_id}")[0] == "HIT"
+
+    update_pet(db, db_pet=pet, pet_in={"name": "Brownie"})
+
+    state, body = _get(client, f"/v1/pet/{pet.id}")
+    assert (state, body["name"]) == ("MISS", "Brownie")
+    state, body = _get(client, f"/v1/adoption-pet/{adoption_pet_id}")
+    assert (state, body["pet"]["name"]) == ("MISS", "Brownie")
+
+
+def test_adoption_status_evicts_the_listing_and_the_list(cached, client, db):
+    adoption_pet_id = make_adoption_pet(db).id
+    db.commit()
+    _get(client, f"/v1/adoption-pet/{adoption_pet_id}")
+    _get(client, "/v1/adoption-pet/list-available")
+    assert [item["id"] for item in _get(client, "/v1/adoption-pet/list-available")[1]] == [adoption_pet_id]
+
+    response = client.patch("/v1/adoption-pet/status/", json={"id": adoption_pet_id, "status": "ADOPTED"})
+    assert response.status_code == 200
+
+    state, body = _get(client, f"/v1/adoption-pet/{adoption_pet_id}")
+    assert (state, body["status"]) == ("MISS", "ADOPTED")
+    assert _get(client, "/v1/adoption-pet/list-available") == ("MISS", [])
+
+
+def test_lost_pet_status_evicts_the_list(cached, client, db):
+    lost_pet_id = make_lost_pet(db).id
+    db.commit()
+    _get(client, "/v1/lost-pet/list", limit=50)
+    assert _get(client, "/v1/lost-pet/list", limit=50)[0] == "HIT"
+
+    response = client.patch(f"/v1/lost-pet/{lost_pet_id}/status", json={"status": "SEARCHING"})
+    assert response.status_code == 200
+
+    state, body = _get(client, "/v1/lost-pet/list", limit=50)
+    assert (state, [case["status"] for case in body]) == ("MISS", ["SEARCHING"])
+
+
+def test_vaccination_writes_evict_the_filtered_list(cached, client, db):
+    adoption_pet = make_adoption_pet(db)
+    adoption_pet_id, pet_id = adoption_pet.id, adoption_pet.pet_id
+    db.commit()
+
+    def vaccinated():
+        state, body = _get(client, "/v1/adoption-pet/list-available", vaccinated_against="Rabies")
+        return state, [item["id"] for item in body]
+
+    assert vaccinated() == ("MISS", [])
+    assert vaccinated() == ("HIT", [])
+
+    response = client.post("/v1/vaccination/vaccinations", json={"pet_id": pet_id, **ROW})
+    assert response.status_code in (200, 201)
+    assert vaccinated() == ("MISS", [adoption_pet_id])
+
+    assert client.delete(f"/v1/vaccination/vaccinations/{response.json()['id']}").status_code in (200, 204)
+    assert vaccinated() == ("MISS", [])
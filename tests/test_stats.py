@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from app.core.security import create_access_token
+from app.models import AdoptionPetViews
+from app.tasks.rollups import run_rollups
+from tests.factories import make_adoption, make_adoption_pet, make_lost_pet, make_user
+
+HOUR = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=2)
+
+
+def _series(client, token, metric):
+    response = client.get(
+        f"/v1/stats/{metric}",
+        params={"granularity": "hour", "start": (HOUR - timedelta(hours=1)).isoformat()},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    return [(item["dimension"], item["count"]) for item in response.json()["items"]]
+
+
+def test_rollups_count_every_row_once(db, client):
+    adoption_pet = make_adoption_pet(db, created_at=HOUR)
+    make_adoption(db, adoption_pet=adoption_pet, created_at=HOUR)
+    make_adoption(
+        db, adoption_pet=adoption_pet, status="approved", created_at=HOUR, updated_at=HOUR, adoption_date=HOUR
+    )
+    make_lost_pet(db, created_at=HOUR)
+    db.add(AdoptionPetViews(adoption_pet_id=adoption_pet.id, viewed_at=HOUR, created_at=HOUR))
+    # too recent, left to a later run
+    make_adoption(db, adoption_pet=adoption_pet, created_at=datetime.now())
+    token = create_access_token(make_user(db, is_superuser=True).id)
+    db.commit()
+
+    assert run_rollups(db) == {
+        "adoption_pet_views": 1,
+        "adoptions_created": 2,
+        "adoptions_approved": 1,
+        "lost_pets_reported": 1,
+    }
+    assert set(run_rollups(db).values()) == {0}
+
+    assert _series(client, token, "adoptions_created") == [("", 2)]
+    assert _series(client, token, "adoptions_approved") == [("", 1)]
+    assert _series(client, token, "lost_pets_reported") == [("Dog", 1)]
+    assert _series(client, token, "adoption_pet_views") == [("Dog", 1)]
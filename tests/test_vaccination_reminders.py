@@ -0,0 +1,60 @@
+import json
+from datetime import datetime, timedelta
+
+from app.tasks.vaccination_reminders import collect_expiring_records, send_reminder_digests
+from app.utils.notifications import NOTIFICATION_QUEUE
+from benchmarks.fake_redis import fake_redis
+from tests.factories import make_vaccination
+
+NOW = datetime(2026, 10, 19)
+
+
+def test_each_record_is_reminded_of_once(db):
+    make_vaccination(db, expiration_date=NOW + timedelta(days=10))
+    make_vaccination(db, expiration_date=NOW + timedelta(days=30))
+    db.commit()
+
+    assert collect_expiring_records(db, NOW) == 1
+    assert collect_expiring_records(db, NOW + timedelta(hours=1)) == 0
+
+
+def test_records_expiring_before_the_last_reminded_are_reminded_of(db):
+    make_vaccination(db, expiration_date=NOW + timedelta(days=10))
+    db.commit()
+    assert collect_expiring_records(db, NOW) == 1
+
+    # entered late, expiring ahead of the record reminded of already
+    make_vaccination(db, expiration_date=NOW + timedelta(days=5))
+    db.commit()
+
+    assert collect_expiring_records(db, NOW + timedelta(hours=1)) == 1
+
+
+def test_a_new_expiry_is_reminded_of_again(client, db):
+    record_id = make_vaccination(db, expiration_date=NOW + timedelta(days=10)).id
+    db.commit()
+    assert collect_expiring_records(db, NOW) == 1
+
+    response = client.patch(
+        f"/v1/vaccination/vaccinations/{record_id}",
+        json={"expiration_date": (NOW + timedelta(days=3)).isoformat()},
+    )
+
+    assert response.status_code == 200
+    assert collect_expiring_records(db, NOW + timedelta(hours=1)) == 1
+
+
+def test_one_digest_per_contact(db):
+    for days in (3, 10):
+        make_vaccination(db, expiration_date=NOW + timedelta(days=days))
+    make_vaccination(db, contact="maria@example.com", expiration_date=NOW + timedelta(days=7))
+    db.commit()
+    collect_expiring_records(db, NOW)
+
+    assert send_reminder_digests() == 2
+    digests = {digest["contact"]: digest for digest in map(json.loads, fake_redis.spop(NOTIFICATION_QUEUE, 10))}
+    assert [record["expiration_date"][:10] for record in digests["juan@example.com"]["records"]] == [
+        "2026-10-22",
+        "2026-10-29",
+    ]
+    assert len(digests["maria@example.com"]["records"]) == 1
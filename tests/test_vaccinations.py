@@ -0,0 +1,92 @@
+import json
+from datetime import datetime
+
+from app.models import VaccinationRecord
+from app.models.vaccination import VaccineType
+from tests.factories import make_pet
+
+ROW = {
+    "vaccine_type": "Rabies",
+    "owner": "Juan",
+    "contact": "juan@example.com",
+    "administered_by": "QC Vet",
+    "expiration_date": "2027-10-01T00:00:00",
+}
+
+
+def test_import_keeps_the_administered_dates(client, db):
+    pet_id = make_pet(db).id
+    db.commit()
+    csv = (
+        "pet_id,vaccine_type,owner,contact,administered_by,administered_date,expiration_date\n"
+        f"{pet_id},Rabies,Juan,juan@example.com,QC Vet,2025-10-01T09:30:00,2026-10-01T00:00:00\n"
+        f"{pet_id},Distemper,Juan,juan@example.com,QC Vet,,2026-10-01T00:00:00\n"
+    )
+
+    started = datetime.utcnow()
+    response = client.post(
+        "/v1/vaccination/vaccinations/import", files={"file": ("records.csv", csv.encode(), "text/csv")}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+    dates = dict(db.query(VaccinationRecord.vaccine_type, VaccinationRecord.administered_date))
+    assert dates[VaccineType.RABIES] == datetime(2025, 10, 1, 9, 30)
+    # left out, the record is stamped with the import time
+    assert dates[VaccineType.DISTEMPER] >= started.replace(microsecond=0)
+
+
+def test_export_imports_again_as_it_was(client, db):
+    pet_id = make_pet(db).id
+    db.commit()
+    row = {"pet_id": pet_id, "administered_date": "2025-10-01T09:30:00", **ROW}
+    client.post(
+        "/v1/vaccination/vaccinations/import",
+        files={"file": ("records.ndjson", (json.dumps(row) + "\n").encode(), "application/x-ndjson")},
+    )
+
+    exported = client.get("/v1/vaccination/vaccinations/export", params={"format": "ndjson"}).content
+    response = client.post(
+        "/v1/vaccination/vaccinations/import", files={"file": ("records.ndjson", exported, "application/x-ndjson")}
+    )
+
+    assert response.json()["created"] == 1
+    assert [date for (date,) in db.query(VaccinationRecord.administered_date)] == [datetime(2025, 10, 1, 9, 30)] * 2
+
+
+def _statuses(client, pet_id):
+    response = client.get(f"/v1/vaccination/pets/{pet_id}/status")
+    assert response.status_code == 200
+    return {status["vaccine_type"]: status["record_id"] for status in response.json()}
+
+
+def _currently_vaccinated(client, pet_id):
+    response = client.get("/v1/vaccination/vaccinations", params={"pet_id": pet_id, "currently_vaccinated": True})
+    assert response.status_code == 200
+    return sorted(item["id"] for item in response.json()["items"])
+
+
+def test_statuses_follow_the_records(client, db):
+    pet_id = make_pet(db).id
+    db.commit()
+
+    def create():
+        response = client.post("/v1/vaccination/vaccinations", json={"pet_id": pet_id, **ROW})
+        assert response.status_code in (200, 201)
+        return response.json()["id"]
+
+    first_id = create()
+    assert _statuses(client, pet_id) == {"Rabies": first_id}
+    # the latest record of a vaccine type counts, not the ones before it
+    second_id = create()
+    assert _statuses(client, pet_id) == {"Rabies": second_id}
+    assert _currently_vaccinated(client, pet_id) == [second_id]
+
+    response = client.patch(f"/v1/vaccination/vaccinations/{second_id}", json={"vaccine_type": "Distemper"})
+    assert response.status_code == 200
+    assert _statuses(client, pet_id) == {"Rabies": first_id, "Distemper": second_id}
+    assert _currently_vaccinated(client, pet_id) == [first_id, second_id]
+
+    assert client.delete(f"/v1/vaccination/vaccinations/{first_id}").status_code in (200, 204)
+    assert _statuses(client, pet_id) == {"Distemper": second_id}
+    assert _currently_vaccinated(client, pet_id) == [second_id]